@@ -1,7 +1,14 @@
 # -*- coding: utf-8 -*-
 from .api.opencti_api_client import OpenCTIApiClient
+from .api.opencti_api_async_client import AsyncOpenCTIApiClient
 from .api.opencti_api_connector import OpenCTIApiConnector
 from .api.opencti_api_work import OpenCTIApiWork
+from .api.opencti_api_context import (
+    RequestContext,
+    current_request_context,
+    request_context,
+    submit_in_context,
+)
 
 from .connector.opencti_connector import ConnectorType
 from .connector.opencti_connector import OpenCTIConnector
@@ -9,6 +16,13 @@ from .connector.opencti_connector_helper import (
     OpenCTIConnectorHelper,
     get_config_variable,
 )
+from .connector.opencti_connector_publisher import (
+    BundlePublisher,
+    PikaBroker,
+    InMemoryBroker,
+    PublishBatch,
+    PublishError,
+)
 
 from .entities.opencti_label import Label
 from .entities.opencti_marking_definition import MarkingDefinition
@@ -45,6 +59,12 @@ from .entities.opencti_indicator import Indicator
 from .utils.opencti_stix2 import OpenCTIStix2
 from .utils.opencti_stix2_splitter import OpenCTIStix2Splitter
 from .utils.opencti_stix2_update import OpenCTIStix2Update
+from .utils.opencti_mapping_cache import (
+    MappingCache,
+    SqliteCacheBackend,
+    ShelveCacheBackend,
+)
+from .utils.opencti_resolution_index import ResolutionIndex
 from .utils.opencti_stix2_utils import (
     OpenCTIStix2Utils,
     SimpleObservable,
@@ -54,12 +74,22 @@ from .utils.constants import StixCyberObservableTypes
 
 __all__ = [
     "OpenCTIApiClient",
+    "AsyncOpenCTIApiClient",
     "OpenCTIApiConnector",
     "OpenCTIApiWork",
+    "RequestContext",
+    "current_request_context",
+    "request_context",
+    "submit_in_context",
     "ConnectorType",
     "OpenCTIConnector",
     "OpenCTIConnectorHelper",
     "get_config_variable",
+    "BundlePublisher",
+    "PikaBroker",
+    "InMemoryBroker",
+    "PublishBatch",
+    "PublishError",
     "Label",
     "MarkingDefinition",
     "ExternalReference",
@@ -90,6 +120,10 @@ __all__ = [
     "OpenCTIStix2",
     "OpenCTIStix2Splitter",
     "OpenCTIStix2Update",
+    "MappingCache",
+    "SqliteCacheBackend",
+    "ShelveCacheBackend",
+    "ResolutionIndex",
     "OpenCTIStix2Utils",
     "StixCyberObservableTypes",
     "SimpleObservable",
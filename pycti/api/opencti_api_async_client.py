@@ -0,0 +1,287 @@
+# coding: utf-8
+
+import asyncio
+import logging
+
+from pycti.api.opencti_api_client import OpenCTIApiClient
+from pycti.api.opencti_api_pagination import Pagination
+from pycti.utils import opencti_json
+from pycti.api.opencti_api_replay import QueryReplay
+
+ENTITIES = [
+    "label",
+    "marking_definition",
+    "external_reference",
+    "kill_chain_phase",
+    "opencti_stix_object_or_stix_relationship",
+    "stix_domain_object",
+    "stix_cyber_observable",
+    "stix_core_relationship",
+    "stix_sighting_relationship",
+    "stix_cyber_observable_relationship",
+    "identity",
+    "location",
+    "threat_actor",
+    "intrusion_set",
+    "infrastructure",
+    "campaign",
+    "x_opencti_incident",
+    "malware",
+    "tool",
+    "vulnerability",
+    "attack_pattern",
+    "course_of_action",
+    "report",
+    "note",
+    "observed_data",
+    "opinion",
+    "indicator",
+]
+
+
+class AsyncEntity:
+    """Awaitable view of an entity of the sync client
+
+    :param client: instance of a `AsyncOpenCTIApiClient` class
+    :type client: AsyncOpenCTIApiClient
+    :param entity: the entity of the sync client
+    """
+
+    def __init__(self, client, entity):
+        self._client = client
+        self._entity = entity
+
+    def __getattr__(self, name):
+        attribute = getattr(self._entity, name)
+        if name.startswith("_") or not callable(attribute):
+            return attribute
+
+        async def call(*args, **kwargs):
+            return await self._client.call(attribute, *args, **kwargs)
+
+        call.__name__ = name
+        call.__doc__ = attribute.__doc__
+        return call
+
+
+class AsyncOpenCTIApiClient:
+    """Asyncio API client for OpenCTI
+
+    The entities have the same methods as the ones of `OpenCTIApiClient`, as
+    coroutines: `await client.malware.list(...)`. Queries are sent with aiohttp
+    so any number of calls can be in flight from a single thread.
+
+    :param url: OpenCTI API url
+    :type url: str
+    :param token: OpenCTI API token
+    :type token: str
+    :param log_level: log level for the client
+    :type log_level: str, optional
+    :param ssl_verify: whether to verify the certificate of the API
+    :type ssl_verify: bool, optional
+    :param proxies: the proxy configuration, see `OpenCTIApiClient`
+    :type proxies: dict, optional
+    :param pool_size: maximum number of simultaneous connections to the API, defaults to 100
+    :type pool_size: int, optional
+    :param timeout: total timeout in seconds of every HTTP request, defaults to None
+    :type timeout: float, optional
+    """
+
+    def __init__(
+        self,
+        url,
+        token,
+        log_level="info",
+        ssl_verify=False,
+        proxies={},
+        pool_size=100,
+        timeout=None,
+    ):
+        """Constructor method"""
+
+        self.pool_size = pool_size
+        self.session = None
+        # The sync client builds the queries and processes the responses
+        self.api = OpenCTIApiClient(
+            url,
+            token,
+            log_level,
+            ssl_verify,
+            proxies,
+            timeout=timeout,
+            perform_health_check=False,
+        )
+        for entity in ENTITIES:
+            setattr(self, entity, AsyncEntity(self, getattr(self.api, entity)))
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def open(self):
+        """open the HTTP session and check the API is reachable
+
+        :raises ValueError: if the API is not reachable
+        """
+
+        if not await self.health_check():
+            raise ValueError(
+                "OpenCTI API is not reachable. Waiting for OpenCTI API to start or check your configuration..."
+            )
+
+    async def close(self):
+        """close the HTTP session and the connections of the sync client"""
+
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+        self.api.close()
+
+    def get_session(self):
+        """get the aiohttp session of the client, created on first use
+
+        :return: the aiohttp session
+        :rtype: aiohttp.ClientSession
+        """
+
+        if self.session is None:
+            try:
+                import aiohttp
+            except ImportError:
+                raise ImportError(
+                    "AsyncOpenCTIApiClient requires aiohttp, install pycti[async]"
+                )
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_size, ssl=None if self.api.ssl_verify else False
+            )
+            timeout = (
+                aiohttp.ClientTimeout(total=self.api.timeout)
+                if isinstance(self.api.timeout, (int, float))
+                else None
+            )
+            self.session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+        return self.session
+
+    async def post(self, query, variables):
+        """send a query to the OpenCTI GraphQL API
+
+        :param query: GraphQL query string
+        :type query: str
+        :param variables: GraphQL query variables
+        :type variables: dict
+        :return: returns the HTTP status and the decoded response content
+        :rtype: tuple
+        """
+
+        import aiohttp
+
+        session = self.get_session()
+        scheme = "https" if self.api.api_url.startswith("https") else "http"
+        proxy = self.api.proxies.get(scheme)
+        multipart = self.api.build_multipart(query, variables)
+        if multipart is not None:
+            multipart_data, multipart_files = multipart
+            data = aiohttp.FormData()
+            for key, value in multipart_data.items():
+                data.add_field(key, value)
+            for key, (name, content, mime) in multipart_files:
+                data.add_field(key, content, filename=name, content_type=mime)
+            headers = self.api.get_request_headers()
+        else:
+            data = opencti_json.dumpb({"query": query, "variables": variables})
+            headers = self.api.get_request_headers()
+            headers["Content-Type"] = "application/json"
+        async with session.post(
+            self.api.api_url, data=data, headers=headers, proxy=proxy
+        ) as r:
+            if r.status == 200:
+                return r.status, opencti_json.loads(await r.read())
+            return r.status, await r.text()
+
+    async def query(self, query, variables={}):
+        """submit a query to the OpenCTI GraphQL API
+
+        :param query: GraphQL query string
+        :type query: str
+        :param variables: GraphQL query variables, defaults to {}
+        :type variables: dict, optional
+        :return: returns the response json content
+        :rtype: Any
+        """
+
+        status, content = await self.post(query, variables)
+        if status == 200:
+            return self.api.process_result(content)
+        else:
+            logging.info(content)
+            raise ValueError(content)
+
+    async def call(self, method, *args, **kwargs):
+        """await a method of the sync client, its queries are sent asynchronously
+
+        :param method: a method of the sync client or one of its entities
+        :type method: callable
+        :return: returns the result of the method
+        """
+
+        replay = QueryReplay(method, args, kwargs)
+        pending = self.api.run_replay(replay)
+        while pending is not None:
+            try:
+                replay.record(await self.query(*pending))
+            except Exception as e:
+                replay.record(error=e)
+            pending = self.api.run_replay(replay)
+        if replay.error is not None:
+            raise replay.error
+        if isinstance(replay.result, Pagination):
+            return self.paginate(replay.result)
+        return replay.result
+
+    async def paginate(self, pagination):
+        """iterate asynchronously over the entities of a list called with `stream=True`
+
+        :param pagination: the pagination returned by the sync client
+        :type pagination: Pagination
+        :return: returns an async iterator of the processed entities
+        """
+
+        pagination.fetched = 0
+        result = await self.query(pagination.query, pagination.variables)
+        while result is not None:
+            variables = pagination.next_variables(result)
+            next_result = (
+                asyncio.ensure_future(self.query(pagination.query, variables))
+                if variables is not None
+                else None
+            )
+            try:
+                for entity in pagination.process(result):
+                    yield entity
+            except BaseException:
+                if next_result is not None:
+                    next_result.cancel()
+                raise
+            result = await next_result if next_result is not None else None
+
+    async def health_check(self):
+        """submit an example request to the OpenCTI API.
+
+        :return: returns `True` if the health check has been successful
+        :rtype: bool
+        """
+        try:
+            test = await self.threat_actor.list(first=1)
+            if test is not None:
+                return True
+        except:
+            return False
+        return False
+
+    async def upload_file(self, **kwargs):
+        """upload a file to OpenCTI API, see `OpenCTIApiClient.upload_file`"""
+
+        return await self.call(self.api.upload_file, **kwargs)
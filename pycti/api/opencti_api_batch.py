@@ -0,0 +1,291 @@
+import functools
+import logging
+import re
+
+from pycti.api.opencti_api_replay import QueryReplay
+from pycti.utils import opencti_json
+
+OPERATION_HEADER = re.compile(
+    r"\s*(query|mutation)\b\s*(?:[_A-Za-z][_0-9A-Za-z]*)?\s*(?:\(([^)]*)\))?\s*\{"
+)
+NAME = re.compile(r"[_A-Za-z][_0-9A-Za-z]*")
+VARIABLE = re.compile(r"\$([_A-Za-z][_0-9A-Za-z]*)")
+
+
+class Operation:
+    """a GraphQL operation split in parts that can be merged with other operations
+
+    :param operation_type: `query` or `mutation`
+    :type operation_type: str
+    :param definitions: the variable definitions by variable name
+    :type definitions: dict
+    :param fields: the top level fields as (response key, field without alias)
+    :type fields: list
+    """
+
+    def __init__(self, operation_type, definitions, fields):
+        self.operation_type = operation_type
+        self.definitions = definitions
+        self.fields = fields
+
+
+def skip_block(text, index, opening, closing):
+    """return the index following the block opened at `index`, strings are skipped"""
+
+    depth = 0
+    in_string = False
+    while index < len(text):
+        char = text[index]
+        if in_string:
+            if char == "\\":
+                index += 1
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == opening:
+            depth += 1
+        elif char == closing:
+            depth -= 1
+            if depth == 0:
+                return index + 1
+        index += 1
+    raise ValueError("Unbalanced GraphQL block")
+
+
+def skip_spaces(text, index):
+    while index < len(text) and (text[index].isspace() or text[index] == ","):
+        index += 1
+    return index
+
+
+@functools.lru_cache(maxsize=1024)
+def parse_operation(query):
+    """split a GraphQL operation, `None` if it cannot be merged with others
+
+    :param query: GraphQL query string
+    :type query: str
+    :return: the parsed operation
+    :rtype: Operation or None
+    """
+
+    header = OPERATION_HEADER.match(query)
+    if header is None:
+        return None
+    definitions = {}
+    if header.group(2) is not None:
+        for definition in header.group(2).split(","):
+            variable = VARIABLE.search(definition)
+            if variable is None:
+                return None
+            definitions[variable.group(1)] = definition.strip()
+    body_end = query.rindex("}")
+    fields = []
+    try:
+        index = skip_spaces(query, header.end())
+        while index < body_end:
+            name = NAME.match(query, index)
+            if name is None:
+                return None
+            key = name.group(0)
+            start = index
+            index = skip_spaces(query, name.end())
+            if query[index] == ":":
+                index = skip_spaces(query, index + 1)
+                start = index
+                name = NAME.match(query, index)
+                if name is None:
+                    return None
+                index = skip_spaces(query, name.end())
+            if query[index] == "(":
+                index = skip_spaces(query, skip_block(query, index, "(", ")"))
+            if query[index] == "{":
+                index = skip_block(query, index, "{", "}")
+            fields.append((key, query[start:index].strip()))
+            index = skip_spaces(query, index)
+    except (ValueError, IndexError):
+        return None
+    if len(fields) == 0:
+        return None
+    return Operation(header.group(1), definitions, fields)
+
+
+class BatchCall:
+    """result of a call added to a `QueryBatch`
+
+    :param batch: the batch of the call
+    :type batch: QueryBatch
+    :param replay: the replayed call
+    :type replay: QueryReplay
+    """
+
+    def __init__(self, batch, replay):
+        self.batch = batch
+        self.replay = replay
+
+    def done(self) -> bool:
+        return self.replay.done
+
+    def result(self):
+        """get the result of the call, the batch is flushed if needed
+
+        :return: returns what the called method returned
+        """
+
+        if not self.replay.done:
+            self.batch.flush()
+        if self.replay.error is not None:
+            raise self.replay.error
+        return self.replay.result
+
+
+class QueryBatch:
+    """collect client calls and send their queries together
+
+    Every call is replayed (see `QueryReplay`) up to its next query. On flush,
+    the pending queries are merged in a single GraphQL document, each of their
+    fields being aliased, and the response of every field is given back to its
+    call. Calls needing several queries take several rounds, file uploads are
+    sent alone. A batch used inside a replayed call hands its queries to
+    that replay instead of sending them.
+
+    :param api: instance of a `OpenCTIApiClient` class
+    :type api: OpenCTIApiClient
+    :param max_size: maximum number of operations sent in one request, defaults to 50
+    :type max_size: int, optional
+    """
+
+    def __init__(self, api, max_size=50):
+        self.api = api
+        self.max_size = max_size
+        self.calls = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.flush()
+
+    def call(self, method, *args, **kwargs) -> BatchCall:
+        """add a call to the batch
+
+        :param method: a method of the client or one of its entities
+        :type method: callable
+        :return: the call, its result is available once the batch is flushed
+        :rtype: BatchCall
+        """
+
+        replay = QueryReplay(method, args, kwargs)
+        self.api.run_replay(replay)
+        call = BatchCall(self, replay)
+        if not replay.done:
+            self.calls.append(call)
+        return call
+
+    def flush(self):
+        """send the pending queries until every call of the batch is done"""
+
+        while len(self.calls) > 0:
+            replays = [call.replay for call in self.calls]
+            self.send(replays)
+            for replay in replays:
+                self.api.run_replay(replay)
+            self.calls = [call for call in self.calls if not call.replay.done]
+
+    def send(self, replays):
+        operations = {"query": [], "mutation": []}
+        for replay in replays:
+            query, variables = replay.pending
+            operation = parse_operation(query)
+            if operation is None or self.api.build_multipart(query, variables):
+                self.send_chunk([(replay, None)])
+            else:
+                operations[operation.operation_type].append((replay, operation))
+        for operation_type, items in operations.items():
+            for index in range(0, len(items), self.max_size):
+                self.send_chunk(items[index : index + self.max_size], operation_type)
+
+    def send_chunk(self, items, operation_type=None):
+        if len(items) == 1:
+            replay = items[0][0]
+            # Answered by the replay of the thread, if any
+            try:
+                replay.record(self.api.query(*replay.pending))
+            except Exception as e:
+                replay.record(error=e)
+            return
+
+        # Merge the operations, variables and fields are prefixed by the operation index
+        definitions = []
+        fields = []
+        variables = {}
+        for index, (replay, operation) in enumerate(items):
+            prefix = "b" + str(index) + "_"
+
+            def rename(match, operation=operation, prefix=prefix):
+                name = match.group(1)
+                if name in operation.definitions:
+                    return "$" + prefix + name
+                return match.group(0)
+
+            for name, definition in operation.definitions.items():
+                definitions.append(VARIABLE.sub(rename, definition))
+                variables[prefix + name] = replay.pending[1].get(name)
+            for field_index, (key, field) in enumerate(operation.fields):
+                fields.append(
+                    prefix + str(field_index) + ": " + VARIABLE.sub(rename, field)
+                )
+        document = (
+            operation_type
+            + " Batch"
+            + ("(" + ", ".join(definitions) + ")" if len(definitions) > 0 else "")
+            + " {\n"
+            + "\n".join(fields)
+            + "\n}"
+        )
+
+        try:
+            if self.api.is_replaying():
+                # The call running the batch is itself replayed, its replay
+                # sends the document and errors fail every operation
+                result = self.api.query(document, variables)
+            else:
+                r = self.api.post(document, variables)
+                if r.status_code != 200:
+                    logging.info(r.text)
+                    raise ValueError(r.text)
+                result = opencti_json.loads(r.content)
+        except Exception as e:
+            for replay, operation in items:
+                replay.record(error=e)
+            return
+
+        # Give back its fields and errors to every operation
+        data = result.get("data") or {}
+        errors = {}
+        global_errors = []
+        for error in result.get("errors", []):
+            path = error.get("path")
+            if path and isinstance(path[0], str) and path[0].startswith("b"):
+                index = int(path[0][1:].split("_")[0])
+                errors.setdefault(index, []).append(error)
+            else:
+                global_errors.append(error)
+        for index, (replay, operation) in enumerate(items):
+            operation_errors = errors.get(index, []) + global_errors
+            if len(operation_errors) > 0:
+                try:
+                    self.api.process_result({"errors": operation_errors})
+                except ValueError as e:
+                    replay.record(error=e)
+                continue
+            prefix = "b" + str(index) + "_"
+            replay.record(
+                {
+                    "data": {
+                        key: data.get(prefix + str(field_index))
+                        for field_index, (key, field) in enumerate(operation.fields)
+                    }
+                }
+            )
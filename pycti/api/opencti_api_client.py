@@ -4,14 +4,18 @@ import io
 import magic
 import requests
 import urllib3
-import json
 import logging
 import datetime
+import threading
 
 from typing import Union
 
+from pycti.api.opencti_api_batch import QueryBatch
 from pycti.api.opencti_api_connector import OpenCTIApiConnector
+from pycti.api.opencti_api_context import current_request_context
+from pycti.api.opencti_api_pagination import Pagination, ParallelPagination
 from pycti.api.opencti_api_work import OpenCTIApiWork
+from pycti.utils import opencti_json
 from pycti.utils.opencti_stix2 import OpenCTIStix2
 
 from pycti.entities.opencti_label import Label
@@ -76,15 +80,38 @@ class OpenCTIApiClient:
             "https: "http://my_proxy:8080"
         }
         ```
+    :param pool_size: number of keep-alive connections kept open to the API, defaults to 10
+    :type pool_size: int, optional
+    :param timeout: timeout in seconds of every HTTP request (connect, read), defaults to None
+    :type timeout: float or tuple, optional
+    :param perform_health_check: whether to check the API is reachable, defaults to True
+    :type perform_health_check: bool, optional
+    :param mapping_cache: cache of the ids of the imported STIX objects, see `MappingCache`
+    :type mapping_cache: MappingCache, optional
+    :param resolution_index: index resolving domain objects by name before calling the API, see `ResolutionIndex`
+    :type resolution_index: ResolutionIndex, optional
     """
 
-    def __init__(self, url, token, log_level="info", ssl_verify=False, proxies={}):
+    def __init__(
+        self,
+        url,
+        token,
+        log_level="info",
+        ssl_verify=False,
+        proxies={},
+        pool_size=10,
+        timeout=None,
+        perform_health_check=True,
+        mapping_cache=None,
+        resolution_index=None,
+    ):
         """Constructor method"""
 
         # Check configuration
         # 校验一下配置
         self.ssl_verify = ssl_verify
         self.proxies = proxies
+        self.timeout = timeout
         if url is None or len(token) == 0:
             raise ValueError("Url configuration must be configured")
         if token is None or len(token) == 0 or token == "ChangeMe":
@@ -106,11 +133,22 @@ class OpenCTIApiClient:
         self.api_url = url + "/graphql"
         self.request_headers = {"Authorization": "Bearer " + token}
 
+        # Define the transport, the session is shared by every thread using the client
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        # State of the calls replayed by the current thread, see run_replay
+        self._local = threading.local()
+        self.resolution_index = resolution_index
+
         # Define the dependencies
         # 定义工作器、连接器、规范
         self.work = OpenCTIApiWork(self)
         self.connector = OpenCTIApiConnector(self)
-        self.stix2 = OpenCTIStix2(self)
+        self.stix2 = OpenCTIStix2(self, mapping_cache)
 
         # Define the entities
         # 定义一些实体
@@ -146,7 +184,7 @@ class OpenCTIApiClient:
 
         # Check if openCTI is available
         # 做一下心跳检测
-        if not self.health_check():
+        if perform_health_check and not self.health_check():
             raise ValueError(
                 "OpenCTI API is not reachable. Waiting for OpenCTI API to start or check your configuration..."
             )
@@ -161,6 +199,19 @@ class OpenCTIApiClient:
             "" if retry_number is None else str(retry_number)
         )
 
+    def get_request_headers(self) -> dict:
+        """get the HTTP headers of a call, with the ones of the current request context
+
+        :return: returns the headers
+        :rtype: dict
+        """
+
+        headers = dict(self.request_headers)
+        context = current_request_context()
+        if context is not None:
+            headers.update(context.headers())
+        return headers
+
     # 做查询
     def query(self, query, variables={}):
         """submit a query to the OpenCTI GraphQL API
@@ -173,6 +224,66 @@ class OpenCTIApiClient:
         :rtype: Any
         """
 
+        replay = getattr(self._local, "replay", None)
+        if replay is not None:
+            return replay.query(query, variables)
+
+        r = self.post(query, variables)
+        # Build response
+        if r.status_code == 200:
+            return self.process_result(opencti_json.loads(r.content))
+        else:
+            logging.info(r.text)
+            raise ValueError(r.text)
+
+    def post(self, query, variables={}):
+        """send a query to the OpenCTI GraphQL API without processing the response
+
+        :param query: GraphQL query string
+        :type query: str
+        :param variables: GraphQL query variables, defaults to {}
+        :type variables: dict, optional
+        :return: returns the HTTP response
+        :rtype: requests.Response
+        """
+
+        multipart = self.build_multipart(query, variables)
+        if multipart is not None:
+            multipart_data, multipart_files = multipart
+            # Send the multipart request
+            return self.session.post(
+                self.api_url,
+                data=multipart_data,
+                files=multipart_files,
+                headers=self.get_request_headers(),
+                verify=self.ssl_verify,
+                proxies=self.proxies,
+                timeout=self.timeout,
+            )
+        # If no
+        else:
+            headers = self.get_request_headers()
+            headers["Content-Type"] = "application/json"
+            return self.session.post(
+                self.api_url,
+                data=opencti_json.dumpb({"query": query, "variables": variables}),
+                headers=headers,
+                verify=self.ssl_verify,
+                proxies=self.proxies,
+                timeout=self.timeout,
+            )
+
+    def build_multipart(self, query, variables):
+        """build the multipart content of a query uploading files
+
+        :param query: GraphQL query string
+        :type query: str
+        :param variables: GraphQL query variables
+        :type variables: dict
+        :return: returns the multipart data and files, `None` if no variable is a file
+        :rtype: tuple or None
+        """
+
         query_var = {}
         files_vars = []
         # Implementation of spec https://github.com/jaydenseric/graphql-multipart-request-spec
@@ -198,109 +309,96 @@ class OpenCTIApiClient:
             else:
                 query_var[key] = val
 
+        # If no, nothing to build
+        if len(files_vars) == 0:
+            return None
+
         # If yes, transform variable (file to null) and create multipart query
-        if len(files_vars) > 0:
-            multipart_data = {
-                "operations": json.dumps({"query": query, "variables": query_var})
-            }
-        
-            # Build the multipart map 遍历文件变量
-            # 构建序号到文件名的映射表
-            map_index = 0
-            file_vars = {}
-            for file_var_item in files_vars:
-                is_multiple_files = file_var_item["multiple"]
-                var_name = "variables." + file_var_item["key"]
-        
-                if is_multiple_files:
-                    # [(var_name + "." + i)] if is_multiple_files else
-                    for _ in file_var_item["file"]:
-                        file_vars[str(map_index)] = [(var_name + "." + str(map_index))]
-                        map_index += 1
-                else:
-                    file_vars[str(map_index)] = [var_name]
+        multipart_data = {
+            "operations": opencti_json.dumps({"query": query, "variables": query_var})
+        }
+
+        # Build the multipart map 遍历文件变量
+        # 构建序号到文件名的映射表
+        map_index = 0
+        file_vars = {}
+        for file_var_item in files_vars:
+            is_multiple_files = file_var_item["multiple"]
+            var_name = "variables." + file_var_item["key"]
+
+            if is_multiple_files:
+                # [(var_name + "." + i)] if is_multiple_files else
+                for _ in file_var_item["file"]:
+                    file_vars[str(map_index)] = [(var_name + "." + str(map_index))]
                     map_index += 1
-            multipart_data["map"] = json.dumps(file_vars)
-            # Add the files
-            file_index = 0
-            multipart_files = []
-            for file_var_item in files_vars:
-                files = file_var_item["file"]
-                is_multiple_files = file_var_item["multiple"]
-                if is_multiple_files:
-                    for file in files:
-                        if isinstance(file.data, str):
-                            file_multi = (
-                                str(file_index),
-                                (
-                                    file.name,
-                                    io.BytesIO(file.data.encode()),
-                                    file.mime,
-                                ),
-                            )
-                        else:
-                            file_multi = (
-                                str(file_index),
-                                (file.name, file.data, file.mime),
-                            )
-                        multipart_files.append(file_multi)
-                        file_index += 1
-                else:
-                    if isinstance(files.data, str):
+            else:
+                file_vars[str(map_index)] = [var_name]
+                map_index += 1
+        multipart_data["map"] = opencti_json.dumps(file_vars)
+        # Add the files
+        file_index = 0
+        multipart_files = []
+        for file_var_item in files_vars:
+            files = file_var_item["file"]
+            is_multiple_files = file_var_item["multiple"]
+            if is_multiple_files:
+                for file in files:
+                    if isinstance(file.data, str):
                         file_multi = (
                             str(file_index),
-                            (files.name, io.BytesIO(files.data.encode()), files.mime),
+                            (
+                                file.name,
+                                io.BytesIO(file.data.encode()),
+                                file.mime,
+                            ),
                         )
                     else:
                         file_multi = (
                             str(file_index),
-                            (files.name, files.data, files.mime),
+                            (file.name, file.data, file.mime),
                         )
                     multipart_files.append(file_multi)
                     file_index += 1
-            # Send the multipart request
-            r = requests.post(
-                self.api_url,
-                data=multipart_data,
-                files=multipart_files,
-                headers=self.request_headers,
-                verify=self.ssl_verify,
-                proxies=self.proxies,
-            )
-        # If no
-        else:
-            r = requests.post(
-                self.api_url,
-                json={"query": query, "variables": variables},
-                headers=self.request_headers,
-                verify=self.ssl_verify,
-                proxies=self.proxies,
-            )
-        # Build response
-        if r.status_code == 200:
-            result = r.json()
-            if "errors" in result:
-                main_error = result["errors"][0]
-                error_name = (
-                    main_error["name"]
-                    if "name" in main_error
-                    else main_error["message"]
-                )
-                if "data" in main_error and "reason" in main_error["data"]:
-                    logging.error(main_error["data"]["reason"])
-                    raise ValueError(
-                        {"name": error_name, "message": main_error["data"]["reason"]}
+            else:
+                if isinstance(files.data, str):
+                    file_multi = (
+                        str(file_index),
+                        (files.name, io.BytesIO(files.data.encode()), files.mime),
                     )
                 else:
-                    logging.error(main_error["message"])
-                    raise ValueError(
-                        {"name": error_name, "message": main_error["message"]}
+                    file_multi = (
+                        str(file_index),
+                        (files.name, files.data, files.mime),
                     )
+                multipart_files.append(file_multi)
+                file_index += 1
+        return multipart_data, multipart_files
+
+    def process_result(self, result):
+        """check the json content of a GraphQL response for errors
+
+        :param result: decoded response content
+        :type result: dict
+        :raises ValueError: if the response contains errors
+        :return: returns the response json content
+        :rtype: dict
+        """
+
+        if "errors" in result:
+            main_error = result["errors"][0]
+            error_name = (
+                main_error["name"] if "name" in main_error else main_error["message"]
+            )
+            if "data" in main_error and "reason" in main_error["data"]:
+                logging.error(main_error["data"]["reason"])
+                raise ValueError(
+                    {"name": error_name, "message": main_error["data"]["reason"]}
+                )
             else:
-                return result
+                logging.error(main_error["message"])
+                raise ValueError({"name": error_name, "message": main_error["message"]})
         else:
-            logging.info(r.text)
-            raise ValueError(r.text)
+            return result
 
     def fetch_opencti_file(self, fetch_uri, binary=False):
         """get file from the OpenCTI API
@@ -313,11 +411,55 @@ class OpenCTIApiClient:
         :rtype: str or bytes
         """
 
-        r = requests.get(fetch_uri, headers=self.request_headers)
+        r = self.session.get(
+            fetch_uri, headers=self.get_request_headers(), timeout=self.timeout
+        )
         if binary:
             return r.content
         return r.text
 
+    def close(self):
+        """close the connections kept alive by the client"""
+
+        self.session.close()
+
+    def batch(self, max_size=50):
+        """start a batch, the calls added to it are sent together in aliased queries
+
+        :param max_size: maximum number of operations sent in one request, defaults to 50
+        :type max_size: int, optional
+        :return: the batch, usable as a context manager flushing it on exit
+        :rtype: QueryBatch
+        """
+
+        return QueryBatch(self, max_size)
+
+    def is_replaying(self) -> bool:
+        """check if the current thread is running a replayed call
+
+        :return: `True` if the queries of the thread are answered by a replay
+        :rtype: bool
+        """
+
+        return getattr(self._local, "replay", None) is not None
+
+    def run_replay(self, replay):
+        """run a recorded call, queries of the current thread are answered by the replay
+
+        :param replay: the call to run
+        :type replay: QueryReplay
+        :return: returns the query and variables the call is waiting for, `None` once done
+        :rtype: tuple or None
+        """
+
+        # Replays nest, a batch may be run by a replayed call
+        previous = getattr(self._local, "replay", None)
+        self._local.replay = replay
+        try:
+            return replay.run()
+        finally:
+            self._local.replay = previous
+
     def log(self, level, message):
         """log a message with defined log level
 
@@ -327,6 +469,9 @@ class OpenCTIApiClient:
         :type message: str
         """
 
+        replay = getattr(self._local, "replay", None)
+        if replay is not None and not replay.should_log():
+            return
         if level == "debug":
             logging.debug(message)
         elif level == "info":
@@ -436,6 +581,64 @@ class OpenCTIApiClient:
             result["pagination"] = data["pageInfo"]
         return result
 
+    def paginate(self, query, variables, data_key, progress_callback=None):
+        """iterate over the entities of every page of a list query
+
+        :param query: GraphQL list query string
+        :type query: str
+        :param variables: GraphQL query variables, `after` is set for every page
+        :type variables: dict
+        :param data_key: name of the listed field in the response data
+        :type data_key: str
+        :param progress_callback: called with the number of fetched entities and the global count after every page
+        :type progress_callback: callable, optional
+        :return: returns an iterable of the processed entities
+        :rtype: Pagination
+        """
+
+        return Pagination(self, query, variables, data_key, progress_callback)
+
+    def paginate_parallel(
+        self,
+        query,
+        variables,
+        data_key,
+        max_workers=4,
+        partitions=None,
+        ordered=True,
+        progress_callback=None,
+    ):
+        """iterate over the entities of a list query, partitions being fetched in parallel
+
+        :param query: GraphQL list query string
+        :type query: str
+        :param variables: GraphQL query variables
+        :type variables: dict
+        :param data_key: name of the listed field in the response data
+        :type data_key: str
+        :param max_workers: maximum number of partitions fetched at the same time, defaults to 4
+        :type max_workers: int, optional
+        :param partitions: lists of filters splitting the listing, defaults to `created_at` time windows
+        :type partitions: list, optional
+        :param ordered: whether to yield the partitions in order, defaults to True
+        :type ordered: bool, optional
+        :param progress_callback: called with the number of fetched entities and the global count after every page
+        :type progress_callback: callable, optional
+        :return: returns an iterable of the processed entities
+        :rtype: ParallelPagination
+        """
+
+        return ParallelPagination(
+            self,
+            query,
+            variables,
+            data_key,
+            max_workers=max_workers,
+            partitions=partitions,
+            ordered=ordered,
+            progress_callback=progress_callback,
+        )
+
     def process_multiple_ids(self, data) -> list:
         """processes data returned by the OpenCTI API with multiple ids
 
@@ -0,0 +1,95 @@
+# coding: utf-8
+
+import contextlib
+import contextvars
+
+_current = contextvars.ContextVar("opencti_request_context", default=None)
+
+
+class RequestContext:
+    """values sent with the API calls made while processing one request
+
+    :param applicant_id: id of the user the calls are made for, defaults to None
+    :type applicant_id: str, optional
+    :param retry_number: number of the retry of the processing, defaults to None
+    :type retry_number: int, optional
+    :param work_id: id of the work being processed, defaults to None
+    :type work_id: str, optional
+    """
+
+    __slots__ = ["applicant_id", "retry_number", "work_id"]
+
+    def __init__(self, applicant_id=None, retry_number=None, work_id=None):
+        self.applicant_id = applicant_id
+        self.retry_number = retry_number
+        self.work_id = work_id
+
+    def headers(self) -> dict:
+        """get the HTTP headers of the context
+
+        :return: the headers to add to the API calls
+        :rtype: dict
+        """
+
+        headers = {}
+        if self.applicant_id is not None:
+            headers["opencti-applicant-id"] = self.applicant_id
+        if self.retry_number is not None:
+            headers["opencti-retry-number"] = str(self.retry_number)
+        return headers
+
+
+def current_request_context():
+    """get the request context of the running thread or task
+
+    :return: the current context, `None` outside of `request_context`
+    :rtype: RequestContext or None
+    """
+
+    return _current.get()
+
+
+@contextlib.contextmanager
+def request_context(**kwargs):
+    """set the request context of the API calls made in the block
+
+    Values not given are inherited from the enclosing context. The context is
+    local to the thread or asyncio task, use `submit_in_context` to keep it in
+    the threads of an executor.
+
+    :param applicant_id: id of the user the calls are made for
+    :type applicant_id: str, optional
+    :param retry_number: number of the retry of the processing
+    :type retry_number: int, optional
+    :param work_id: id of the work being processed
+    :type work_id: str, optional
+    :return: the new context
+    :rtype: RequestContext
+    """
+
+    parent = _current.get()
+    context = RequestContext()
+    for name in RequestContext.__slots__:
+        value = kwargs.get(name)
+        if value is None and parent is not None:
+            value = getattr(parent, name)
+        setattr(context, name, value)
+    token = _current.set(context)
+    try:
+        yield context
+    finally:
+        _current.reset(token)
+
+
+def submit_in_context(executor, fn, *args, **kwargs):
+    """submit a call to an executor, run with the context variables of the caller
+
+    :param executor: the executor running the call
+    :type executor: concurrent.futures.Executor
+    :param fn: the function to call
+    :type fn: callable
+    :return: the future of the call
+    :rtype: concurrent.futures.Future
+    """
+
+    return executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
@@ -0,0 +1,314 @@
+import concurrent.futures
+import math
+import queue
+import threading
+
+import dateutil.parser
+
+from pycti.api.opencti_api_context import submit_in_context
+
+
+class Pagination:
+    """Iterable over the entities of every page of a list query
+
+    Pages are followed with `pageInfo.endCursor` and only one page is kept in
+    memory. The next page is fetched in the background while the entities of
+    the current one are consumed.
+
+    :param api: instance of a `OpenCTIApiClient` class
+    :type api: OpenCTIApiClient
+    :param query: GraphQL list query string
+    :type query: str
+    :param variables: GraphQL query variables, `after` is set for every page
+    :type variables: dict
+    :param data_key: name of the listed field in the response data
+    :type data_key: str
+    :param progress_callback: called with the number of fetched entities and the
+        `globalCount` of the listing after every page
+    :type progress_callback: callable, optional
+    """
+
+    def __init__(self, api, query, variables, data_key, progress_callback=None):
+        self.api = api
+        self.query = query
+        self.variables = variables
+        self.data_key = data_key
+        self.progress_callback = progress_callback
+        self.fetched = 0
+
+    def next_variables(self, result):
+        """get the variables of the page following a result, `None` if it is the last
+
+        :param result: the response json content of a page
+        :type result: dict
+        :return: the variables of the next page
+        :rtype: dict or None
+        """
+
+        data = result["data"][self.data_key]
+        if data is None or not data["pageInfo"]["hasNextPage"]:
+            return None
+        after = data["pageInfo"]["endCursor"]
+        self.api.log("info", "Listing " + self.data_key + " after " + after)
+        return dict(self.variables, after=after)
+
+    def process(self, result) -> list:
+        """get the processed entities of a page
+
+        :param result: the response json content of a page
+        :type result: dict
+        :return: the entities of the page
+        :rtype: list
+        """
+
+        data = result["data"][self.data_key]
+        entities = self.api.process_multiple(data)
+        self.fetched += len(entities)
+        if self.progress_callback is not None and data is not None:
+            self.progress_callback(self.fetched, data["pageInfo"].get("globalCount"))
+        return entities
+
+    def __iter__(self):
+        self.fetched = 0
+        # Replayed calls must query in their own thread
+        if self.api.is_replaying():
+            result = self.api.query(self.query, self.variables)
+            while result is not None:
+                variables = self.next_variables(result)
+                yield from self.process(result)
+                result = (
+                    self.api.query(self.query, variables)
+                    if variables is not None
+                    else None
+                )
+            return
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        try:
+            result = self.api.query(self.query, self.variables)
+            while result is not None:
+                variables = self.next_variables(result)
+                next_result = (
+                    submit_in_context(executor, self.api.query, self.query, variables)
+                    if variables is not None
+                    else None
+                )
+                yield from self.process(result)
+                result = next_result.result() if next_result is not None else None
+        finally:
+            executor.shutdown(wait=False)
+
+
+class ParallelPagination:
+    """Iterable over the entities of a list query fetched by several threads
+
+    The listing is split in partitions, each of them adding filters to the
+    query: either the given filter shards or `created_at` time windows. The
+    windows are computed from the oldest and newest entities so that every
+    worker gets about the same number of pages. Partitions are paginated
+    concurrently and their entities are yielded partition after partition when
+    `ordered`, or as soon as they are fetched otherwise. Workers are at most a
+    few pages ahead of the consumer.
+
+    :param api: instance of a `OpenCTIApiClient` class
+    :type api: OpenCTIApiClient
+    :param query: GraphQL list query string
+    :type query: str
+    :param variables: GraphQL query variables, `filters` and `after` are set for every partition
+    :type variables: dict
+    :param data_key: name of the listed field in the response data
+    :type data_key: str
+    :param max_workers: maximum number of partitions fetched at the same time, defaults to 4
+    :type max_workers: int, optional
+    :param partitions: lists of filters splitting the listing, defaults to time windows
+    :type partitions: list, optional
+    :param ordered: whether to yield the partitions in order, defaults to True
+    :type ordered: bool, optional
+    :param progress_callback: called with the number of fetched entities and the
+        total `globalCount` of the partitions after every page
+    :type progress_callback: callable, optional
+    :param order_field: field used to compute the time windows, defaults to created_at
+    :type order_field: str, optional
+    """
+
+    def __init__(
+        self,
+        api,
+        query,
+        variables,
+        data_key,
+        max_workers=4,
+        partitions=None,
+        ordered=True,
+        progress_callback=None,
+        order_field="created_at",
+    ):
+        self.api = api
+        self.query = query
+        self.variables = variables
+        self.data_key = data_key
+        self.max_workers = max_workers
+        self.partitions = partitions
+        self.ordered = ordered
+        self.progress_callback = progress_callback
+        self.order_field = order_field
+
+    def bound(self, order_mode):
+        variables = dict(
+            self.variables,
+            first=1,
+            after=None,
+            orderBy=self.order_field,
+            orderMode=order_mode,
+        )
+        data = self.api.query(self.query, variables)["data"][self.data_key]
+        entities = self.api.process_multiple(data)
+        if len(entities) == 0 or entities[0].get(self.order_field) is None:
+            return None, 0
+        return (
+            dateutil.parser.parse(entities[0][self.order_field]),
+            data["pageInfo"].get("globalCount") or 0,
+        )
+
+    def split(self) -> list:
+        """get the filters of every partition
+
+        :return: the list of filters added to the query by each partition
+        :rtype: list
+        """
+
+        if self.partitions is not None:
+            return self.partitions
+        oldest, global_count = self.bound("asc")
+        newest, _ = self.bound("desc")
+        page_size = self.variables.get("first") or 1
+        count = min(self.max_workers, math.ceil(global_count / page_size))
+        if oldest is None or newest is None or count <= 1 or newest <= oldest:
+            return [[]]
+        step = (newest - oldest) / count
+        partitions = []
+        for index in range(count):
+            filters = []
+            # The first and last windows are open so no entity falls outside
+            if index > 0:
+                start = oldest + step * index
+                filters.append(
+                    {
+                        "key": self.order_field,
+                        "values": [start.isoformat()],
+                        "operator": "gte",
+                    }
+                )
+            if index < count - 1:
+                end = oldest + step * (index + 1)
+                filters.append(
+                    {
+                        "key": self.order_field,
+                        "values": [end.isoformat()],
+                        "operator": "lt",
+                    }
+                )
+            partitions.append(filters)
+        return partitions
+
+    def partition(self, filters) -> Pagination:
+        """get the pagination of a partition
+
+        :param filters: the filters added to the query by the partition
+        :type filters: list
+        :return: the pagination of the partition
+        :rtype: Pagination
+        """
+
+        variables = dict(
+            self.variables,
+            filters=(self.variables.get("filters") or []) + filters,
+            after=None,
+        )
+        return Pagination(self.api, self.query, variables, self.data_key)
+
+    def __iter__(self):
+        paginations = [self.partition(filters) for filters in self.split()]
+        totals = {}
+        fetched = 0
+        for index, page in self.pages(paginations):
+            if isinstance(page, Exception):
+                raise page
+            entities, global_count = page
+            totals[index] = global_count
+            fetched += len(entities)
+            if self.progress_callback is not None:
+                self.progress_callback(fetched, sum(totals.values()))
+            yield from entities
+
+    def pages(self, paginations):
+        # Replayed calls must query in their own thread
+        if self.api.is_replaying() or len(paginations) == 1:
+            for index, pagination in enumerate(paginations):
+                for page in self.fetch(pagination):
+                    yield index, page
+            return
+
+        stop = threading.Event()
+        if self.ordered:
+            queues = [queue.Queue(maxsize=2) for _ in paginations]
+        else:
+            queues = [queue.Queue(maxsize=2 * self.max_workers)] * len(paginations)
+
+        def put(index, item):
+            while not stop.is_set():
+                try:
+                    queues[index].put((index, item), timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def work(index, pagination):
+            try:
+                for page in self.fetch(pagination):
+                    if not put(index, page):
+                        return
+            except Exception as e:
+                put(index, e)
+            put(index, None)
+
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            for index, pagination in enumerate(paginations):
+                submit_in_context(executor, work, index, pagination)
+            if self.ordered:
+                for index in range(len(paginations)):
+                    while True:
+                        item = queues[index].get()
+                        if item[1] is None:
+                            break
+                        yield item
+            else:
+                remaining = len(paginations)
+                while remaining > 0:
+                    item = queues[0].get()
+                    if item[1] is None:
+                        remaining -= 1
+                        continue
+                    yield item
+        finally:
+            stop.set()
+            executor.shutdown(wait=False)
+
+    def fetch(self, pagination):
+        """iterate over the processed pages of a partition
+
+        :param pagination: the pagination of the partition
+        :type pagination: Pagination
+        :return: returns an iterator of (entities, global count) tuples
+        """
+
+        variables = pagination.variables
+        while variables is not None:
+            result = self.api.query(pagination.query, variables)
+            data = result["data"][pagination.data_key]
+            variables = pagination.next_variables(result)
+            yield (
+                self.api.process_multiple(data),
+                data["pageInfo"].get("globalCount") if data is not None else 0,
+            )
@@ -0,0 +1,138 @@
+import copy
+
+
+class QueryNeeded(BaseException):
+    """raised inside a replayed call when a query has no recorded response yet
+
+    It derives from `BaseException` so the `except Exception` blocks of the
+    entities do not swallow it.
+    """
+
+    def __init__(self, query, variables):
+        BaseException.__init__(self, query)
+        self.query = query
+        self.variables = variables
+
+
+class ReplayError(Exception):
+    """raised by a replayed call which went on after an interrupted query"""
+
+
+class QueryReplay:
+    """a client call run against recorded query responses
+
+    Entity methods are synchronous and call `opencti.query` as they go. A replay
+    runs the method with the responses recorded so far: the first query without
+    a response interrupts the run and is handed back to the caller, which is
+    free to send it however it wants (asynchronously, batched with other
+    queries...). Once the response is recorded, the method is run again from
+    the start, up to its next query or its end. The query strings and the
+    post-processing of the entities are therefore shared with the sync client.
+
+    A call making N queries is run N + 1 times, each run processing copies of
+    all the responses recorded so far: replays suit calls making a few
+    queries, not the listing of many pages (`getAll`). The side effects of
+    the method other than its queries are repeated on every run, except the
+    log lines (see `should_log`): only replay methods whose other effects
+    can be repeated.
+
+    :param method: the client method to call
+    :type method: callable
+    :param args: positional arguments of the call
+    :type args: tuple
+    :param kwargs: keyword arguments of the call
+    :type kwargs: dict
+    """
+
+    def __init__(self, method, args=(), kwargs=None):
+        self.method = method
+        self.args = args
+        self.kwargs = kwargs if kwargs is not None else {}
+        self.responses = []
+        self.position = 0
+        self.logged = 0
+        self.log_position = 0
+        self.pending = None
+        # Whether a query was made after the pending one in the current run
+        self.went_on = False
+        self.done = False
+        self.result = None
+        self.error = None
+
+    def run(self):
+        """run the call until it ends or needs the response of a new query
+
+        Use `OpenCTIApiClient.run_replay` so the queries of the client are
+        routed to this replay.
+
+        :return: returns the pending (query, variables), `None` once the call is done
+        :rtype: tuple or None
+        """
+
+        self.position = 0
+        self.log_position = 0
+        self.pending = None
+        self.went_on = False
+        try:
+            result = self.method(*self.args, **self.kwargs)
+            error = None
+        except QueryNeeded:
+            result, error = None, None
+        except Exception as e:
+            result, error = None, e
+        if self.went_on:
+            # Responses would be given to the wrong queries
+            self.pending = None
+            result, error = None, ReplayError(
+                "The interruption of the query of the replayed call was caught by "
+                + getattr(self.method, "__qualname__", str(self.method))
+            )
+        # The interruption may have been swallowed by a bare except
+        elif self.pending is not None:
+            return self.pending
+        self.done = True
+        self.result = result
+        self.error = error
+        return None
+
+    def record(self, result=None, error=None):
+        """record the response of the pending query
+
+        :param result: the response json content
+        :type result: dict
+        :param error: the error to raise instead of returning a response
+        :type error: Exception
+        """
+
+        self.responses.append((result, error))
+        self.pending = None
+
+    def query(self, query, variables={}):
+        """answer a query of the replayed call, see `OpenCTIApiClient.query`"""
+
+        if self.position < len(self.responses):
+            result, error = self.responses[self.position]
+            self.position += 1
+            if error is not None:
+                raise error
+            # Entities update the responses in place while processing them
+            return copy.deepcopy(result)
+        if self.pending is not None:
+            # The interruption of the pending query was swallowed
+            self.went_on = True
+        else:
+            self.pending = (query, variables)
+        raise QueryNeeded(query, variables)
+
+    def should_log(self) -> bool:
+        """check if a log line is new, lines are only emitted on their first run
+
+        :return: `True` if the line has not been logged by a previous run
+        :rtype: bool
+        """
+
+        self.log_position += 1
+        if self.log_position > self.logged:
+            self.logged = self.log_position
+            return True
+        return False
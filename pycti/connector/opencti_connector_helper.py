@@ -1,4 +1,6 @@
+import collections
 import datetime
+import functools
 import threading
 import queue
 import uuid
@@ -11,15 +13,17 @@ import time
 import base64
 import os
 
+from concurrent.futures import ThreadPoolExecutor
 from typing import Callable, Dict, Optional, Union
-from sseclient import SSEClient
-from pika.exceptions import UnroutableError, NackError
 from pycti.api.opencti_api_client import OpenCTIApiClient
+from pycti.api.opencti_api_context import current_request_context, request_context
 from pycti.connector.opencti_connector import OpenCTIConnector
+from pycti.connector.opencti_connector_publisher import BundlePublisher, PikaBroker
+from pycti.connector.opencti_connector_stream import SSEReader, StreamState
+from pycti.utils import opencti_json
+from pycti.utils.opencti_mapping_cache import MappingCache, SqliteCacheBackend
 from pycti.utils.opencti_stix2_splitter import OpenCTIStix2Splitter
 
-EVENTS_QUEUE = queue.Queue()
-
 
 def get_config_variable(
     env_var: str,
@@ -65,9 +69,15 @@ class ListenQueue(threading.Thread):
     :type config: dict
     :param callback: callback function to process queue
     :type callback: callable
+    :param max_workers: number of messages processed concurrently, defaults to 1
+    :type max_workers: int, optional
+    :param prefetch_count: number of unacked messages delivered by the broker, defaults to `max_workers`
+    :type prefetch_count: int, optional
     """
 
-    def __init__(self, helper, config: dict, callback):
+    def __init__(
+        self, helper, config: dict, callback, max_workers=1, prefetch_count=None
+    ):
         threading.Thread.__init__(self)
         self.pika_credentials = None
         self.pika_parameters = None
@@ -75,6 +85,13 @@ class ListenQueue(threading.Thread):
         self.channel = None
         self.helper = helper
         self.callback = callback
+        self.max_workers = max_workers
+        self.prefetch_count = (
+            prefetch_count if prefetch_count is not None else max_workers
+        )
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="listen-queue"
+        )
         self.host = config["connection"]["host"]
         self.port = config["connection"]["port"]
         self.user = config["connection"]["user"]
@@ -95,40 +112,49 @@ class ListenQueue(threading.Thread):
         :type body: str or bytes or bytearray
         """
 
-        json_data = json.loads(body)
-        thread = threading.Thread(target=self._data_handler, args=[json_data])
-        thread.start()
-        while thread.is_alive():  # Loop while the thread is processing
-            self.pika_connection.sleep(1.0)
+        json_data = opencti_json.loads(body)
+        future = self.executor.submit(self._data_handler, json_data)
+        # Acks must be sent by the thread of the connection
+        connection = self.pika_connection
+        future.add_done_callback(
+            lambda f: connection.add_callback_threadsafe(
+                functools.partial(self._ack_message, channel, method.delivery_tag)
+            )
+        )
+
+    def _ack_message(self, channel, delivery_tag):
+        if not channel.is_open:
+            # The message is delivered again on the new channel
+            logging.warning(
+                "Channel closed, unable to ack message (delivery_tag="
+                + str(delivery_tag)
+                + ")"
+            )
+            return
         logging.info(
-            "Message (delivery_tag="
-            + str(method.delivery_tag)
-            + ") processed, thread terminated"
+            "Message (delivery_tag=" + str(delivery_tag) + ") processed, acked"
         )
-        channel.basic_ack(delivery_tag=method.delivery_tag)
+        channel.basic_ack(delivery_tag=delivery_tag)
 
     def _data_handler(self, json_data):
-        # Set the API headers
+        # Work and applicant are local to the message, handlers run concurrently
         work_id = json_data["internal"]["work_id"]
         applicant_id = json_data["internal"]["applicant_id"]
-        self.helper.work_id = work_id
-        if applicant_id is not None:
-            self.helper.applicant_id = applicant_id
-            self.helper.api.set_applicant_id_header(applicant_id)
-        # Execute the callback
-        try:
-            self.helper.api.work.to_received(
-                work_id, "Connector ready to process the operation"
-            )
-            message = self.callback(json_data["event"])
-            self.helper.api.work.to_processed(work_id, message)
-
-        except Exception as e:
-            logging.exception("Error in message processing, reporting error to API")
+        with request_context(applicant_id=applicant_id, work_id=work_id):
+            # Execute the callback
             try:
-                self.helper.api.work.to_processed(work_id, str(e), True)
-            except:
-                logging.error("Failing reporting the processing")
+                self.helper.api.work.to_received(
+                    work_id, "Connector ready to process the operation"
+                )
+                message = self.callback(json_data["event"])
+                self.helper.api.work.to_processed(work_id, message)
+
+            except Exception as e:
+                logging.exception("Error in message processing, reporting error to API")
+                try:
+                    self.helper.api.work.to_processed(work_id, str(e), True)
+                except:
+                    logging.error("Failing reporting the processing")
 
     def run(self):
         while True:
@@ -140,6 +166,7 @@ class ListenQueue(threading.Thread):
                 )
                 self.pika_connection = pika.BlockingConnection(self.pika_parameters)
                 self.channel = self.pika_connection.channel()
+                self.channel.basic_qos(prefetch_count=self.prefetch_count)
                 self.channel.basic_consume(
                     queue=self.queue_name, on_message_callback=self._process_message
                 )
@@ -153,17 +180,21 @@ class ListenQueue(threading.Thread):
 
 
 class PingAlive(threading.Thread):
-    def __init__(self, connector_id, api, get_state, set_state):
+    def __init__(self, connector_id, api, get_state, set_state, checkpoint=None):
         threading.Thread.__init__(self)
         self.connector_id = connector_id
         self.in_error = False
         self.api = api
         self.get_state = get_state
         self.set_state = set_state
+        self.checkpoint = checkpoint
 
     def ping(self):
         while True:
             try:
+                # Ship the position of the stream with the state
+                if self.checkpoint is not None:
+                    self.checkpoint()
                 initial_state = self.get_state()
                 result = self.api.connector.ping(self.connector_id, initial_state)
                 remote_state = (
@@ -192,6 +223,17 @@ class PingAlive(threading.Thread):
 
 
 class StreamCatcher(threading.Thread):
+    """Thread asking the API to send again the events missed by the stream
+
+    The events are requested by ranges of `size` events, on a keep-alive
+    connection, each range starting at the last event of the previous one.
+
+    :param size: number of events of every range, defaults to 2000
+    :type size: int, optional
+    :param verify: whether to verify the SSL certificate, defaults to True
+    :type verify: bool, optional
+    """
+
     def __init__(
         self,
         opencti_url,
@@ -199,6 +241,8 @@ class StreamCatcher(threading.Thread):
         connector_last_event_id,
         last_event_id,
         stream_connection_id,
+        size=2000,
+        verify=True,
     ):
         threading.Thread.__init__(self)
         self.opencti_url = opencti_url
@@ -206,53 +250,118 @@ class StreamCatcher(threading.Thread):
         self.connector_last_event_id = connector_last_event_id
         self.last_event_id = last_event_id
         self.stream_connection_id = stream_connection_id
+        self.size = size
+        self.session = requests.Session()
+        self.session.verify = verify
+        self.session.headers["Authorization"] = "Bearer " + self.opencti_token
 
     def get_range(self, from_id):
         payload = {
             "from": from_id,
-            "size": 2000,
+            "size": self.size,
             "connectionId": self.stream_connection_id,
         }
-        headers = {"Authorization": "Bearer " + self.opencti_token}
-        r = requests.post(
-            self.opencti_url + "/stream/history", json=payload, headers=headers
-        )
+        r = self.session.post(self.opencti_url + "/stream/history", json=payload)
         result = r.json()
         if result and "lastEventId" in result:
             return result["lastEventId"]
 
     def run(self):
-        if self.connector_last_event_id:
-            from_event_id = self.connector_last_event_id
-            from_event_timestamp = 0
-            last_event_timestamp = int(self.last_event_id.split("-")[0])
-            while (
-                from_event_timestamp <= last_event_timestamp
-                and from_event_id != self.last_event_id
-            ):
-                from_event_id = self.get_range(from_event_id)
-                from_event_timestamp = int(from_event_id.split("-")[0])
-        logging.info("Events catchup requests done.")
+        try:
+            if self.connector_last_event_id:
+                from_event_id = self.connector_last_event_id
+                from_event_timestamp = 0
+                last_event_timestamp = int(self.last_event_id.split("-")[0])
+                while (
+                    from_event_timestamp <= last_event_timestamp
+                    and from_event_id != self.last_event_id
+                ):
+                    from_event_id = self.get_range(from_event_id)
+                    from_event_timestamp = int(from_event_id.split("-")[0])
+            logging.info("Events catchup requests done.")
+        finally:
+            self.session.close()
 
 
 class StreamProcessor(threading.Thread):
-    def __init__(self, message_callback, get_state, set_state):
+    """Thread processing the live events of the stream
+
+    Events are queued in a bounded queue, `put` blocks the stream reader
+    while it is full. Events queued before the processor is started are kept
+    aside and processed first. With several workers,
+    events are partitioned by entity id: the events of an entity are
+    processed in order, the ones of other entities in parallel. The state
+    is updated with the last event processed after all the previous ones.
+
+    :param state: position of the connector in the stream
+    :type state: StreamState
+    :param queue_size: maximum number of events waiting to be processed, defaults to 10000
+    :type queue_size: int, optional
+    :param max_workers: number of threads processing the events, defaults to 1
+    :type max_workers: int, optional
+    """
+
+    def __init__(self, message_callback, state, queue_size=10000, max_workers=1):
         threading.Thread.__init__(self)
         self.message_callback = message_callback
-        self.get_state = get_state
-        self.set_state = set_state
+        self.state = state
+        self.max_workers = max_workers
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.backlog = collections.deque()
+        # Dispatched events, by id, with whether they have been processed
+        self.pending = collections.OrderedDict()
+        self.lock = threading.Lock()
+        self.partitions = []
+        if max_workers > 1:
+            self.partitions = [
+                queue.Queue(maxsize=max(1, queue_size // max_workers))
+                for _ in range(max_workers)
+            ]
+
+    def put(self, msg, partition_key=None):
+        """queue an event, blocks while the queue is full
+
+        :param msg: the event
+        :type msg: StreamEvent
+        :param partition_key: id of the entity of the event, defaults to None
+        :type partition_key: str, optional
+        """
+
+        if self.ident is None:
+            self.backlog.append((msg, partition_key))
+        else:
+            self.queue.put((msg, partition_key))
 
     def run(self):
         logging.info("All old events processed, consuming is now LIVE!")
+        for partition in self.partitions:
+            threading.Thread(target=self.work, args=[partition]).start()
         while True:
-            msg = EVENTS_QUEUE.get(block=True, timeout=None)
-            self.message_callback(msg)
-            state = self.get_state()
-            if state is not None:
-                state["connectorLastEventId"] = msg.id
-                self.set_state(state)
+            if len(self.backlog) > 0:
+                msg, partition_key = self.backlog.popleft()
             else:
-                self.set_state({"connectorLastEventId": msg.id})
+                msg, partition_key = self.queue.get(block=True, timeout=None)
+            with self.lock:
+                self.pending[msg.id] = False
+            if len(self.partitions) == 0:
+                self.process(msg)
+            else:
+                index = hash(partition_key) % len(self.partitions)
+                self.partitions[index].put(msg)
+
+    def work(self, partition):
+        while True:
+            self.process(partition.get(block=True, timeout=None))
+
+    def process(self, msg):
+        self.message_callback(msg)
+        last_event_id = None
+        with self.lock:
+            self.pending[msg.id] = True
+            while len(self.pending) > 0 and next(iter(self.pending.values())):
+                last_event_id = self.pending.popitem(last=False)[0]
+            if last_event_id is not None:
+                self.state.update(last_event_id)
 
 
 class OpenCTIConnectorHelper:
@@ -298,6 +407,89 @@ class OpenCTIConnectorHelper:
         self.log_level = get_config_variable(
             "CONNECTOR_LOG_LEVEL", ["connector", "log_level"], config
         )
+        self.mapping_cache_size = get_config_variable(
+            "CONNECTOR_MAPPING_CACHE_SIZE",
+            ["connector", "mapping_cache_size"],
+            config,
+            True,
+        )
+        self.mapping_cache_ttl = get_config_variable(
+            "CONNECTOR_MAPPING_CACHE_TTL",
+            ["connector", "mapping_cache_ttl"],
+            config,
+            True,
+        )
+        self.mapping_cache_path = get_config_variable(
+            "CONNECTOR_MAPPING_CACHE_PATH", ["connector", "mapping_cache_path"], config
+        )
+        self.bundle_max_objects = get_config_variable(
+            "CONNECTOR_BUNDLE_MAX_OBJECTS",
+            ["connector", "bundle_max_objects"],
+            config,
+            True,
+            1,
+        )
+        self.bundle_max_bytes = get_config_variable(
+            "CONNECTOR_BUNDLE_MAX_BYTES",
+            ["connector", "bundle_max_bytes"],
+            config,
+            True,
+        )
+        self.listen_max_workers = get_config_variable(
+            "CONNECTOR_LISTEN_MAX_WORKERS",
+            ["connector", "listen_max_workers"],
+            config,
+            True,
+            1,
+        )
+        self.listen_prefetch_count = get_config_variable(
+            "CONNECTOR_LISTEN_PREFETCH_COUNT",
+            ["connector", "listen_prefetch_count"],
+            config,
+            True,
+        )
+        self.stream_catchup_size = get_config_variable(
+            "CONNECTOR_STREAM_CATCHUP_SIZE",
+            ["connector", "stream_catchup_size"],
+            config,
+            True,
+            2000,
+        )
+        self.stream_queue_size = get_config_variable(
+            "CONNECTOR_STREAM_QUEUE_SIZE",
+            ["connector", "stream_queue_size"],
+            config,
+            True,
+            10000,
+        )
+        self.stream_max_workers = get_config_variable(
+            "CONNECTOR_STREAM_MAX_WORKERS",
+            ["connector", "stream_max_workers"],
+            config,
+            True,
+            1,
+        )
+        self.stream_checkpoint_events = get_config_variable(
+            "CONNECTOR_STREAM_CHECKPOINT_EVENTS",
+            ["connector", "stream_checkpoint_events"],
+            config,
+            True,
+            100,
+        )
+        self.stream_checkpoint_interval = get_config_variable(
+            "CONNECTOR_STREAM_CHECKPOINT_INTERVAL",
+            ["connector", "stream_checkpoint_interval"],
+            config,
+            True,
+            5,
+        )
+        self.publish_window = get_config_variable(
+            "CONNECTOR_PUBLISH_WINDOW",
+            ["connector", "publish_window"],
+            config,
+            True,
+            1000,
+        )
 
         # Configure logger
         numeric_level = getattr(logging, self.log_level.upper(), None)
@@ -306,8 +498,18 @@ class OpenCTIConnectorHelper:
         logging.basicConfig(level=numeric_level)
 
         # Initialize configuration
+        self.mapping_cache = MappingCache(
+            max_size=self.mapping_cache_size,
+            ttl=self.mapping_cache_ttl,
+            backend=SqliteCacheBackend(self.mapping_cache_path)
+            if self.mapping_cache_path is not None
+            else None,
+        )
         self.api = OpenCTIApiClient(
-            self.opencti_url, self.opencti_token, self.log_level
+            self.opencti_url,
+            self.opencti_token,
+            self.log_level,
+            mapping_cache=self.mapping_cache,
         )
         # Register the connector in OpenCTI
         self.connector = OpenCTIConnector(
@@ -324,13 +526,46 @@ class OpenCTIConnectorHelper:
         self.applicant_id = connector_configuration["connector_user"]["id"]
         self.connector_state = connector_configuration["connector_state"]
         self.config = connector_configuration["config"]
+        self.publisher = None
+        self.publisher_lock = threading.Lock()
+        self.stream_state = None
 
         # Start ping thread
         self.ping = PingAlive(
-            self.connector.id, self.api, self.get_state, self.set_state
+            self.connector.id,
+            self.api,
+            self.get_state,
+            self.set_state,
+            self.checkpoint_stream_state,
         )
         self.ping.start()
 
+    @property
+    def work_id(self):
+        """id of the work of the message being processed, else the one set on the helper"""
+
+        context = current_request_context()
+        if context is not None and context.work_id is not None:
+            return context.work_id
+        return self._work_id
+
+    @work_id.setter
+    def work_id(self, work_id):
+        self._work_id = work_id
+
+    @property
+    def applicant_id(self):
+        """id of the applicant of the message being processed, else the connector user"""
+
+        context = current_request_context()
+        if context is not None and context.applicant_id is not None:
+            return context.applicant_id
+        return self._applicant_id
+
+    @applicant_id.setter
+    def applicant_id(self, applicant_id):
+        self._applicant_id = applicant_id
+
     def get_name(self):
         return self.connect_name
 
@@ -343,6 +578,12 @@ class OpenCTIConnectorHelper:
 
         self.connector_state = json.dumps(state)
 
+    def checkpoint_stream_state(self) -> None:
+        """write the position of `listen_stream` in the stream to the connector state"""
+
+        if self.stream_state is not None:
+            self.stream_state.checkpoint()
+
     def get_state(self):
         """get the connector state
 
@@ -366,7 +607,13 @@ class OpenCTIConnectorHelper:
         :type message_callback: Callable[[Dict], List[str]]
         """
 
-        listen_queue = ListenQueue(self, self.config, message_callback)
+        listen_queue = ListenQueue(
+            self,
+            self.config,
+            message_callback,
+            max_workers=self.listen_max_workers,
+            prefetch_count=self.listen_prefetch_count,
+        )
         listen_queue.start()
 
     def listen_stream(
@@ -374,93 +621,125 @@ class OpenCTIConnectorHelper:
     ) -> None:
         """listen for messages and register callback function
 
+        The stream is read again from the last received event when the
+        connection is lost, the missed events are caught up by ranges of
+        `CONNECTOR_STREAM_CATCHUP_SIZE` events. The live events received
+        meanwhile are queued after the missed ones, all the events being
+        processed in order by the `StreamProcessor`.
+
         :param message_callback: callback function to process messages
         """
         current_state = self.get_state()
         if current_state is None:
             current_state = {"connectorLastEventId": "-"}
 
-        # Get the last event ID with the "connected" event msg
-        if url is not None and token is not None:
-            opencti_ssl_verify = verify if verify is not None else True
-            logging.info(
-                "Starting listening stream events with SSL verify to: "
-                + str(opencti_ssl_verify)
-            )
-            messages = SSEClient(
-                url + "/stream",
-                headers={"Authorization": "Bearer " + token},
-                verify=opencti_ssl_verify,
-            )
+        if url is None or token is None:
+            url = self.opencti_url
+            token = self.opencti_token
+            opencti_ssl_verify = self.opencti_ssl_verify
         else:
-            logging.info(
-                "Starting listening stream events with SSL verify to: "
-                + str(self.opencti_ssl_verify)
-            )
-            messages = SSEClient(
-                self.opencti_url + "/stream",
-                headers={"Authorization": "Bearer " + self.opencti_token},
-                verify=self.opencti_ssl_verify,
-            )
+            opencti_ssl_verify = verify if verify is not None else True
+        logging.info(
+            "Starting listening stream events with SSL verify to: "
+            + str(opencti_ssl_verify)
+        )
+        # Get the last event ID with the "connected" event msg
+        messages = SSEReader(
+            url + "/stream",
+            headers={"Authorization": "Bearer " + token},
+            verify=opencti_ssl_verify,
+            last_event_id=current_state["connectorLastEventId"]
+            if current_state["connectorLastEventId"] != "-"
+            else None,
+            timeout=(10, 60),
+        )
 
         # Create processor thread
+        self.stream_state = StreamState(
+            self.get_state,
+            self.set_state,
+            checkpoint_events=self.stream_checkpoint_events,
+            checkpoint_interval=self.stream_checkpoint_interval,
+        )
         processor_thread = StreamProcessor(
-            message_callback, self.get_state, self.set_state
+            message_callback,
+            self.stream_state,
+            queue_size=self.stream_queue_size,
+            max_workers=self.stream_max_workers,
         )
 
+        def start_processor():
+            # Reconnections send the connected event again
+            if processor_thread.ident is None:
+                processor_thread.start()
+
         last_event_id = None
-        for msg in messages:
-            try:
-                data = json.loads(msg.data)
-            except:
-                logging.error("Failed to load JSON: " + msg.data)
-                continue
-            if msg.event == "heartbeat":
-                logging.info("HEARTBEAT:" + str(msg))
-                continue
-            elif msg.event == "connected":
-                last_event_id = data["lastEventId"]
-                stream_connection_id = data["connectionId"]
-                # Launch processor if up to date
-                if current_state["connectorLastEventId"] == last_event_id:
-                    processor_thread.start()
-                # Launch catcher if not up to date
-                if last_event_id != current_state["connectorLastEventId"]:
-                    logging.info(
-                        "Some events have not been processed, catching them..."
-                    )
-                    if url is not None and token is not None:
+        # Id of the last event received and queued
+        received_event_id = current_state["connectorLastEventId"]
+        # Live events received while catching up, queued after the missed ones
+        catching_up = False
+        held_events = []
+        try:
+            for msg in messages:
+                if msg.event == "heartbeat":
+                    logging.info("HEARTBEAT:" + str(msg))
+                    continue
+                try:
+                    data = opencti_json.loads(msg.raw_data)
+                except:
+                    logging.error("Failed to load JSON: " + msg.data)
+                    continue
+                if msg.event == "connected":
+                    last_event_id = data["lastEventId"]
+                    stream_connection_id = data["connectionId"]
+                    start_processor()
+                    # Held events are after the received one, caught up again
+                    held_events = []
+                    catching_up = received_event_id != last_event_id
+                    # Launch catcher if not up to date
+                    if catching_up:
+                        logging.info(
+                            "Some events have not been processed, catching them..."
+                        )
                         catcher_thread = StreamCatcher(
                             url,
                             token,
-                            current_state["connectorLastEventId"],
-                            last_event_id,
-                            stream_connection_id,
-                        )
-                    else:
-                        catcher_thread = StreamCatcher(
-                            self.opencti_url,
-                            self.opencti_token,
-                            current_state["connectorLastEventId"],
+                            received_event_id,
                             last_event_id,
                             stream_connection_id,
+                            size=self.stream_catchup_size,
+                            verify=opencti_ssl_verify,
                         )
-                    catcher_thread.start()
-            else:
-                # If receiving the last message, launch processor
-                if msg.id == last_event_id:
-                    message_callback(msg)
-                    processor_thread.start()
-                elif "catchup" not in data:
-                    EVENTS_QUEUE.put(msg)
+                        catcher_thread.start()
                 else:
-                    message_callback(msg)
-                    state = self.get_state()
-                    if state is not None:
-                        state["connectorLastEventId"] = msg.id
-                        self.set_state(state)
-                    else:
-                        self.set_state({"connectorLastEventId": msg.id})
+                    if self.api.resolution_index is not None:
+                        self.api.resolution_index.process_stream_event(msg.event, data)
+                    entity = data.get("data")
+                    partition_key = (
+                        entity.get("x_opencti_id", entity.get("id"))
+                        if isinstance(entity, dict)
+                        else None
+                    )
+                    if (
+                        catching_up
+                        and "catchup" not in data
+                        and msg.id != last_event_id
+                    ):
+                        held_events.append((msg, partition_key))
+                        continue
+                    # Every event goes through the processor to keep their order
+                    received_event_id = msg.id
+                    processor_thread.put(msg, partition_key)
+                    # If receiving the last missed message, queue the live ones
+                    if catching_up and msg.id == last_event_id:
+                        catching_up = False
+                        for held_msg, held_partition_key in held_events:
+                            received_event_id = held_msg.id
+                            processor_thread.put(held_msg, held_partition_key)
+                        held_events = []
+        finally:
+            # Save the position of the stream on shutdown
+            self.checkpoint_stream_state()
 
     def get_opencti_url(self):
         return self.opencti_url
@@ -499,6 +778,10 @@ class OpenCTIConnectorHelper:
         :type entities_types: list, optional
         :param update: whether to updated data in the database, defaults to False
         :type update: bool, optional
+        :param bundle_max_objects: maximum number of objects sent in one message
+        :type bundle_max_objects: int, optional
+        :param bundle_max_bytes: maximum size of the objects sent in one message
+        :type bundle_max_bytes: int, optional
         :raises ValueError: if the bundle is empty
         :return: list of bundles
         :rtype: list
@@ -506,43 +789,79 @@ class OpenCTIConnectorHelper:
         work_id = kwargs.get("work_id", self.work_id)
         entities_types = kwargs.get("entities_types", None)
         update = kwargs.get("update", False)
+        bundle_max_objects = kwargs.get("bundle_max_objects", self.bundle_max_objects)
+        bundle_max_bytes = kwargs.get("bundle_max_bytes", self.bundle_max_bytes)
 
         if entities_types is None:
             entities_types = []
         stix2_splitter = OpenCTIStix2Splitter()
-        bundles = stix2_splitter.split_bundle(bundle)
+        bundles = stix2_splitter.split_bundle(
+            bundle, max_objects=bundle_max_objects, max_bytes=bundle_max_bytes
+        )
         if len(bundles) == 0:
             raise ValueError("Nothing to import")
         if work_id is not None:
             self.api.work.add_expectations(work_id, len(bundles))
-        pika_credentials = pika.PlainCredentials(
-            self.config["connection"]["user"], self.config["connection"]["pass"]
-        )
-        pika_parameters = pika.ConnectionParameters(
-            self.config["connection"]["host"],
-            self.config["connection"]["port"],
-            "/",
-            pika_credentials,
-        )
-        pika_connection = pika.BlockingConnection(pika_parameters)
-        channel = pika_connection.channel()
+        # Only wait for the bundles of this call, the publisher being shared
+        batch = self.get_publisher().batch()
         for sequence, bundle in enumerate(bundles, start=1):
             self._send_bundle(
-                channel,
+                batch,
                 bundle,
                 work_id=work_id,
                 entities_types=entities_types,
                 sequence=sequence,
                 update=update,
             )
-        channel.close()
+        batch.flush()
+        logging.info(str(len(bundles)) + " bundle(s) have been sent")
         return bundles
 
-    def _send_bundle(self, channel, bundle, **kwargs) -> None:
+    def get_publisher(self) -> BundlePublisher:
+        """get the publisher of the bundles, connected on first use
+
+        The connection is shared by all the calls to `send_stix2_bundle`.
+
+        :return: the publisher of the connector
+        :rtype: BundlePublisher
+        """
+
+        with self.publisher_lock:
+            if self.publisher is None:
+                pika_credentials = pika.PlainCredentials(
+                    self.config["connection"]["user"],
+                    self.config["connection"]["pass"],
+                )
+                pika_parameters = pika.ConnectionParameters(
+                    self.config["connection"]["host"],
+                    self.config["connection"]["port"],
+                    "/",
+                    pika_credentials,
+                )
+                self.publisher = BundlePublisher(
+                    PikaBroker(pika_parameters),
+                    self.config["push_exchange"],
+                    window=self.publish_window,
+                )
+            return self.publisher
+
+    def close_publisher(self, timeout=None) -> None:
+        """wait for the bundles being sent and close the connection of the publisher
+
+        :param timeout: maximum time to wait in seconds, defaults to None
+        :type timeout: float, optional
+        """
+
+        with self.publisher_lock:
+            publisher, self.publisher = self.publisher, None
+        if publisher is not None:
+            publisher.close(timeout)
+
+    def _send_bundle(self, publisher, bundle, **kwargs) -> None:
         """send a STIX2 bundle to RabbitMQ to be consumed by workers
 
-        :param channel: RabbitMQ channel
-        :type channel: callable
+        :param publisher: RabbitMQ publisher, or a batch of its messages
+        :type publisher: BundlePublisher or PublishBatch
         :param bundle: valid stix2 bundle
         :type bundle:
         :param entities_types: list of entity types, defaults to None
@@ -570,27 +889,18 @@ class OpenCTIConnectorHelper:
             "applicant_id": self.applicant_id,
             "action_sequence": sequence,
             "entities_types": entities_types,
-            "content": base64.b64encode(bundle.encode("utf-8")).decode("utf-8"),
+            "content": base64.b64encode(
+                bundle if isinstance(bundle, bytes) else bundle.encode("utf-8")
+            ).decode("utf-8"),
             "update": update,
         }
         if work_id is not None:
             message["work_id"] = work_id
 
-        # Send the message
-        try:
-            routing_key = "push_routing_" + self.connector_id
-            channel.basic_publish(
-                exchange=self.config["push_exchange"],
-                routing_key=routing_key,
-                body=json.dumps(message),
-                properties=pika.BasicProperties(
-                    delivery_mode=2,  # make message persistent
-                ),
-            )
-            logging.info("Bundle has been sent")
-        except (UnroutableError, NackError) as e:
-            logging.error("Unable to send bundle, retry...", e)
-            self._send_bundle(channel, bundle, **kwargs)
+        # Send the message, confirmed and retried by the publisher
+        publisher.publish(
+            "push_routing_" + self.connector_id, opencti_json.dumpb(message)
+        )
 
     def split_stix2_bundle(self, bundle) -> list:
         """splits a valid stix2 bundle into a list of bundles
@@ -605,7 +915,7 @@ class OpenCTIConnectorHelper:
         self.cache_index = {}
         self.cache_added = []
         try:
-            bundle_data = json.loads(bundle)
+            bundle_data = opencti_json.loads(bundle)
         except:
             raise Exception("File data is not a valid JSON")
 
@@ -778,7 +1088,7 @@ class OpenCTIConnectorHelper:
             "spec_version": "2.0",
             "objects": items,
         }
-        return json.dumps(bundle)
+        return opencti_json.dumps(bundle)
 
     @staticmethod
     def check_max_tlp(tlp, max_tlp) -> bool:
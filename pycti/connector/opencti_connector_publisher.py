@@ -0,0 +1,496 @@
+import logging
+import threading
+import time
+import uuid
+
+import pika
+
+
+class PublishError(Exception):
+    """raised when messages could not be published after all their retries
+
+    :param messages: the messages that were not published
+    :type messages: list
+    """
+
+    def __init__(self, messages):
+        Exception.__init__(
+            self, str(len(messages)) + " message(s) could not be published"
+        )
+        self.messages = messages
+
+
+class Message:
+    """a message being published
+
+    :param routing_key: routing key of the message
+    :type routing_key: str
+    :param body: body of the message
+    :type body: bytes
+    :param batch: batch the message is published in, defaults to None
+    :type batch: PublishBatch, optional
+    """
+
+    __slots__ = ["id", "routing_key", "body", "batch", "attempts", "returned"]
+
+    def __init__(self, routing_key, body, batch=None):
+        self.id = str(uuid.uuid4())
+        self.routing_key = routing_key
+        self.body = body
+        self.batch = batch
+        self.attempts = 0
+        self.returned = False
+
+
+class PublishBatch:
+    """messages of a `BundlePublisher` confirmed together
+
+    `flush` only waits for the messages of the batch, so several threads can
+    share the publisher and each get the failures of its own messages.
+
+    :param publisher: the publisher of the messages
+    :type publisher: BundlePublisher
+    """
+
+    def __init__(self, publisher):
+        self.publisher = publisher
+        self.outstanding = 0
+        self.failed = []
+
+    def publish(self, routing_key, body):
+        """publish a message in the batch, blocks while the window is full
+
+        :param routing_key: routing key of the message
+        :type routing_key: str
+        :param body: body of the message
+        :type body: bytes
+        """
+
+        self.publisher.publish(routing_key, body, self)
+
+    def flush(self, timeout=None):
+        """wait for the confirmation of the messages of the batch
+
+        :param timeout: maximum time to wait in seconds, defaults to None
+        :type timeout: float, optional
+        :raises PublishError: if messages of the batch could not be published
+        :raises TimeoutError: if the messages are not confirmed in time
+        """
+
+        condition = self.publisher.condition
+        with condition:
+            if not condition.wait_for(lambda: self.outstanding == 0, timeout):
+                raise TimeoutError("Messages are still waiting for confirmation")
+            failed, self.failed = self.failed, []
+        if len(failed) > 0:
+            raise PublishError(failed)
+
+
+class BundlePublisher:
+    """Thread-safe RabbitMQ publisher with windowed publisher confirms
+
+    Messages are published without waiting for their confirmation, up to
+    `window` unconfirmed messages, `publish` blocks beyond. Messages nacked or
+    returned as unroutable by the broker are published again after an
+    exponential backoff, at most `max_retries` times. Messages not confirmed
+    or waiting for a retry when the connection is lost are published again
+    once reconnected. Threads sharing the publisher wait for their own
+    messages with a `PublishBatch`.
+
+    All the broker calls are made from the thread of the broker, see
+    `PikaBroker` and `InMemoryBroker`.
+
+    :param broker: the broker connection
+    :type broker: PikaBroker or InMemoryBroker
+    :param exchange: exchange the messages are published to
+    :type exchange: str
+    :param window: maximum number of unconfirmed messages, defaults to 1000
+    :type window: int, optional
+    :param max_retries: maximum number of retries of a message, defaults to 5
+    :type max_retries: int, optional
+    :param retry_delay: delay in seconds before the first retry, doubled for every retry, defaults to 1
+    :type retry_delay: float, optional
+    :param max_retry_delay: maximum delay in seconds between retries, defaults to 30
+    :type max_retry_delay: float, optional
+    """
+
+    def __init__(
+        self,
+        broker,
+        exchange,
+        window=1000,
+        max_retries=5,
+        retry_delay=1.0,
+        max_retry_delay=30.0,
+    ):
+        self.broker = broker
+        self.exchange = exchange
+        self.window = window
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.condition = threading.Condition()
+        # Messages published and waiting for their confirmation, by delivery tag
+        self.pending = {}
+        # Messages to publish once connected
+        self.unsent = []
+        # Messages waiting for the delay before their retry
+        self.retrying = []
+        self.connected = False
+        self.next_tag = 1
+        self.outstanding = 0
+        self.failed = []
+        self.broker.start(self)
+
+    def batch(self) -> PublishBatch:
+        """start a batch of messages, confirmed together
+
+        :return: the batch
+        :rtype: PublishBatch
+        """
+
+        return PublishBatch(self)
+
+    def publish(self, routing_key, body, batch=None):
+        """publish a message, blocks while the window is full
+
+        :param routing_key: routing key of the message
+        :type routing_key: str
+        :param body: body of the message
+        :type body: bytes
+        :param batch: batch of the message, defaults to None
+        :type batch: PublishBatch, optional
+        """
+
+        message = Message(routing_key, body, batch)
+        with self.condition:
+            while self.outstanding >= self.window:
+                self.condition.wait()
+            self.outstanding += 1
+            if batch is not None:
+                batch.outstanding += 1
+        self.broker.call_soon(lambda: self.send(message))
+
+    def flush(self, timeout=None):
+        """wait for the confirmation of every published message
+
+        The failures of the messages published in a batch are raised by the
+        `flush` of their batch.
+
+        :param timeout: maximum time to wait in seconds, defaults to None
+        :type timeout: float, optional
+        :raises PublishError: if messages could not be published
+        :raises TimeoutError: if the messages are not confirmed in time
+        """
+
+        with self.condition:
+            if not self.condition.wait_for(lambda: self.outstanding == 0, timeout):
+                raise TimeoutError("Messages are still waiting for confirmation")
+            failed, self.failed = self.failed, []
+        if len(failed) > 0:
+            raise PublishError(failed)
+
+    def close(self, timeout=None):
+        """wait for the pending confirmations and close the connection
+
+        :param timeout: maximum time to wait in seconds, defaults to None
+        :type timeout: float, optional
+        """
+
+        try:
+            self.flush(timeout)
+        finally:
+            self.broker.close()
+
+    def send(self, message):
+        if not self.connected:
+            self.unsent.append(message)
+            return
+        self.pending[self.next_tag] = message
+        self.next_tag += 1
+        message.returned = False
+        self.broker.publish(
+            self.exchange, message.routing_key, message.body, message.id
+        )
+
+    def on_open(self):
+        """called by the broker once the channel is open"""
+
+        self.connected = True
+        self.next_tag = 1
+        unsent, self.unsent = self.unsent, []
+        for message in unsent:
+            self.send(message)
+
+    def on_close(self):
+        """called by the broker when the connection is lost"""
+
+        self.connected = False
+        # Unconfirmed messages may not have been received, and the retries
+        # scheduled on the lost connection will not run
+        self.unsent = (
+            [self.pending[tag] for tag in sorted(self.pending)]
+            + self.retrying
+            + self.unsent
+        )
+        self.pending = {}
+        self.retrying = []
+
+    def on_confirm(self, delivery_tag, ack, multiple=False):
+        """called by the broker when messages are acked or nacked
+
+        :param delivery_tag: delivery tag of the confirmed message
+        :type delivery_tag: int
+        :param ack: `True` if the messages are acked
+        :type ack: bool
+        :param multiple: whether every message up to the delivery tag is confirmed
+        :type multiple: bool
+        """
+
+        if multiple:
+            tags = [tag for tag in self.pending if tag <= delivery_tag]
+        else:
+            tags = [delivery_tag] if delivery_tag in self.pending else []
+        for tag in sorted(tags):
+            message = self.pending.pop(tag)
+            if ack and not message.returned:
+                self.done(message)
+            else:
+                self.retry(message, "unroutable" if ack else "nacked")
+
+    def on_return(self, message_id):
+        """called by the broker when a message is returned as unroutable
+
+        :param message_id: id of the returned message
+        :type message_id: str
+        """
+
+        for message in self.pending.values():
+            if message.id == message_id:
+                message.returned = True
+
+    def retry(self, message, reason):
+        message.attempts += 1
+        if message.attempts > self.max_retries:
+            logging.error(
+                "Unable to publish message " + message.id + " (" + reason + ")"
+            )
+            with self.condition:
+                if message.batch is not None:
+                    message.batch.failed.append(message)
+                else:
+                    self.failed.append(message)
+            self.done(message)
+            return
+        delay = min(
+            self.max_retry_delay, self.retry_delay * 2 ** (message.attempts - 1)
+        )
+        logging.info(
+            "Message " + message.id + " " + reason + ", retry in " + str(delay) + "s"
+        )
+        self.retrying.append(message)
+        self.broker.call_later(delay, lambda: self.resend(message))
+
+    def resend(self, message):
+        # The message is sent again on reconnection if the connection was lost
+        if message in self.retrying:
+            self.retrying.remove(message)
+            self.send(message)
+
+    def done(self, message):
+        with self.condition:
+            self.outstanding -= 1
+            if message.batch is not None:
+                message.batch.outstanding -= 1
+            self.condition.notify_all()
+
+
+class PikaBroker:
+    """RabbitMQ connection of a `BundlePublisher`, run by its own IO thread
+
+    The connection is opened again after `reconnect_delay` when it is lost.
+
+    :param parameters: the connection parameters
+    :type parameters: pika.ConnectionParameters
+    :param reconnect_delay: delay in seconds before reconnecting, defaults to 5
+    :type reconnect_delay: float, optional
+    """
+
+    def __init__(self, parameters, reconnect_delay=5.0):
+        self.parameters = parameters
+        self.reconnect_delay = reconnect_delay
+        self.publisher = None
+        self.connection = None
+        self.channel = None
+        self.lock = threading.Lock()
+        self.callbacks = []
+        self.closing = False
+        self.thread = None
+
+    def start(self, publisher):
+        self.publisher = publisher
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        while not self.closing:
+            connection = pika.SelectConnection(
+                parameters=self.parameters,
+                on_open_callback=self.on_connection_open,
+                on_open_error_callback=self.on_connection_open_error,
+                on_close_callback=self.on_connection_closed,
+            )
+            with self.lock:
+                self.connection = connection
+                callbacks, self.callbacks = self.callbacks, []
+            for callback in callbacks:
+                connection.ioloop.add_callback_threadsafe(callback)
+            connection.ioloop.start()
+            with self.lock:
+                self.connection = None
+            if not self.closing:
+                time.sleep(self.reconnect_delay)
+
+    def on_connection_open(self, connection):
+        connection.channel(on_open_callback=self.on_channel_open)
+
+    def on_connection_open_error(self, connection, error):
+        logging.error("Unable to connect to the broker: " + str(error))
+        connection.ioloop.stop()
+
+    def on_connection_closed(self, connection, reason):
+        self.channel = None
+        self.publisher.on_close()
+        if not self.closing:
+            logging.error("Broker connection lost: " + str(reason))
+        connection.ioloop.stop()
+
+    def on_channel_open(self, channel):
+        self.channel = channel
+        channel.confirm_delivery(self.on_delivery_confirmation)
+        channel.add_on_return_callback(self.on_return)
+        self.publisher.on_open()
+
+    def on_delivery_confirmation(self, frame):
+        method = frame.method
+        self.publisher.on_confirm(
+            method.delivery_tag,
+            isinstance(method, pika.spec.Basic.Ack),
+            method.multiple,
+        )
+
+    def on_return(self, channel, method, properties, body):
+        self.publisher.on_return(properties.message_id)
+
+    def publish(self, exchange, routing_key, body, message_id):
+        self.channel.basic_publish(
+            exchange=exchange,
+            routing_key=routing_key,
+            body=body,
+            properties=pika.BasicProperties(
+                delivery_mode=2, message_id=message_id  # make message persistent
+            ),
+            mandatory=True,
+        )
+
+    def call_soon(self, callback):
+        """run a callback in the IO thread, thread-safe"""
+
+        with self.lock:
+            if self.connection is None:
+                self.callbacks.append(callback)
+                return
+            self.connection.ioloop.add_callback_threadsafe(callback)
+
+    def call_later(self, delay, callback):
+        """run a callback in the IO thread after a delay, from the IO thread"""
+
+        self.connection.ioloop.call_later(delay, callback)
+
+    def close(self):
+        self.closing = True
+
+        def close_connection():
+            if self.connection is not None and self.connection.is_open:
+                self.connection.close()
+
+        self.call_soon(close_connection)
+
+
+class InMemoryBroker:
+    """broker stand-in keeping the published messages in memory
+
+    Messages are confirmed as soon as they are published. The first `nacks`
+    messages are nacked and the next `returns` ones are returned as
+    unroutable. Retries are not delayed, unless `hold_retries` is set: they
+    then wait for `run_retries`, and are dropped by `disconnect` as they
+    would be with a lost connection.
+
+    :param nacks: number of messages to nack, defaults to 0
+    :type nacks: int, optional
+    :param returns: number of messages to return, defaults to 0
+    :type returns: int, optional
+    :param hold_retries: whether retries wait for `run_retries`, defaults to False
+    :type hold_retries: bool, optional
+    """
+
+    def __init__(self, nacks=0, returns=0, hold_retries=False):
+        self.nacks = nacks
+        self.returns = returns
+        self.hold_retries = hold_retries
+        self.retries = []
+        self.publisher = None
+        self.lock = threading.RLock()
+        self.delivery_tag = 0
+        self.messages = []
+        self.delays = []
+        self.closed = False
+
+    def start(self, publisher):
+        self.publisher = publisher
+        with self.lock:
+            publisher.on_open()
+
+    def publish(self, exchange, routing_key, body, message_id):
+        self.delivery_tag += 1
+        if self.nacks > 0:
+            self.nacks -= 1
+            self.publisher.on_confirm(self.delivery_tag, False)
+            return
+        if self.returns > 0:
+            self.returns -= 1
+            self.publisher.on_return(message_id)
+        else:
+            self.messages.append((exchange, routing_key, body))
+        self.publisher.on_confirm(self.delivery_tag, True)
+
+    def call_soon(self, callback):
+        with self.lock:
+            callback()
+
+    def call_later(self, delay, callback):
+        self.delays.append(delay)
+        if self.hold_retries:
+            self.retries.append(callback)
+        else:
+            callback()
+
+    def run_retries(self):
+        with self.lock:
+            retries, self.retries = self.retries, []
+            for callback in retries:
+                callback()
+
+    def disconnect(self):
+        with self.lock:
+            self.retries = []
+            self.publisher.on_close()
+
+    def reconnect(self):
+        with self.lock:
+            # Delivery tags start again on a new channel
+            self.delivery_tag = 0
+            self.publisher.on_open()
+
+    def close(self):
+        self.closed = True
@@ -0,0 +1,249 @@
+import logging
+import threading
+import time
+
+import requests
+
+
+class StreamEvent:
+    """an event of the OpenCTI stream
+
+    The data is kept as received and only decoded when read.
+
+    :param id: id of the event
+    :type id: str
+    :param event: type of the event
+    :type event: str
+    :param raw_data: UTF-8 data of the event
+    :type raw_data: bytes
+    """
+
+    __slots__ = ["id", "event", "raw_data", "_data"]
+
+    def __init__(self, id, event, raw_data):
+        self.id = id
+        self.event = event
+        self.raw_data = raw_data
+        self._data = None
+
+    @property
+    def data(self) -> str:
+        if self._data is None:
+            self._data = self.raw_data.decode("utf-8")
+        return self._data
+
+    def __str__(self):
+        lines = []
+        if self.id is not None:
+            lines.append("id: " + self.id)
+        lines.append("event: " + self.event)
+        lines.extend("data: " + line for line in self.data.split("\n"))
+        return "\n".join(lines)
+
+
+class SSEReader:
+    """Reader of a server-sent events stream
+
+    The stream is read by large chunks and split into events without looking
+    at their data. Events of the types not listed in `events` are dropped
+    before being built. When the connection is lost, it is opened again from
+    the last received event, sent as `Last-Event-ID`, after a delay doubled
+    on every failed attempt.
+
+    :param url: url of the stream
+    :type url: str
+    :param headers: HTTP headers of the request, defaults to None
+    :type headers: dict, optional
+    :param verify: whether to verify the SSL certificate, defaults to True
+    :type verify: bool, optional
+    :param events: types of the events to read, defaults to None (every type)
+    :type events: set, optional
+    :param last_event_id: id of the event to read the stream from, defaults to None
+    :type last_event_id: str, optional
+    :param chunk_size: size of the chunks read from the connection, defaults to 65536
+    :type chunk_size: int, optional
+    :param max_retry: maximum delay in milliseconds before reconnecting, defaults to 60000
+    :type max_retry: int, optional
+    :param timeout: connect and read timeout in seconds of the connection, defaults to None
+    :type timeout: float or tuple, optional
+    """
+
+    def __init__(
+        self,
+        url,
+        headers=None,
+        verify=True,
+        events=None,
+        last_event_id=None,
+        chunk_size=65536,
+        max_retry=60000,
+        timeout=None,
+    ):
+        self.url = url
+        self.headers = headers if headers is not None else {}
+        self.verify = verify
+        self.events = set(events) if events is not None else None
+        self.last_event_id = last_event_id
+        self.chunk_size = chunk_size
+        # Delay before reconnecting in milliseconds, can be set by the server
+        self.retry = 3000
+        self.max_retry = max_retry
+        self.timeout = timeout
+
+    def connect(self):
+        headers = dict(self.headers)
+        headers["Accept"] = "text/event-stream"
+        headers["Cache-Control"] = "no-cache"
+        if self.last_event_id is not None:
+            headers["Last-Event-ID"] = self.last_event_id
+        response = requests.get(
+            self.url,
+            headers=headers,
+            verify=self.verify,
+            stream=True,
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        return response
+
+    def __iter__(self):
+        attempts = 0
+        while True:
+            try:
+                response = self.connect()
+            except requests.RequestException as e:
+                logging.error("Unable to connect to the stream: " + str(e))
+            else:
+                try:
+                    for event in self.parse(response.iter_content(self.chunk_size)):
+                        attempts = 0
+                        yield event
+                except requests.RequestException as e:
+                    logging.error("Stream connection lost: " + str(e))
+                finally:
+                    response.close()
+            delay = min(self.max_retry, self.retry * 2**attempts)
+            attempts += 1
+            logging.info("Reconnecting to the stream in " + str(delay) + "ms")
+            time.sleep(delay / 1000)
+
+    def parse(self, chunks):
+        """split a stream into events
+
+        :param chunks: the content of the stream
+        :type chunks: iterable of bytes
+        :return: the events of the stream
+        :rtype: iterator of StreamEvent
+        """
+
+        buffer = bytearray()
+        # Position from where to look for the end of the next event
+        search = 0
+        for chunk in chunks:
+            carriage_return = buffer.endswith(b"\r") or b"\r" in chunk
+            buffer += chunk
+            if carriage_return:
+                if buffer.endswith(b"\r"):
+                    # The line ending may be \r\n, wait for the next chunk
+                    continue
+                buffer = buffer.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+                search = 0
+            start = 0
+            while True:
+                end = buffer.find(b"\n\n", max(start, search))
+                if end == -1:
+                    break
+                event = self.parse_event(bytes(buffer[start:end]))
+                start = end + 2
+                if event is not None:
+                    yield event
+            del buffer[:start]
+            search = max(0, len(buffer) - 1)
+
+    def parse_event(self, block):
+        event_type = "message"
+        data = []
+        for line in block.split(b"\n"):
+            if line.startswith(b":"):
+                # Comment
+                continue
+            field, _, value = line.partition(b":")
+            if value.startswith(b" "):
+                value = value[1:]
+            if field == b"data":
+                data.append(value)
+            elif field == b"event":
+                event_type = value.decode("utf-8")
+            elif field == b"id":
+                self.last_event_id = value.decode("utf-8")
+            elif field == b"retry" and value.isdigit():
+                self.retry = int(value)
+        if len(data) == 0:
+            return None
+        if self.events is not None and event_type not in self.events:
+            return None
+        return StreamEvent(self.last_event_id, event_type, b"\n".join(data))
+
+
+class StreamState:
+    """Position in the stream of a connector, saved in its state by batches
+
+    The id of the last processed event is kept in memory and written to the
+    state of the connector every `checkpoint_events` events or
+    `checkpoint_interval` seconds, and by `checkpoint`.
+
+    :param get_state: function reading the state of the connector
+    :type get_state: callable
+    :param set_state: function writing the state of the connector
+    :type set_state: callable
+    :param checkpoint_events: number of events between two checkpoints, defaults to 100
+    :type checkpoint_events: int, optional
+    :param checkpoint_interval: maximum time in seconds between two checkpoints, defaults to 5
+    :type checkpoint_interval: float, optional
+    """
+
+    def __init__(
+        self, get_state, set_state, checkpoint_events=100, checkpoint_interval=5.0
+    ):
+        self.get_state = get_state
+        self.set_state = set_state
+        self.checkpoint_events = checkpoint_events
+        self.checkpoint_interval = checkpoint_interval
+        self.lock = threading.RLock()
+        self.last_event_id = None
+        self.dirty = False
+        self.events = 0
+        self.checkpoint_time = time.monotonic()
+
+    def update(self, last_event_id):
+        """set the id of the last processed event
+
+        :param last_event_id: id of the event
+        :type last_event_id: str
+        """
+
+        with self.lock:
+            self.last_event_id = last_event_id
+            self.dirty = True
+            self.events += 1
+            if (
+                self.events >= self.checkpoint_events
+                or time.monotonic() - self.checkpoint_time >= self.checkpoint_interval
+            ):
+                self.checkpoint()
+
+    def checkpoint(self):
+        """write the id of the last processed event to the state, if it changed"""
+
+        with self.lock:
+            if not self.dirty:
+                return
+            state = self.get_state()
+            if state is not None:
+                state["connectorLastEventId"] = self.last_event_id
+                self.set_state(state)
+            else:
+                self.set_state({"connectorLastEventId": self.last_event_id})
+            self.dirty = False
+            self.events = 0
+            self.checkpoint_time = time.monotonic()
@@ -121,6 +121,10 @@ class AttackPattern:
         :param search: the search keyword
         :param first: return the first n rows from the after ID (or the beginning if not set)
         :param after: ID of the first row for pagination
+        :param getAll: return all the rows, fetched page after page
+        :param pageSize: number of rows fetched per page with getAll
+        :param progressCallback: called with the number of fetched rows and the globalCount after every page
+        :param stream: return an iterable fetching the pages as it goes
         :return List of Attack-Pattern objects
     """
 
@@ -134,8 +138,10 @@ class AttackPattern:
         custom_attributes = kwargs.get("customAttributes", None)
         get_all = kwargs.get("getAll", False)
         with_pagination = kwargs.get("withPagination", False)
+        stream = kwargs.get("stream", False)
+        progress_callback = kwargs.get("progressCallback", None)
         if get_all:
-            first = 500
+            first = kwargs.get("pageSize", 500)
 
         self.opencti.log(
             "info", "Listing Attack-Patterns with filters " + json.dumps(filters) + "."
@@ -162,42 +168,23 @@ class AttackPattern:
             }
         """
         )
-        result = self.opencti.query(
-            query,
-            {
-                "filters": filters,
-                "search": search,
-                "first": first,
-                "after": after,
-                "orderBy": order_by,
-                "orderMode": order_mode,
-            },
-        )
-        if get_all:
-            final_data = []
-            data = self.opencti.process_multiple(result["data"]["attackPatterns"])
-            final_data = final_data + data
-            while result["data"]["attackPatterns"]["pageInfo"]["hasNextPage"]:
-                after = result["data"]["attackPatterns"]["pageInfo"]["endCursor"]
-                self.opencti.log("info", "Listing Attack-Patterns after " + after)
-                result = self.opencti.query(
-                    query,
-                    {
-                        "filters": filters,
-                        "search": search,
-                        "first": first,
-                        "after": after,
-                        "orderBy": order_by,
-                        "orderMode": order_mode,
-                    },
-                )
-                data = self.opencti.process_multiple(result["data"]["attackPatterns"])
-                final_data = final_data + data
-            return final_data
-        else:
-            return self.opencti.process_multiple(
-                result["data"]["attackPatterns"], with_pagination
+        variables = {
+            "filters": filters,
+            "search": search,
+            "first": first,
+            "after": after,
+            "orderBy": order_by,
+            "orderMode": order_mode,
+        }
+        if get_all or stream:
+            entities = self.opencti.paginate(
+                query, variables, "attackPatterns", progress_callback
             )
+            return entities if stream else list(entities)
+        result = self.opencti.query(query, variables)
+        return self.opencti.process_multiple(
+            result["data"]["attackPatterns"], with_pagination
+        )
 
     """
         Read a Attack-Pattern object
@@ -231,7 +218,7 @@ class AttackPattern:
             result = self.opencti.query(query, {"id": id})
             return self.opencti.process_multiple_fields(result["data"]["attackPattern"])
         elif filters is not None:
-            result = self.list(filters=filters)
+            result = self.list(filters=filters, first=1)
             if len(result) > 0:
                 return result[0]
             else:
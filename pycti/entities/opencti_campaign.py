@@ -106,6 +106,10 @@ class Campaign:
         :param search: the search keyword
         :param first: return the first n rows from the after ID (or the beginning if not set)
         :param after: ID of the first row for pagination
+        :param getAll: return all the rows, fetched page after page
+        :param pageSize: number of rows fetched per page with getAll
+        :param progressCallback: called with the number of fetched rows and the globalCount after every page
+        :param stream: return an iterable fetching the pages as it goes
         :return List of Campaign objects
     """
 
@@ -119,8 +123,10 @@ class Campaign:
         custom_attributes = kwargs.get("customAttributes", None)
         get_all = kwargs.get("getAll", False)
         with_pagination = kwargs.get("withPagination", False)
+        stream = kwargs.get("stream", False)
+        progress_callback = kwargs.get("progressCallback", None)
         if get_all:
-            first = 500
+            first = kwargs.get("pageSize", 500)
 
         self.opencti.log(
             "info", "Listing Campaigns with filters " + json.dumps(filters) + "."
@@ -147,17 +153,20 @@ class Campaign:
             }
         """
         )
-        result = self.opencti.query(
-            query,
-            {
-                "filters": filters,
-                "search": search,
-                "first": first,
-                "after": after,
-                "orderBy": order_by,
-                "orderMode": order_mode,
-            },
-        )
+        variables = {
+            "filters": filters,
+            "search": search,
+            "first": first,
+            "after": after,
+            "orderBy": order_by,
+            "orderMode": order_mode,
+        }
+        if get_all or stream:
+            entities = self.opencti.paginate(
+                query, variables, "campaigns", progress_callback
+            )
+            return entities if stream else list(entities)
+        result = self.opencti.query(query, variables)
         return self.opencti.process_multiple(
             result["data"]["campaigns"], with_pagination
         )
@@ -194,7 +203,7 @@ class Campaign:
             result = self.opencti.query(query, {"id": id})
             return self.opencti.process_multiple_fields(result["data"]["campaign"])
         elif filters is not None:
-            result = self.list(filters=filters)
+            result = self.list(filters=filters, first=1)
             if len(result) > 0:
                 return result[0]
             else:
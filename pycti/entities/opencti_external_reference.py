@@ -28,6 +28,10 @@ class ExternalReference:
         :param filters: the filters to apply
         :param first: return the first n rows from the after ID (or the beginning if not set)
         :param after: ID of the first row for pagination
+        :param getAll: return all the rows, fetched page after page
+        :param pageSize: number of rows fetched per page with getAll
+        :param progressCallback: called with the number of fetched rows and the globalCount after every page
+        :param stream: return an iterable fetching the pages as it goes
         :return List of External-Reference objects
     """
 
@@ -39,8 +43,10 @@ class ExternalReference:
         order_mode = kwargs.get("orderMode", None)
         get_all = kwargs.get("getAll", False)
         with_pagination = kwargs.get("withPagination", False)
+        stream = kwargs.get("stream", False)
+        progress_callback = kwargs.get("progressCallback", None)
         if get_all:
-            first = 500
+            first = kwargs.get("pageSize", 500)
 
         self.opencti.log(
             "info",
@@ -68,16 +74,19 @@ class ExternalReference:
             }
         """
         )
-        result = self.opencti.query(
-            query,
-            {
-                "filters": filters,
-                "first": first,
-                "after": after,
-                "orderBy": order_by,
-                "orderMode": order_mode,
-            },
-        )
+        variables = {
+            "filters": filters,
+            "first": first,
+            "after": after,
+            "orderBy": order_by,
+            "orderMode": order_mode,
+        }
+        if get_all or stream:
+            entities = self.opencti.paginate(
+                query, variables, "externalReferences", progress_callback
+            )
+            return entities if stream else list(entities)
+        result = self.opencti.query(query, variables)
         return self.opencti.process_multiple(
             result["data"]["externalReferences"], with_pagination
         )
@@ -111,7 +120,7 @@ class ExternalReference:
                 result["data"]["externalReference"]
             )
         elif filters is not None:
-            result = self.list(filters=filters)
+            result = self.list(filters=filters, first=1)
             if len(result) > 0:
                 return result[0]
             else:
@@ -138,6 +138,14 @@ class Indicator:
         :param bool orderMode: (optional) either "`asc`" or "`desc`"
         :param list customAttributes: (optional) list of attributes keys to return
         :param bool getAll: (optional) switch to return all entries (be careful to use this without any other filters)
+        :param int pageSize: (optional) number of entries fetched per page with `getAll`
+        :param callable progressCallback: (optional) called with the number of fetched
+                            entries and the `globalCount` after every page
+        :param bool stream: (optional) switch to return an iterable fetching the pages as it goes
+        :param int parallel: (optional) number of partitions fetched in parallel with `getAll` or `stream`
+        :param list partitions: (optional) lists of filters splitting the listing,
+                            defaults to `created_at` time windows
+        :param bool ordered: (optional) switch to yield the partitions in order, defaults to True
         :param bool withPagination: (optional) switch to use pagination
 
         :return: List of Indicators
@@ -153,8 +161,13 @@ class Indicator:
         custom_attributes = kwargs.get("customAttributes", None)
         get_all = kwargs.get("getAll", False)
         with_pagination = kwargs.get("withPagination", False)
+        stream = kwargs.get("stream", False)
+        progress_callback = kwargs.get("progressCallback", None)
+        parallel = kwargs.get("parallel", None)
+        partitions = kwargs.get("partitions", None)
+        ordered = kwargs.get("ordered", True)
         if get_all:
-            first = 100
+            first = kwargs.get("pageSize", 100)
 
         self.opencti.log(
             "info", "Listing Indicators with filters " + json.dumps(filters) + "."
@@ -181,42 +194,34 @@ class Indicator:
             }
         """
         )
-        result = self.opencti.query(
-            query,
-            {
-                "filters": filters,
-                "search": search,
-                "first": first,
-                "after": after,
-                "orderBy": order_by,
-                "orderMode": order_mode,
-            },
-        )
-        if get_all:
-            final_data = []
-            data = self.opencti.process_multiple(result["data"]["indicators"])
-            final_data = final_data + data
-            while result["data"]["indicators"]["pageInfo"]["hasNextPage"]:
-                after = result["data"]["indicators"]["pageInfo"]["endCursor"]
-                self.opencti.log("info", "Listing Indicators after " + after)
-                result = self.opencti.query(
+        variables = {
+            "filters": filters,
+            "search": search,
+            "first": first,
+            "after": after,
+            "orderBy": order_by,
+            "orderMode": order_mode,
+        }
+        if get_all or stream:
+            if parallel is not None:
+                entities = self.opencti.paginate_parallel(
                     query,
-                    {
-                        "filters": filters,
-                        "search": search,
-                        "first": first,
-                        "after": after,
-                        "orderBy": order_by,
-                        "orderMode": order_mode,
-                    },
+                    variables,
+                    "indicators",
+                    max_workers=parallel,
+                    partitions=partitions,
+                    ordered=ordered,
+                    progress_callback=progress_callback,
                 )
-                data = self.opencti.process_multiple(result["data"]["indicators"])
-                final_data = final_data + data
-            return final_data
-        else:
-            return self.opencti.process_multiple(
-                result["data"]["indicators"], with_pagination
-            )
+            else:
+                entities = self.opencti.paginate(
+                    query, variables, "indicators", progress_callback
+                )
+            return entities if stream else list(entities)
+        result = self.opencti.query(query, variables)
+        return self.opencti.process_multiple(
+            result["data"]["indicators"], with_pagination
+        )
 
     def read(self, **kwargs):
         """Read an Indicator object
@@ -258,7 +263,9 @@ class Indicator:
             result = self.opencti.query(query, {"id": id})
             return self.opencti.process_multiple_fields(result["data"]["indicator"])
         elif filters is not None:
-            result = self.list(filters=filters, customAttributes=custom_attributes)
+            result = self.list(
+                filters=filters, customAttributes=custom_attributes, first=1
+            )
             if len(result) > 0:
                 return result[0]
             else:
@@ -131,6 +131,10 @@ class Infrastructure:
         :param bool orderMode: (optional) either "`asc`" or "`desc`"
         :param list customAttributes: (optional) list of attributes keys to return
         :param bool getAll: (optional) switch to return all entries (be careful to use this without any other filters)
+        :param int pageSize: (optional) number of entries fetched per page with `getAll`
+        :param callable progressCallback: (optional) called with the number of fetched
+                            entries and the `globalCount` after every page
+        :param bool stream: (optional) switch to return an iterable fetching the pages as it goes
         :param bool withPagination: (optional) switch to use pagination
         """
 
@@ -143,8 +147,10 @@ class Infrastructure:
         custom_attributes = kwargs.get("customAttributes", None)
         get_all = kwargs.get("getAll", False)
         with_pagination = kwargs.get("withPagination", False)
+        stream = kwargs.get("stream", False)
+        progress_callback = kwargs.get("progressCallback", None)
         if get_all:
-            first = 500
+            first = kwargs.get("pageSize", 500)
 
         self.opencti.log(
             "info", "Listing Infrastructures with filters " + json.dumps(filters) + "."
@@ -171,43 +177,23 @@ class Infrastructure:
             }
         """
         )
-        result = self.opencti.query(
-            query,
-            {
-                "filters": filters,
-                "search": search,
-                "first": first,
-                "after": after,
-                "orderBy": order_by,
-                "orderMode": order_mode,
-            },
-        )
-
-        if get_all:
-            final_data = []
-            data = self.opencti.process_multiple(result["data"]["infrastructures"])
-            final_data = final_data + data
-            while result["data"]["infrastructures"]["pageInfo"]["hasNextPage"]:
-                after = result["data"]["infrastructures"]["pageInfo"]["endCursor"]
-                self.opencti.log("info", "Listing Infrastructures after " + after)
-                result = self.opencti.query(
-                    query,
-                    {
-                        "filters": filters,
-                        "search": search,
-                        "first": first,
-                        "after": after,
-                        "orderBy": order_by,
-                        "orderMode": order_mode,
-                    },
-                )
-                data = self.opencti.process_multiple(result["data"]["infrastructures"])
-                final_data = final_data + data
-            return final_data
-        else:
-            return self.opencti.process_multiple(
-                result["data"]["infrastructures"], with_pagination
+        variables = {
+            "filters": filters,
+            "search": search,
+            "first": first,
+            "after": after,
+            "orderBy": order_by,
+            "orderMode": order_mode,
+        }
+        if get_all or stream:
+            entities = self.opencti.paginate(
+                query, variables, "infrastructures", progress_callback
             )
+            return entities if stream else list(entities)
+        result = self.opencti.query(query, variables)
+        return self.opencti.process_multiple(
+            result["data"]["infrastructures"], with_pagination
+        )
 
     def read(self, **kwargs):
         """Read an Infrastructure object
@@ -248,7 +234,9 @@ class Infrastructure:
                 result["data"]["infrastructure"]
             )
         elif filters is not None:
-            result = self.list(filters=filters, customAttributes=custom_attributes)
+            result = self.list(
+                filters=filters, customAttributes=custom_attributes, first=1
+            )
             if len(result) > 0:
                 return result[0]
             else:
@@ -191,6 +191,10 @@ class Report:
         :param search: the search keyword
         :param first: return the first n rows from the after ID (or the beginning if not set)
         :param after: ID of the first row for pagination
+        :param getAll: return all the rows, fetched page after page
+        :param pageSize: number of rows fetched per page with getAll
+        :param progressCallback: called with the number of fetched rows and the globalCount after every page
+        :param stream: return an iterable fetching the pages as it goes
         :return List of Report objects
     """
 
@@ -204,8 +208,10 @@ class Report:
         custom_attributes = kwargs.get("customAttributes", None)
         get_all = kwargs.get("getAll", False)
         with_pagination = kwargs.get("withPagination", False)
+        stream = kwargs.get("stream", False)
+        progress_callback = kwargs.get("progressCallback", None)
         if get_all:
-            first = 100
+            first = kwargs.get("pageSize", 100)
 
         self.opencti.log(
             "info", "Listing Reports with filters " + json.dumps(filters) + "."
@@ -232,42 +238,21 @@ class Report:
             }
         """
         )
-        result = self.opencti.query(
-            query,
-            {
-                "filters": filters,
-                "search": search,
-                "first": first,
-                "after": after,
-                "orderBy": order_by,
-                "orderMode": order_mode,
-            },
-        )
-        if get_all:
-            final_data = []
-            data = self.opencti.process_multiple(result["data"]["reports"])
-            final_data = final_data + data
-            while result["data"]["reports"]["pageInfo"]["hasNextPage"]:
-                after = result["data"]["reports"]["pageInfo"]["endCursor"]
-                self.opencti.log("info", "Listing Reports after " + after)
-                result = self.opencti.query(
-                    query,
-                    {
-                        "filters": filters,
-                        "search": search,
-                        "first": first,
-                        "after": after,
-                        "orderBy": order_by,
-                        "orderMode": order_mode,
-                    },
-                )
-                data = self.opencti.process_multiple(result["data"]["reports"])
-                final_data = final_data + data
-            return final_data
-        else:
-            return self.opencti.process_multiple(
-                result["data"]["reports"], with_pagination
+        variables = {
+            "filters": filters,
+            "search": search,
+            "first": first,
+            "after": after,
+            "orderBy": order_by,
+            "orderMode": order_mode,
+        }
+        if get_all or stream:
+            entities = self.opencti.paginate(
+                query, variables, "reports", progress_callback
             )
+            return entities if stream else list(entities)
+        result = self.opencti.query(query, variables)
+        return self.opencti.process_multiple(result["data"]["reports"], with_pagination)
 
     """
         Read a Report object
@@ -301,7 +286,7 @@ class Report:
             result = self.opencti.query(query, {"id": id})
             return self.opencti.process_multiple_fields(result["data"]["report"])
         elif filters is not None:
-            result = self.list(filters=filters)
+            result = self.list(filters=filters, first=1)
             if len(result) > 0:
                 return result[0]
             else:
@@ -321,19 +306,53 @@ class Report:
         name = kwargs.get("name", None)
         published = kwargs.get("published", None)
         custom_attributes = kwargs.get("customAttributes", None)
-        object_result = None
+        by_name = name is not None and published is not None
+        if stix_id is None and not by_name:
+            return None
+        # The id and the name are resolved in one query
+        definitions = []
+        fields = []
+        variables = {}
         if stix_id is not None:
-            object_result = self.read(id=stix_id, customAttributes=custom_attributes)
-        if object_result is None and name is not None and published is not None:
-            published_final = parse(published).strftime("%Y-%m-%d")
-            object_result = self.read(
-                filters=[
-                    {"key": "name", "values": [name]},
-                    {"key": "published_day", "values": [published_final]},
-                ],
+            definitions.append("$id: String!")
+            fields.append(
+                "byId: report(id: $id) {"
+                + (
+                    custom_attributes
+                    if custom_attributes is not None
+                    else self.properties
+                )
+                + "}"
+            )
+            variables["id"] = stix_id
+        if by_name:
+            definitions.append("$filters: [ReportsFiltering]")
+            fields.append(
+                "byName: reports(filters: $filters, first: 1) { edges { node { id } } }"
+            )
+            variables["filters"] = [
+                {"key": "name", "values": [name]},
+                {
+                    "key": "published_day",
+                    "values": [parse(published).strftime("%Y-%m-%d")],
+                },
+            ]
+        query = (
+            "query ReportResolve("
+            + ", ".join(definitions)
+            + ") {\n"
+            + "\n".join(fields)
+            + "\n}"
+        )
+        result = self.opencti.query(query, variables)["data"]
+        if result.get("byId") is not None:
+            return self.opencti.process_multiple_fields(result["byId"])
+        if by_name and len(result["byName"]["edges"]) > 0:
+            return self.read(
+                id=result["byName"]["edges"][0]["node"]["id"],
                 customAttributes=custom_attributes,
             )
-        return object_result
+        return None
 
     """
         Check if a report already contains a thing (Stix Object or Stix Relationship)
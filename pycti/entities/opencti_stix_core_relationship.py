@@ -270,6 +270,10 @@ class StixCoreRelationship:
         :param stopTimeStop: the stop_time date stop filter
         :param first: return the first n rows from the after ID (or the beginning if not set)
         :param after: ID of the first row for pagination
+        :param getAll: return all the rows, fetched page after page
+        :param pageSize: number of rows fetched per page with getAll
+        :param progressCallback: called with the number of fetched rows and the globalCount after every page
+        :param stream: return an iterable fetching the pages as it goes
         :return List of stix_core_relationship objects
     """
 
@@ -291,8 +295,10 @@ class StixCoreRelationship:
         order_mode = kwargs.get("orderMode", None)
         get_all = kwargs.get("getAll", False)
         with_pagination = kwargs.get("withPagination", False)
+        stream = kwargs.get("stream", False)
+        progress_callback = kwargs.get("progressCallback", None)
         if get_all:
-            first = 100
+            first = kwargs.get("pageSize", 100)
 
         self.opencti.log(
             "info",
@@ -326,64 +332,32 @@ class StixCoreRelationship:
             }
          """
         )
-        result = self.opencti.query(
-            query,
-            {
-                "elementId": element_id,
-                "fromId": from_id,
-                "fromTypes": from_types,
-                "toId": to_id,
-                "toTypes": to_types,
-                "relationship_type": relationship_type,
-                "startTimeStart": start_time_start,
-                "startTimeStop": start_time_stop,
-                "stopTimeStart": stop_time_start,
-                "stopTimeStop": stop_time_stop,
-                "filters": filters,
-                "first": first,
-                "after": after,
-                "orderBy": order_by,
-                "orderMode": order_mode,
-            },
-        )
-        if get_all:
-            final_data = []
-            data = self.opencti.process_multiple(
-                result["data"]["stixCoreRelationships"]
-            )
-            final_data = final_data + data
-            while result["data"]["stixCoreRelationships"]["pageInfo"]["hasNextPage"]:
-                after = result["data"]["stixCoreRelationships"]["pageInfo"]["endCursor"]
-                self.opencti.log("info", "Listing StixCoreRelationships after " + after)
-                result = self.opencti.query(
-                    query,
-                    {
-                        "elementId": element_id,
-                        "fromId": from_id,
-                        "fromTypes": from_types,
-                        "toId": to_id,
-                        "toTypes": to_types,
-                        "relationship_type": relationship_type,
-                        "startTimeStart": start_time_start,
-                        "startTimeStop": start_time_stop,
-                        "stopTimeStart": stop_time_start,
-                        "stopTimeStop": stop_time_stop,
-                        "filters": filters,
-                        "first": first,
-                        "after": after,
-                        "orderBy": order_by,
-                        "orderMode": order_mode,
-                    },
-                )
-                data = self.opencti.process_multiple(
-                    result["data"]["stixCoreRelationships"]
-                )
-                final_data = final_data + data
-            return final_data
-        else:
-            return self.opencti.process_multiple(
-                result["data"]["stixCoreRelationships"], with_pagination
+        variables = {
+            "elementId": element_id,
+            "fromId": from_id,
+            "fromTypes": from_types,
+            "toId": to_id,
+            "toTypes": to_types,
+            "relationship_type": relationship_type,
+            "startTimeStart": start_time_start,
+            "startTimeStop": start_time_stop,
+            "stopTimeStart": stop_time_start,
+            "stopTimeStop": stop_time_stop,
+            "filters": filters,
+            "first": first,
+            "after": after,
+            "orderBy": order_by,
+            "orderMode": order_mode,
+        }
+        if get_all or stream:
+            entities = self.opencti.paginate(
+                query, variables, "stixCoreRelationships", progress_callback
             )
+            return entities if stream else list(entities)
+        result = self.opencti.query(query, variables)
+        return self.opencti.process_multiple(
+            result["data"]["stixCoreRelationships"], with_pagination
+        )
 
     """
         Read a stix_core_relationship object
@@ -716,14 +690,7 @@ class StixCoreRelationship:
         label_id = kwargs.get("label_id", None)
         label_name = kwargs.get("label_name", None)
         if label_name is not None:
-            label = self.opencti.label.read(
-                filters=[{"key": "value", "values": [label_name]}]
-            )
-            if label:
-                label_id = label["id"]
-            else:
-                label = self.opencti.label.create(value=label_name)
-                label_id = label["id"]
+            label_id = self.opencti.stix2.resolve_label(label_name)
         if id is not None and label_id is not None:
             self.opencti.log(
                 "info",
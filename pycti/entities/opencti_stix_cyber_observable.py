@@ -284,6 +284,13 @@ class StixCyberObservable:
         :param search: the search keyword
         :param first: return the first n rows from the after ID (or the beginning if not set)
         :param after: ID of the first row
+        :param getAll: return all the rows, fetched page after page
+        :param stream: return an iterable fetching the pages as it goes
+        :param pageSize: number of rows fetched per page with getAll
+        :param progressCallback: called with the number of fetched rows and the globalCount after every page
+        :param parallel: number of partitions fetched in parallel with getAll or stream
+        :param partitions: lists of filters splitting the listing (created_at windows by default)
+        :param ordered: yield the partitions in order (default) or as they are fetched
         :return List of StixCyberObservable objects
     """
 
@@ -298,9 +305,14 @@ class StixCyberObservable:
         custom_attributes = kwargs.get("customAttributes", None)
         get_all = kwargs.get("getAll", False)
         with_pagination = kwargs.get("withPagination", False)
+        stream = kwargs.get("stream", False)
+        progress_callback = kwargs.get("progressCallback", None)
+        parallel = kwargs.get("parallel", None)
+        partitions = kwargs.get("partitions", None)
+        ordered = kwargs.get("ordered", True)
 
         if get_all:
-            first = 100
+            first = kwargs.get("pageSize", 100)
 
         self.opencti.log(
             "info",
@@ -328,47 +340,35 @@ class StixCyberObservable:
             }
         """
         )
-        result = self.opencti.query(
-            query,
-            {
-                "types": types,
-                "filters": filters,
-                "search": search,
-                "first": first,
-                "after": after,
-                "orderBy": order_by,
-                "orderMode": order_mode,
-            },
-        )
-
-        if get_all:
-            final_data = []
-            data = self.opencti.process_multiple(result["data"]["stixCyberObservables"])
-            final_data = final_data + data
-            while result["data"]["stixCyberObservables"]["pageInfo"]["hasNextPage"]:
-                after = result["data"]["stixCyberObservables"]["pageInfo"]["endCursor"]
-                self.opencti.log("info", "Listing StixCyberObservables after " + after)
-                result = self.opencti.query(
+        variables = {
+            "types": types,
+            "filters": filters,
+            "search": search,
+            "first": first,
+            "after": after,
+            "orderBy": order_by,
+            "orderMode": order_mode,
+        }
+        if get_all or stream:
+            if parallel is not None:
+                entities = self.opencti.paginate_parallel(
                     query,
-                    {
-                        "types": types,
-                        "filters": filters,
-                        "search": search,
-                        "first": first,
-                        "after": after,
-                        "orderBy": order_by,
-                        "orderMode": order_mode,
-                    },
+                    variables,
+                    "stixCyberObservables",
+                    max_workers=parallel,
+                    partitions=partitions,
+                    ordered=ordered,
+                    progress_callback=progress_callback,
                 )
-                data = self.opencti.process_multiple(
-                    result["data"]["stixCyberObservables"]
+            else:
+                entities = self.opencti.paginate(
+                    query, variables, "stixCyberObservables", progress_callback
                 )
-                final_data = final_data + data
-            return final_data
-        else:
-            return self.opencti.process_multiple(
-                result["data"]["stixCyberObservables"], with_pagination
-            )
+            return entities if stream else list(entities)
+        result = self.opencti.query(query, variables)
+        return self.opencti.process_multiple(
+            result["data"]["stixCyberObservables"], with_pagination
+        )
 
     """
         Read a StixCyberObservable object
@@ -404,7 +404,9 @@ class StixCyberObservable:
                 result["data"]["stixCyberObservable"]
             )
         elif filters is not None:
-            result = self.list(filters=filters, customAttributes=custom_attributes)
+            result = self.list(
+                filters=filters, customAttributes=custom_attributes, first=1
+            )
             if len(result) > 0:
                 return result[0]
             else:
@@ -1342,14 +1344,7 @@ class StixCyberObservable:
         label_id = kwargs.get("label_id", None)
         label_name = kwargs.get("label_name", None)
         if label_name is not None:
-            label = self.opencti.label.read(
-                filters=[{"key": "value", "values": [label_name]}]
-            )
-            if label:
-                label_id = label["id"]
-            else:
-                label = self.opencti.label.create(value=label_name)
-                label_id = label["id"]
+            label_id = self.opencti.stix2.resolve_label(label_name)
         if id is not None and label_id is not None:
             self.opencti.log(
                 "info",
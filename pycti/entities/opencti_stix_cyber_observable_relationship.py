@@ -47,6 +47,10 @@ class StixCyberObservableRelationship:
         :param stopTimeStop: the last_seen date stop filter
         :param first: return the first n rows from the after ID (or the beginning if not set)
         :param after: ID of the first row for pagination
+        :param getAll: return all the rows, fetched page after page
+        :param pageSize: number of rows fetched per page with getAll
+        :param progressCallback: called with the number of fetched rows and the globalCount after every page
+        :param stream: return an iterable fetching the pages as it goes
         :return List of stix_observable_relationship objects
     """
 
@@ -68,8 +72,10 @@ class StixCyberObservableRelationship:
         order_mode = kwargs.get("orderMode", None)
         get_all = kwargs.get("getAll", False)
         with_pagination = kwargs.get("withPagination", False)
+        stream = kwargs.get("stream", False)
+        progress_callback = kwargs.get("progressCallback", None)
         if get_all:
-            first = 500
+            first = kwargs.get("pageSize", 500)
 
         self.opencti.log(
             "info",
@@ -104,26 +110,29 @@ class StixCyberObservableRelationship:
          """
         )
 
-        result = self.opencti.query(
-            query,
-            {
-                "elementId": element_id,
-                "fromId": from_id,
-                "fromTypes": from_types,
-                "toId": to_id,
-                "toTypes": to_types,
-                "relationship_type": relationship_type,
-                "startTimeStart": start_time_start,
-                "startTimeStop": start_time_stop,
-                "stopTimeStart": stop_time_start,
-                "stopTimeStop": stop_time_stop,
-                "filters": filters,
-                "first": first,
-                "after": after,
-                "orderBy": order_by,
-                "orderMode": order_mode,
-            },
-        )
+        variables = {
+            "elementId": element_id,
+            "fromId": from_id,
+            "fromTypes": from_types,
+            "toId": to_id,
+            "toTypes": to_types,
+            "relationship_type": relationship_type,
+            "startTimeStart": start_time_start,
+            "startTimeStop": start_time_stop,
+            "stopTimeStart": stop_time_start,
+            "stopTimeStop": stop_time_stop,
+            "filters": filters,
+            "first": first,
+            "after": after,
+            "orderBy": order_by,
+            "orderMode": order_mode,
+        }
+        if get_all or stream:
+            entities = self.opencti.paginate(
+                query, variables, "stixCyberObservableRelationships", progress_callback
+            )
+            return entities if stream else list(entities)
+        result = self.opencti.query(query, variables)
         return self.opencti.process_multiple(
             result["data"]["stixCyberObservableRelationships"], with_pagination
         )
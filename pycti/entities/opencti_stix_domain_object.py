@@ -386,6 +386,10 @@ class StixDomainObject:
         :param search: the search keyword
         :param first: return the first n rows from the after ID (or the beginning if not set)
         :param after: ID of the first row for pagination
+        :param getAll: return all the rows, fetched page after page
+        :param pageSize: number of rows fetched per page with getAll
+        :param progressCallback: called with the number of fetched rows and the globalCount after every page
+        :param stream: return an iterable fetching the pages as it goes
         :return List of Stix-Domain-Object objects
     """
 
@@ -400,8 +404,10 @@ class StixDomainObject:
         custom_attributes = kwargs.get("customAttributes", None)
         get_all = kwargs.get("getAll", False)
         with_pagination = kwargs.get("withPagination", False)
+        stream = kwargs.get("stream", False)
+        progress_callback = kwargs.get("progressCallback", None)
         if get_all:
-            first = 100
+            first = kwargs.get("pageSize", 100)
 
         self.opencti.log(
             "info",
@@ -429,47 +435,24 @@ class StixDomainObject:
             }
         """
         )
-        result = self.opencti.query(
-            query,
-            {
-                "types": types,
-                "filters": filters,
-                "search": search,
-                "first": first,
-                "after": after,
-                "orderBy": order_by,
-                "orderMode": order_mode,
-            },
-        )
-
-        if get_all:
-            final_data = []
-            data = self.opencti.process_multiple(result["data"]["stixDomainObjects"])
-            final_data = final_data + data
-            while result["data"]["stixDomainObjects"]["pageInfo"]["hasNextPage"]:
-                after = result["data"]["stixDomainObjects"]["pageInfo"]["endCursor"]
-                self.opencti.log("info", "Listing Stix-Domain-Entities after " + after)
-                result = self.opencti.query(
-                    query,
-                    {
-                        "types": types,
-                        "filters": filters,
-                        "search": search,
-                        "first": first,
-                        "after": after,
-                        "orderBy": order_by,
-                        "orderMode": order_mode,
-                    },
-                )
-                data = self.opencti.process_multiple(
-                    result["data"]["stixDomainObjects"]
-                )
-                final_data = final_data + data
-            return final_data
-        else:
-            return self.opencti.process_multiple(
-                result["data"]["stixDomainObjects"], with_pagination
+        variables = {
+            "types": types,
+            "filters": filters,
+            "search": search,
+            "first": first,
+            "after": after,
+            "orderBy": order_by,
+            "orderMode": order_mode,
+        }
+        if get_all or stream:
+            entities = self.opencti.paginate(
+                query, variables, "stixDomainObjects", progress_callback
             )
+            return entities if stream else list(entities)
+        result = self.opencti.query(query, variables)
+        return self.opencti.process_multiple(
+            result["data"]["stixDomainObjects"], with_pagination
+        )
 
     """
         Read a Stix-Domain-Object object
@@ -508,7 +491,10 @@ class StixDomainObject:
             )
         elif filters is not None:
             result = self.list(
-                types=types, filters=filters, customAttributes=custom_attributes
+                types=types,
+                filters=filters,
+                customAttributes=custom_attributes,
+                first=1,
             )
             if len(result) > 0:
                 return result[0]
@@ -537,30 +523,80 @@ class StixDomainObject:
         aliases = kwargs.get("aliases", [])
         field_name = kwargs.get("fieldName", "aliases")
         custom_attributes = kwargs.get("customAttributes", None)
-        object_result = None
-        if stix_id is not None:
-            object_result = self.read(id=stix_id, customAttributes=custom_attributes)
-        if object_result is None and name is not None:
-            # TODO: Change this logic and move it to the API.
-            object_result = self.read(
-                types=types,
-                filters=[{"key": "name", "values": [name]}],
-                customAttributes=custom_attributes,
+        resolution_index = self.opencti.resolution_index
+        if resolution_index is not None:
+            entity_id = resolution_index.resolve(
+                types=types, stix_id=stix_id, name=name, aliases=aliases
             )
-            if object_result is None:
+            if entity_id is not None:
                 object_result = self.read(
-                    types=types,
-                    filters=[{"key": field_name, "values": [name]}],
-                    customAttributes=custom_attributes,
+                    id=entity_id, customAttributes=custom_attributes
+                )
+                if object_result is not None:
+                    return object_result
+                # Deleted since indexed
+                resolution_index.remove(entity_id)
+            elif resolution_index.covers(types):
+                # The name and aliases are not used, only other stix ids may match
+                if stix_id is None:
+                    return None
+                name = None
+        # Candidates by priority: the name, then the name or an alias in the aliases
+        candidates = []
+        if name is not None:
+            candidates.append([{"key": "name", "values": [name]}])
+            for value in dict.fromkeys([name] + (aliases or [])):
+                candidates.append([{"key": field_name, "values": [value]}])
+        if stix_id is None and len(candidates) == 0:
+            return None
+        # Resolved in one query, only the ids of the candidates are fetched
+        definitions = []
+        fields = []
+        variables = {}
+        if len(candidates) > 0:
+            definitions.append("$types: [String]")
+            variables["types"] = types
+        if stix_id is not None:
+            definitions.append("$id: String!")
+            fields.append(
+                "byId: stixDomainObject(id: $id) {"
+                + (
+                    custom_attributes
+                    if custom_attributes is not None
+                    else self.properties
                 )
-                if object_result is None:
-                    for alias in aliases:
-                        object_result = self.read(
-                            types=types,
-                            filters=[{"key": field_name, "values": [alias]}],
-                            customAttributes=custom_attributes,
-                        )
-        return object_result
+                + "}"
+            )
+            variables["id"] = stix_id
+        for index, filters in enumerate(candidates):
+            definitions.append(
+                "$filters" + str(index) + ": [StixDomainObjectsFiltering]"
+            )
+            fields.append(
+                "candidate"
+                + str(index)
+                + ": stixDomainObjects(types: $types, filters: $filters"
+                + str(index)
+                + ", first: 1) { edges { node { id } } }"
+            )
+            variables["filters" + str(index)] = filters
+        query = (
+            "query StixDomainObjectResolve("
+            + ", ".join(definitions)
+            + ") {\n"
+            + "\n".join(fields)
+            + "\n}"
+        )
+        result = self.opencti.query(query, variables)["data"]
+        if result.get("byId") is not None:
+            return self.opencti.process_multiple_fields(result["byId"])
+        for index in range(len(candidates)):
+            edges = result["candidate" + str(index)]["edges"]
+            if len(edges) > 0:
+                return self.read(
+                    id=edges[0]["node"]["id"], customAttributes=custom_attributes
+                )
+        return None
 
     """
         Update a Stix-Domain-Object object field
@@ -931,14 +967,7 @@ class StixDomainObject:
         label_id = kwargs.get("label_id", None)
         label_name = kwargs.get("label_name", None)
         if label_name is not None:
-            label = self.opencti.label.read(
-                filters=[{"key": "value", "values": [label_name]}]
-            )
-            if label:
-                label_id = label["id"]
-            else:
-                label = self.opencti.label.create(value=label_name)
-                label_id = label["id"]
+            label_id = self.opencti.stix2.resolve_label(label_name)
         if id is not None and label_id is not None:
             self.opencti.log(
                 "info",
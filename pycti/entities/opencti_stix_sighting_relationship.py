@@ -267,6 +267,10 @@ class StixSightingRelationship:
         :param lastSeenStop: the last_seen date stop filter
         :param first: return the first n rows from the after ID (or the beginning if not set)
         :param after: ID of the first row for pagination
+        :param getAll: return all the rows, fetched page after page
+        :param pageSize: number of rows fetched per page with getAll
+        :param progressCallback: called with the number of fetched rows and the globalCount after every page
+        :param stream: return an iterable fetching the pages as it goes
         :return List of stix_sighting objects
     """
 
@@ -287,8 +291,10 @@ class StixSightingRelationship:
         order_mode = kwargs.get("orderMode", None)
         get_all = kwargs.get("getAll", False)
         with_pagination = kwargs.get("withPagination", False)
+        stream = kwargs.get("stream", False)
+        progress_callback = kwargs.get("progressCallback", None)
         if get_all:
-            first = 100
+            first = kwargs.get("pageSize", 100)
 
         self.opencti.log(
             "info",
@@ -320,68 +326,31 @@ class StixSightingRelationship:
             }
          """
         )
-        result = self.opencti.query(
-            query,
-            {
-                "elementId": element_id,
-                "fromId": from_id,
-                "fromTypes": from_types,
-                "toId": to_id,
-                "toTypes": to_types,
-                "firstSeenStart": first_seen_start,
-                "firstSeenStop": first_seen_stop,
-                "lastSeenStart": last_seen_start,
-                "lastSeenStop": last_seen_stop,
-                "filters": filters,
-                "first": first,
-                "after": after,
-                "orderBy": order_by,
-                "orderMode": order_mode,
-            },
-        )
-        if get_all:
-            final_data = []
-            data = self.opencti.process_multiple(
-                result["data"]["stixSightingRelationships"]
-            )
-            final_data = final_data + data
-            while result["data"]["stixSightingRelationships"]["pageInfo"][
-                "hasNextPage"
-            ]:
-                after = result["data"]["stixSightingRelationships"]["pageInfo"][
-                    "endCursor"
-                ]
-                self.opencti.log(
-                    "info", "Listing StixSightingRelationships after " + after
-                )
-                result = self.opencti.query(
-                    query,
-                    {
-                        "elementId": element_id,
-                        "fromId": from_id,
-                        "fromTypes": from_types,
-                        "toId": to_id,
-                        "toTypes": to_types,
-                        "firstSeenStart": first_seen_start,
-                        "firstSeenStop": first_seen_stop,
-                        "lastSeenStart": last_seen_start,
-                        "lastSeenStop": last_seen_stop,
-                        "filters": filters,
-                        "first": first,
-                        "after": after,
-                        "orderBy": order_by,
-                        "orderMode": order_mode,
-                    },
-                )
-                data = self.opencti.process_multiple(
-                    result["data"]["stixSightingRelationships"]
-                )
-                final_data = final_data + data
-            return final_data
-        else:
-            return self.opencti.process_multiple(
-                result["data"]["stixSightingRelationships"], with_pagination
+        variables = {
+            "elementId": element_id,
+            "fromId": from_id,
+            "fromTypes": from_types,
+            "toId": to_id,
+            "toTypes": to_types,
+            "firstSeenStart": first_seen_start,
+            "firstSeenStop": first_seen_stop,
+            "lastSeenStart": last_seen_start,
+            "lastSeenStop": last_seen_stop,
+            "filters": filters,
+            "first": first,
+            "after": after,
+            "orderBy": order_by,
+            "orderMode": order_mode,
+        }
+        if get_all or stream:
+            entities = self.opencti.paginate(
+                query, variables, "stixSightingRelationships", progress_callback
             )
+            return entities if stream else list(entities)
+        result = self.opencti.query(query, variables)
+        return self.opencti.process_multiple(
+            result["data"]["stixSightingRelationships"], with_pagination
+        )
 
     """
         Read a stix_sighting object
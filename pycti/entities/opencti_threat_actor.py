@@ -128,6 +128,10 @@ class ThreatActor:
         :param str orderBy: (optional) the field to order the response on
         :param bool orderMode: (optional) either "`asc`" or "`desc`"
         :param bool getAll: (optional) switch to return all entries (be careful to use this without any other filters)
+        :param int pageSize: (optional) number of entries fetched per page with `getAll`
+        :param callable progressCallback: (optional) called with the number of fetched
+                            entries and the `globalCount` after every page
+        :param bool stream: (optional) switch to return an iterable fetching the pages as it goes
         :param bool withPagination: (optional) switch to use pagination
         """
 
@@ -139,8 +143,10 @@ class ThreatActor:
         order_mode = kwargs.get("orderMode", None)
         get_all = kwargs.get("getAll", False)
         with_pagination = kwargs.get("withPagination", False)
+        stream = kwargs.get("stream", False)
+        progress_callback = kwargs.get("progressCallback", None)
         if get_all:
-            first = 500
+            first = kwargs.get("pageSize", 500)
 
         self.opencti.log(
             "info", "Listing Threat-Actors with filters " + json.dumps(filters) + "."
@@ -167,17 +173,20 @@ class ThreatActor:
             }
         """
         )
-        result = self.opencti.query(
-            query,
-            {
-                "filters": filters,
-                "search": search,
-                "first": first,
-                "after": after,
-                "orderBy": order_by,
-                "orderMode": order_mode,
-            },
-        )
+        variables = {
+            "filters": filters,
+            "search": search,
+            "first": first,
+            "after": after,
+            "orderBy": order_by,
+            "orderMode": order_mode,
+        }
+        if get_all or stream:
+            entities = self.opencti.paginate(
+                query, variables, "threatActors", progress_callback
+            )
+            return entities if stream else list(entities)
+        result = self.opencti.query(query, variables)
         return self.opencti.process_multiple(
             result["data"]["threatActors"], with_pagination
         )
@@ -219,7 +228,7 @@ class ThreatActor:
             result = self.opencti.query(query, {"id": id})
             return self.opencti.process_multiple_fields(result["data"]["threatActor"])
         elif filters is not None:
-            result = self.list(filters=filters)
+            result = self.list(filters=filters, first=1)
             if len(result) > 0:
                 return result[0]
             else:
@@ -0,0 +1,96 @@
+# coding: utf-8
+
+import json
+
+
+class StdlibJsonCodec:
+    """JSON codec of the python standard library"""
+
+    name = "json"
+
+    def dumpb(self, value) -> bytes:
+        """encode a value to UTF-8 JSON bytes"""
+
+        return json.dumps(value, ensure_ascii=False).encode("utf-8")
+
+    def dumps(self, value) -> str:
+        """encode a value to a JSON string"""
+
+        return json.dumps(value)
+
+    def loads(self, data):
+        """decode JSON bytes or string"""
+
+        return json.loads(data)
+
+
+class OrjsonCodec:
+    """JSON codec using orjson, values orjson rejects are encoded by the standard library"""
+
+    name = "orjson"
+
+    def __init__(self):
+        import orjson
+
+        self.orjson = orjson
+        self.fallback = StdlibJsonCodec()
+
+    def dumpb(self, value) -> bytes:
+        try:
+            return self.orjson.dumps(value)
+        except TypeError:
+            # Integers over 64 bits, non string keys...
+            return self.fallback.dumpb(value)
+
+    def dumps(self, value) -> str:
+        return self.dumpb(value).decode("utf-8")
+
+    def loads(self, data):
+        try:
+            return self.orjson.loads(data)
+        except self.orjson.JSONDecodeError:
+            # NaN, Infinity and big numbers are accepted by the standard library
+            return self.fallback.loads(data)
+
+
+def default_codec():
+    """get the fastest available codec
+
+    :return: an `OrjsonCodec` if orjson is installed, else a `StdlibJsonCodec`
+    """
+
+    try:
+        return OrjsonCodec()
+    except ImportError:
+        return StdlibJsonCodec()
+
+
+codec = default_codec()
+
+
+def set_codec(new_codec):
+    """replace the codec used by the client, the splitter and the connector helper
+
+    :param new_codec: object with `dumpb`, `dumps` and `loads` methods
+    """
+
+    global codec
+    codec = new_codec
+
+
+def dumpb(value) -> bytes:
+    """encode a value to UTF-8 JSON bytes with the current codec"""
+
+    return codec.dumpb(value)
+
+
+def dumps(value) -> str:
+    """encode a value to a JSON string with the current codec"""
+
+    return codec.dumps(value)
+
+
+def loads(data):
+    """decode JSON bytes or string with the current codec"""
+
+    return codec.loads(data)
@@ -0,0 +1,248 @@
+# coding: utf-8
+
+import collections
+import shelve
+import sqlite3
+import threading
+import time
+from collections.abc import MutableMapping
+
+from pycti.utils import opencti_json
+
+
+class SqliteCacheBackend:
+    """sqlite store of a `MappingCache`, values are saved as JSON
+
+    Writes are committed by batches of `commit_size`, and on `flush` and
+    `close`: the last ones are lost if the process is killed.
+
+    :param path: path of the database file
+    :type path: str
+    :param table: name of the table holding the entries, defaults to mapping_cache
+    :type table: str, optional
+    :param commit_size: number of writes committed together, defaults to 100
+    :type commit_size: int, optional
+    """
+
+    def __init__(self, path, table="mapping_cache", commit_size=100):
+        self.table = table
+        self.commit_size = commit_size
+        self.uncommitted = 0
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS "
+            + self.table
+            + " (key TEXT PRIMARY KEY, value TEXT, stored_at REAL)"
+        )
+        self.connection.commit()
+
+    def get(self, key):
+        row = self.connection.execute(
+            "SELECT value, stored_at FROM " + self.table + " WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        return opencti_json.loads(row[0]), row[1]
+
+    def set(self, key, value, stored_at):
+        self.connection.execute(
+            "INSERT OR REPLACE INTO "
+            + self.table
+            + " (key, value, stored_at) VALUES (?, ?, ?)",
+            (key, opencti_json.dumps(value), stored_at),
+        )
+        self.written()
+
+    def delete(self, key):
+        self.connection.execute("DELETE FROM " + self.table + " WHERE key = ?", (key,))
+        self.written()
+
+    def written(self):
+        self.uncommitted += 1
+        if self.uncommitted >= self.commit_size:
+            self.flush()
+
+    def flush(self):
+        """commit the pending writes"""
+
+        self.connection.commit()
+        self.uncommitted = 0
+
+    def clear(self):
+        self.connection.execute("DELETE FROM " + self.table)
+        self.flush()
+
+    def close(self):
+        self.flush()
+        self.connection.close()
+
+
+class ShelveCacheBackend:
+    """shelve store of a `MappingCache`
+
+    :param path: path of the shelf file
+    :type path: str
+    """
+
+    def __init__(self, path):
+        self.shelf = shelve.open(path)
+
+    def get(self, key):
+        return self.shelf.get(key)
+
+    def flush(self):
+        self.shelf.sync()
+
+    def set(self, key, value, stored_at):
+        self.shelf[key] = (value, stored_at)
+
+    def delete(self, key):
+        if key in self.shelf:
+            del self.shelf[key]
+
+    def clear(self):
+        self.shelf.clear()
+
+    def close(self):
+        self.shelf.close()
+
+
+class MappingCache(MutableMapping):
+    """Cache of the OpenCTI ids of imported STIX ids, labels, URLs...
+
+    Entries are kept in memory in least recently used order: with a
+    `max_size`, once it is reached, the oldest used ones are evicted. The
+    cache is not bounded by default, the import relies on it to link the
+    observables of the objects of a bundle. Entries older than
+    `ttl` seconds are expired. With a backend, every entry is also written to
+    disk and missing entries are read back from it, so a restarted worker
+    starts with the cache of the previous run.
+
+    :param max_size: maximum number of entries kept in memory, defaults to None (no limit)
+    :type max_size: int, optional
+    :param ttl: lifetime in seconds of the entries, defaults to None (no expiration)
+    :type ttl: float, optional
+    :param backend: persistent store (`SqliteCacheBackend`, `ShelveCacheBackend`), defaults to None
+    :type backend: object, optional
+    """
+
+    def __init__(self, max_size=None, ttl=None, backend=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.backend = backend
+        self.entries = collections.OrderedDict()
+        self.lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def expired(self, stored_at) -> bool:
+        return self.ttl is not None and time.time() - stored_at >= self.ttl
+
+    def lookup(self, key):
+        """get the entry of a key, from memory or the backend
+
+        :return: the stored value, `None` if the key is not cached
+        :rtype: tuple or None
+        """
+
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None and self.backend is not None:
+                entry = self.backend.get(key)
+                if entry is not None:
+                    self.store(key, entry)
+            if entry is None:
+                return None
+            if self.expired(entry[1]):
+                self.expirations += 1
+                self.discard(key)
+                return None
+            self.entries.move_to_end(key)
+            return entry
+
+    def store(self, key, entry):
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        if self.max_size is not None:
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def discard(self, key):
+        self.entries.pop(key, None)
+        if self.backend is not None:
+            self.backend.delete(key)
+
+    def __getitem__(self, key):
+        entry = self.lookup(key)
+        if entry is None:
+            self.misses += 1
+            raise KeyError(key)
+        self.hits += 1
+        return entry[0]
+
+    def __contains__(self, key):
+        # Hits are counted when the value is read after the membership test
+        if self.lookup(key) is None:
+            self.misses += 1
+            return False
+        return True
+
+    def __setitem__(self, key, value):
+        with self.lock:
+            entry = (value, time.time())
+            self.store(key, entry)
+            if self.backend is not None:
+                self.backend.set(key, value, entry[1])
+
+    def __delitem__(self, key):
+        with self.lock:
+            if self.lookup(key) is None:
+                raise KeyError(key)
+            self.discard(key)
+
+    def __iter__(self):
+        with self.lock:
+            return iter(list(self.entries))
+
+    def __len__(self):
+        return len(self.entries)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            if self.backend is not None:
+                self.backend.clear()
+
+    def flush(self):
+        """write the pending entries of the backend of the cache"""
+
+        with self.lock:
+            if self.backend is not None:
+                self.backend.flush()
+
+    def close(self):
+        """close the backend of the cache"""
+
+        if self.backend is not None:
+            self.backend.close()
+
+    def metrics(self) -> dict:
+        """get the usage counters of the cache
+
+        :return: the size, hits, misses, evictions and expirations of the cache
+        :rtype: dict
+        """
+
+        return {
+            "size": len(self.entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
@@ -0,0 +1,284 @@
+# coding: utf-8
+
+import threading
+
+# STIX types of the indexed entities, with their OpenCTI entity type
+ENTITY_TYPES = {
+    "attack-pattern": "Attack-Pattern",
+    "campaign": "Campaign",
+    "course-of-action": "Course-Of-Action",
+    "infrastructure": "Infrastructure",
+    "intrusion-set": "Intrusion-Set",
+    "malware": "Malware",
+    "threat-actor": "Threat-Actor",
+    "tool": "Tool",
+    "vulnerability": "Vulnerability",
+    "x-opencti-incident": "X-OpenCTI-Incident",
+}
+IDENTITY_TYPES = {
+    "individual": "Individual",
+    "organization": "Organization",
+    "class": "Sector",
+}
+LOCATION_TYPES = ["City", "Country", "Region", "Position"]
+# Entity types, and their parent types, with a name and aliases
+INDEXED_TYPES = set(
+    list(ENTITY_TYPES.values())
+    + list(IDENTITY_TYPES.values())
+    + LOCATION_TYPES
+    + ["Identity", "Location"]
+)
+
+
+class ResolutionIndex:
+    """In-process index of the ids, names and aliases of the domain objects
+
+    The index is built once with `build` and kept current with the entities
+    imported by this process (`add_imported`) and the events of the stream
+    (`process_stream_event`). `get_by_stix_id_or_name` resolves entities
+    from it, and falls back to the API for the names and aliases missing
+    from the index.
+
+    With `authoritative`, names and aliases missing from the index are
+    known not to exist for the types it was built for, and are not looked
+    up. Only set it when the index receives every event of the stream of
+    the platform: entities created by other processes are otherwise not
+    found until the index is built again.
+
+    :param opencti: instance of :py:class:`~pycti.api.opencti_api_client.OpenCTIApiClient`
+    :param types: entity types to index, defaults to None (every type with a name and aliases)
+    :type types: list, optional
+    :param authoritative: whether the entities missing from the index do not exist, defaults to False
+    :type authoritative: bool, optional
+    """
+
+    projection = """
+        id
+        standard_id
+        entity_type
+        parent_types
+        ... on AttackPattern { name aliases }
+        ... on Campaign { name aliases }
+        ... on CourseOfAction { name x_opencti_aliases }
+        ... on Identity { name x_opencti_aliases }
+        ... on City { name x_opencti_aliases }
+        ... on Country { name x_opencti_aliases }
+        ... on Region { name x_opencti_aliases }
+        ... on Position { name x_opencti_aliases }
+        ... on Infrastructure { name aliases }
+        ... on IntrusionSet { name aliases }
+        ... on Malware { name aliases }
+        ... on ThreatActor { name aliases }
+        ... on Tool { name aliases }
+        ... on Vulnerability { name }
+        ... on XOpenCTIIncident { name aliases }
+    """
+
+    def __init__(self, opencti, types=None, authoritative=False):
+        self.opencti = opencti
+        self.types = types
+        self.authoritative = authoritative
+        self.lock = threading.RLock()
+        self.complete = False
+        # Entities by id, ids by standard id, name and alias
+        self.entities = {}
+        self.by_stix_id = {}
+        self.by_name = {}
+        self.by_alias = {}
+
+    def build(self, page_size=500):
+        """index the entities of the API
+
+        :param page_size: number of entities of every page, defaults to 500
+        :type page_size: int, optional
+        :return: the index
+        :rtype: ResolutionIndex
+        """
+
+        entities = self.opencti.stix_domain_object.list(
+            types=self.types if self.types is not None else sorted(INDEXED_TYPES),
+            customAttributes=self.projection,
+            first=page_size,
+            stream=True,
+        )
+        for entity in entities:
+            self.add(entity)
+        self.complete = True
+        return self
+
+    def add(self, entity):
+        """index an entity, or update its names
+
+        :param entity: the entity with its id, standard_id, entity_type, name and aliases
+        :type entity: dict
+        """
+
+        if entity.get("entity_type") not in INDEXED_TYPES or "name" not in entity:
+            return
+        types = [entity["entity_type"]] + (entity.get("parent_types") or [])
+        if self.types is not None and not any(t in self.types for t in types):
+            return
+        record = {
+            "id": entity["id"],
+            "standard_id": entity["standard_id"],
+            "types": types,
+            "name": entity["name"],
+            "aliases": list(
+                entity.get("aliases") or entity.get("x_opencti_aliases") or []
+            ),
+        }
+        with self.lock:
+            self.remove(entity["id"])
+            self.entities[record["id"]] = record
+            self.by_stix_id[record["standard_id"]] = record["id"]
+            self.by_name.setdefault(record["name"], []).append(record["id"])
+            for alias in record["aliases"]:
+                self.by_alias.setdefault(alias, []).append(record["id"])
+
+    def add_imported(self, stix_object, entity):
+        """index an entity imported from a STIX object
+
+        The results of the creations only have the ids and types of the
+        entities, their name and aliases are taken from the STIX object. The
+        name of an entity already indexed under another name (the creation
+        being an upsert) is kept, the imported one being added to its aliases.
+
+        :param stix_object: the imported STIX object
+        :type stix_object: dict
+        :param entity: the created entity with its id, standard_id, entity_type and parent_types
+        :type entity: dict
+        """
+
+        if "name" not in stix_object:
+            return
+        aliases = list(
+            stix_object.get("aliases") or stix_object.get("x_opencti_aliases") or []
+        )
+        entity = dict(entity, name=stix_object["name"], aliases=aliases)
+        with self.lock:
+            record = self.entities.get(entity["id"])
+            if record is not None and record["name"] != entity["name"]:
+                entity["aliases"] = list(
+                    dict.fromkeys(record["aliases"] + [entity["name"]] + aliases)
+                )
+                entity["name"] = record["name"]
+            self.add(entity)
+
+    def remove(self, entity_id):
+        """remove an entity from the index
+
+        :param entity_id: the id of the entity
+        :type entity_id: str
+        """
+
+        with self.lock:
+            record = self.entities.pop(entity_id, None)
+            if record is None:
+                return
+            self.by_stix_id.pop(record["standard_id"], None)
+            for values, key in [(self.by_name, record["name"])] + [
+                (self.by_alias, alias) for alias in record["aliases"]
+            ]:
+                ids = values.get(key, [])
+                if entity_id in ids:
+                    ids.remove(entity_id)
+                if len(ids) == 0:
+                    values.pop(key, None)
+
+    def covers(self, types=None) -> bool:
+        """whether the entities of some types are all indexed
+
+        :param types: the entity types, defaults to None (every domain object)
+        :type types: list, optional
+        :return: `True` if an entity of these types missing from the index does not exist
+        :rtype: bool
+        """
+
+        if not self.authoritative or not self.complete or types is None:
+            return False
+        return all(
+            t in INDEXED_TYPES and (self.types is None or t in self.types)
+            for t in types
+        )
+
+    def resolve(self, types=None, stix_id=None, name=None, aliases=None):
+        """get the id of an entity by standard id, name or aliases
+
+        The name is looked up in the names then in the aliases, then the
+        aliases in the aliases, as `get_by_stix_id_or_name` does.
+
+        :param types: entity types of the entity, defaults to None
+        :type types: list, optional
+        :param stix_id: standard id or id of the entity, defaults to None
+        :type stix_id: str, optional
+        :param name: name of the entity, defaults to None
+        :type name: str, optional
+        :param aliases: aliases of the entity, defaults to None
+        :type aliases: list, optional
+        :return: the id of the entity, `None` if it is not indexed
+        :rtype: str or None
+        """
+
+        with self.lock:
+            if stix_id is not None:
+                if stix_id in self.entities:
+                    return stix_id
+                if stix_id in self.by_stix_id:
+                    return self.by_stix_id[stix_id]
+            if name is None:
+                return None
+            candidates = [self.by_name.get(name, [])]
+            for value in dict.fromkeys([name] + (aliases or [])):
+                candidates.append(self.by_alias.get(value, []))
+            for ids in candidates:
+                for entity_id in ids:
+                    record = self.entities[entity_id]
+                    if types is None or any(t in record["types"] for t in types):
+                        return entity_id
+            return None
+
+    def process_stream_event(self, event, data):
+        """update the index with an event of the stream
+
+        :param event: type of the event
+        :type event: str
+        :param data: decoded data of the event
+        :type data: dict
+        """
+
+        stix_object = data.get("data") if isinstance(data, dict) else None
+        if not isinstance(stix_object, dict) or "x_opencti_id" not in stix_object:
+            return
+        if event == "delete":
+            self.remove(stix_object["x_opencti_id"])
+        elif event in ["create", "update", "merge"]:
+            entity = self.from_stix(stix_object)
+            if entity is not None:
+                self.add(entity)
+
+    @staticmethod
+    def from_stix(stix_object):
+        stix_type = stix_object.get("type")
+        parent_types = ["Stix-Domain-Object"]
+        if stix_type in ENTITY_TYPES:
+            entity_type = ENTITY_TYPES[stix_type]
+        elif stix_type == "identity":
+            entity_type = IDENTITY_TYPES.get(stix_object.get("identity_class"))
+            parent_types.append("Identity")
+        elif stix_type == "location":
+            entity_type = stix_object.get("x_opencti_location_type")
+            parent_types.append("Location")
+        else:
+            return None
+        if entity_type is None or "name" not in stix_object:
+            return None
+        return {
+            "id": stix_object["x_opencti_id"],
+            "standard_id": stix_object["id"],
+            "entity_type": entity_type,
+            "parent_types": parent_types,
+            "name": stix_object["name"],
+            "aliases": stix_object.get("aliases")
+            or stix_object.get("x_opencti_aliases")
+            or [],
+        }
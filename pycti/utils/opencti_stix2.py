@@ -1,16 +1,23 @@
 # coding: utf-8
 
 import os
-import json
 import uuid
 import base64
+import collections
+import concurrent.futures
+import contextvars
 import datetime
+import threading
 from typing import List
 
 import datefinder
 import dateutil.parser
 import pytz
 
+from pycti.api.opencti_api_batch import BatchCall
+from pycti.api.opencti_api_context import request_context, submit_in_context
+from pycti.utils import opencti_json
+from pycti.utils.opencti_mapping_cache import MappingCache
 from pycti.utils.opencti_stix2_splitter import OpenCTIStix2Splitter
 from pycti.utils.opencti_stix2_update import OpenCTIStix2Update
 from pycti.utils.constants import (
@@ -24,21 +31,56 @@ utc = pytz.UTC
 
 # Spec version
 SPEC_VERSION = "2.1"
+# References not found in OpenCTI during the running `import_bundle` call
+_unresolved_refs = contextvars.ContextVar("opencti_unresolved_refs", default=None)
 
 
 class OpenCTIStix2:
     """Python API for Stix2 in OpenCTI
 
     :param opencti: OpenCTI instance
+    :param mapping_cache: cache of the OpenCTI ids of the imported objects, defaults to a `MappingCache`
     """
 
-    def __init__(self, opencti):
+    def __init__(self, opencti, mapping_cache=None):
         self.opencti = opencti
         self.stix2_update = OpenCTIStix2Update(opencti)
-        self.mapping_cache = {}
+        self.mapping_cache = (
+            mapping_cache if mapping_cache is not None else MappingCache()
+        )
+        # Label lookups, counted by the threads of the parallel import
+        self.label_cache_hits = 0
+        self.label_cache_misses = 0
+        self.metrics_lock = threading.Lock()
+        # Smaller bundles are not worth the round trip of `prewarm`
+        self.prewarm_min_objects = 10
 
     ######### UTILS
     # region utils
+    def cache_metrics(self) -> dict:
+        """get the usage counters of the mapping cache and of the label lookups
+
+        :return: the metrics of the mapping cache, with the label hits and misses
+        :rtype: dict
+        """
+
+        metrics = (
+            self.mapping_cache.metrics()
+            if isinstance(self.mapping_cache, MappingCache)
+            else {"size": len(self.mapping_cache)}
+        )
+        with self.metrics_lock:
+            metrics["label_hits"] = self.label_cache_hits
+            metrics["label_misses"] = self.label_cache_misses
+        return metrics
+
+    def count_label_lookup(self, hit):
+        with self.metrics_lock:
+            if hit:
+                self.label_cache_hits += 1
+            else:
+                self.label_cache_misses += 1
+
     def unknown_type(self, stix_object):
         self.opencti.log(
             "error",
@@ -80,11 +122,11 @@ class OpenCTIStix2:
                 .replace("+00:00", "Z")
             )
 
-    def filter_objects(self, uuids: list, objects: list) -> list:
+    def filter_objects(self, uuids: set, objects: list) -> list:
         """filters objects based on UUIDs
 
-        :param uuids: list of UUIDs
-        :type uuids: list
+        :param uuids: set of UUIDs
+        :type uuids: set
         :param objects: list of objects to filter
         :type objects: list
         :return: list of filtered objects
@@ -118,6 +160,26 @@ class OpenCTIStix2:
             return stix_object["aliases"]
         return None
 
+    def pick_labels(self, stix_object) -> list:
+        """check stix2 object for the labels variants and return a list
+
+        :param stix_object: valid stix2 object
+        :type stix_object:
+        :return: list of (value, color) tuples
+        :rtype: list
+        """
+
+        if "labels" in stix_object:
+            return [(label, None) for label in stix_object["labels"]]
+        elif "x_opencti_labels" in stix_object:
+            return [(label, None) for label in stix_object["x_opencti_labels"]]
+        elif "x_opencti_tags" in stix_object:
+            return [
+                (tag["value"], tag["color"] if "color" in tag else None)
+                for tag in stix_object["x_opencti_tags"]
+            ]
+        return []
+
     def check_max_marking_definition(
         self, max_marking_definition_entity: str, entity_marking_definitions: list
     ) -> bool:
@@ -155,7 +217,9 @@ class OpenCTIStix2:
                 return True
         return False
 
-    def import_bundle_from_file(self, file_path: str, update=False, types=None) -> List:
+    def import_bundle_from_file(
+        self, file_path: str, update=False, types=None, max_workers=1
+    ) -> List:
         """import a stix2 bundle from a file
 
         :param file_path: valid path to the file
@@ -164,18 +228,27 @@ class OpenCTIStix2:
         :type update: bool, optional
         :param types: list of stix2 types, defaults to None
         :type types: list, optional
+        :param max_workers: number of objects imported at the same time, defaults to 1
+        :type max_workers: int, optional
         :return: list of imported stix2 objects
         :rtype: List
         """
         if not os.path.isfile(file_path):
             self.opencti.log("error", "The bundle file does not exists")
             return None
-        with open(os.path.join(file_path)) as file:
-            data = json.load(file)
-        return self.import_bundle(data, update, types)
+        # Stream the file so only one level of objects at a time is in memory
+        imported_elements = []
+        stix2_splitter = OpenCTIStix2Splitter()
+        for bundle in stix2_splitter.split_file(file_path, False, max_objects=1000):
+            imported_elements.extend(
+                self.import_bundle(bundle, update, types, max_workers)
+            )
+        if len(imported_elements) == 0:
+            raise ValueError("JSON data objects is empty")
+        return imported_elements
 
     def import_bundle_from_json(
-        self, json_data, update=False, types=None, retry_number=None
+        self, json_data, update=False, types=None, retry_number=None, max_workers=1
     ) -> List:
         """import a stix2 bundle from JSON data
 
@@ -185,16 +258,14 @@ class OpenCTIStix2:
         :type update: bool, optional
         :param types: list of stix2 types, defaults to None
         :type types: list, optional
+        :param max_workers: number of objects imported at the same time, defaults to 1
+        :type max_workers: int, optional
         :return: list of imported stix2 objects
         :rtype: List
         """
-        self.opencti.set_retry_number(retry_number)
-        data = json.loads(json_data)
-        return self.import_bundle(
-            data,
-            update,
-            types,
-        )
+        data = opencti_json.loads(json_data)
+        with request_context(retry_number=retry_number):
+            return self.import_bundle(data, update, types, max_workers)
 
     def resolve_author(self, title):
         if "fireeye" in title.lower() or "mandiant" in title.lower():
@@ -249,6 +320,226 @@ class OpenCTIStix2:
             self.mapping_cache[name] = author
             return author
 
+    def resolve_label(self, value, color=None):
+        """get the id of a label, read through the mapping cache
+
+        :param value: value of the label
+        :type value: str
+        :param color: color of the label if it has to be created
+        :type color: str, optional
+        :return: the id of the label
+        :rtype: str
+        """
+
+        if "label_" + value in self.mapping_cache:
+            self.count_label_lookup(True)
+            return self.mapping_cache["label_" + value]
+        self.count_label_lookup(False)
+        label = self.opencti.label.read(filters=[{"key": "value", "values": [value]}])
+        if label is None:
+            label = self.opencti.label.create(value=value, color=color)
+        if label is None:
+            return None
+        self.mapping_cache["label_" + value] = label["id"]
+        return label["id"]
+
+    def prewarm(self, stix_objects, types=None) -> dict:
+        """resolve the labels, kill chain phases and external references of objects in bulk
+
+        The values missing from the mapping cache are listed with a few batched
+        queries and the ones known by OpenCTI are put in the cache, so
+        importing the objects does not need a round trip per value. The
+        unknown ones are created by the import of the objects using them.
+        The TLP:WHITE marking of the reports made from external references is
+        read along if `types` asks for those reports.
+
+        :param stix_objects: valid stix2 objects
+        :type stix_objects: list
+        :param types: list of stix2 types the objects will be imported with, defaults to None
+        :type types: list, optional
+        :return: number of values looked up by kind
+        :rtype: dict
+        """
+
+        labels = {}
+        kill_chain_phases = {}
+        external_references = {}
+        reported = False
+        for stix_object in stix_objects:
+            for label, color in self.pick_labels(stix_object):
+                if "label_" + label not in self.mapping_cache:
+                    labels.setdefault(label, color)
+            for kill_chain_phase in stix_object.get("kill_chain_phases", []):
+                key = (
+                    kill_chain_phase["kill_chain_name"] + kill_chain_phase["phase_name"]
+                )
+                if key not in self.mapping_cache:
+                    kill_chain_phases.setdefault(key, kill_chain_phase)
+            for external_reference in stix_object.get("external_references", []):
+                if "url" not in external_reference:
+                    continue
+                if "source_name" not in external_reference:
+                    continue
+                reported = True
+                if external_reference["url"] not in self.mapping_cache:
+                    external_references.setdefault(
+                        external_reference["url"], external_reference
+                    )
+        reported = (
+            reported
+            and types is not None
+            and "external-reference-as-report" in types
+            and "marking_tlpwhite" not in self.mapping_cache
+        )
+
+        # List the values already known by OpenCTI
+        list_calls = []
+        tlpwhite_call = None
+        with self.opencti.batch() as batch:
+            for entity, key, values in [
+                (self.opencti.label, "value", labels.keys()),
+                (
+                    self.opencti.kill_chain_phase,
+                    "phase_name",
+                    [value["phase_name"] for value in kill_chain_phases.values()],
+                ),
+                (self.opencti.external_reference, "url", external_references.keys()),
+            ]:
+                values = sorted(set(values))
+                for index in range(0, len(values), 100):
+                    filters = [{"key": key, "values": values[index : index + 100]}]
+                    list_calls.append(
+                        (key, batch.call(entity.list, filters=filters, getAll=True))
+                    )
+            if reported:
+                tlpwhite_call = batch.call(
+                    self.opencti.marking_definition.read,
+                    filters=[
+                        {"key": "definition_type", "values": ["TLP"]},
+                        {"key": "definition", "values": ["TLP:WHITE"]},
+                    ],
+                )
+        for key, list_call in list_calls:
+            for entity in list_call.result():
+                if key == "value" and entity["value"] in labels:
+                    self.mapping_cache["label_" + entity["value"]] = entity["id"]
+                elif key == "phase_name":
+                    cache_key = entity["kill_chain_name"] + entity["phase_name"]
+                    if cache_key in kill_chain_phases:
+                        self.mapping_cache[cache_key] = {
+                            "id": entity["id"],
+                            "type": entity["entity_type"],
+                        }
+                elif key == "url" and entity["url"] in external_references:
+                    self.mapping_cache[entity["url"]] = {"id": entity["id"]}
+        if tlpwhite_call is not None and tlpwhite_call.result() is not None:
+            self.mapping_cache["marking_tlpwhite"] = {
+                "id": tlpwhite_call.result()["id"]
+            }
+
+        return {
+            "labels": len(labels),
+            "kill_chain_phases": len(kill_chain_phases),
+            "external_references": len(external_references),
+            "marking_definitions": 1 if tlpwhite_call is not None else 0,
+        }
+
+    def resolve_refs(self, stix_objects) -> int:
+        """resolve in bulk the references of the sightings missing from the objects
+
+        The references not defined by the objects nor in the mapping cache
+        are read by id, the reads being merged by `QueryBatch` in a few
+        requests: an `id in [...]` list filter would miss the objects
+        referenced by one of their other stix ids, which `read` resolves.
+        The ones found are put in the mapping cache, the other ones in
+        `unresolved_refs` so they are not looked up again by every sighting
+        of the bundle.
+
+        :param stix_objects: valid stix2 objects
+        :type stix_objects: list
+        :return: number of references resolved
+        :rtype: int
+        """
+
+        defined = set(stix_object["id"] for stix_object in stix_objects)
+        refs = set()
+        for stix_object in stix_objects:
+            if stix_object["type"] != "sighting":
+                continue
+            refs.add(
+                stix_object.get(
+                    "x_opencti_sighting_of_ref", stix_object.get("sighting_of_ref")
+                )
+            )
+            refs.update(stix_object.get("where_sighted_refs", []))
+            refs.update(stix_object.get("observed_data_refs", []))
+        refs = [
+            ref
+            for ref in sorted(ref for ref in refs if ref is not None)
+            if ref not in defined
+            and ref not in self.mapping_cache
+            and ref not in self.unresolved_refs
+        ]
+        read_calls = []
+        with self.opencti.batch() as batch:
+            for ref in refs:
+                read_calls.append(
+                    (
+                        ref,
+                        batch.call(
+                            self.opencti.opencti_stix_object_or_stix_relationship.read,
+                            id=ref,
+                            customAttributes="id entity_type",
+                        ),
+                    )
+                )
+        resolved = 0
+        for ref, read_call in read_calls:
+            result = read_call.result()
+            if result is None:
+                self.unresolved_refs.add(ref)
+            else:
+                self.mapping_cache[ref] = {
+                    "id": result["id"],
+                    "type": result["entity_type"],
+                }
+                resolved += 1
+        return resolved
+
+    @property
+    def unresolved_refs(self) -> set:
+        """references not found in OpenCTI during the running `import_bundle` call
+
+        They are not looked up again until the end of the call, another
+        import may create them meanwhile. Outside of `import_bundle`, every
+        lookup is sent.
+        """
+
+        refs = _unresolved_refs.get()
+        return refs if refs is not None else set()
+
+    def resolve_ref(self, ref):
+        """get the OpenCTI id of a referenced object
+
+        :param ref: STIX id or id of the object
+        :type ref: str
+        :return: the id of the object, `None` if it does not exist
+        :rtype: str or None
+        """
+
+        if ref in self.mapping_cache:
+            return self.mapping_cache[ref]["id"]
+        if ref in self.unresolved_refs:
+            return None
+        result = self.opencti.opencti_stix_object_or_stix_relationship.read(
+            id=ref, customAttributes="id entity_type"
+        )
+        if result is None:
+            self.unresolved_refs.add(ref)
+            return None
+        self.mapping_cache[ref] = {"id": result["id"], "type": result["entity_type"]}
+        return result["id"]
+
     def extract_embedded_relationships(self, stix_object, types=None) -> dict:
         """extracts embedded relationship objects from a stix2 entity
 
@@ -272,84 +563,67 @@ class OpenCTIStix2:
             if "object_marking_refs" in stix_object
             else []
         )
-        # Object Tags
-        object_label_ids = []
-        if "labels" in stix_object:
-            for label in stix_object["labels"]:
-                if "label_" + label in self.mapping_cache:
-                    label_id = self.mapping_cache["label_" + label]
-                else:
-                    label_id = self.opencti.label.create(value=label)["id"]
-                if label_id is not None:
-                    object_label_ids.append(label_id)
-        elif "x_opencti_labels" in stix_object:
-            for label in stix_object["x_opencti_labels"]:
-                if "label_" + label in self.mapping_cache:
-                    label_id = self.mapping_cache["label_" + label]
-                else:
-                    label_id = self.opencti.label.create(value=label)["id"]
-                if label_id is not None:
-                    object_label_ids.append(label_id)
-        elif "x_opencti_tags" in stix_object:
-            for tag in stix_object["x_opencti_tags"]:
-                label = tag["value"]
-                color = tag["color"] if "color" in tag else None
-                if "label_" + label in self.mapping_cache:
-                    label_id = self.mapping_cache["label_" + label]
-                else:
-                    label_id = self.opencti.label.create(value=label, color=color)["id"]
-                if label_id is not None:
-                    object_label_ids.append(label_id)
+        # Labels, kill chain phases and external references are created in one batch
+        batch = self.opencti.batch()
+        # Object Tags, read through the cache and written back once created
+        label_calls = {}
+        for label, color in self.pick_labels(stix_object):
+            if label in label_calls:
+                continue
+            if "label_" + label in self.mapping_cache:
+                self.count_label_lookup(True)
+                label_calls[label] = self.mapping_cache["label_" + label]
+            else:
+                self.count_label_lookup(False)
+                label_calls[label] = batch.call(
+                    self.opencti.label.create, value=label, color=color
+                )
         # Kill Chain Phases
-        kill_chain_phases_ids = []
+        kill_chain_phases_calls = []
         if "kill_chain_phases" in stix_object:
             for kill_chain_phase in stix_object["kill_chain_phases"]:
                 if (
                     kill_chain_phase["kill_chain_name"] + kill_chain_phase["phase_name"]
                     in self.mapping_cache
                 ):
-                    kill_chain_phase = self.mapping_cache[
-                        kill_chain_phase["kill_chain_name"]
-                        + kill_chain_phase["phase_name"]
-                    ]
+                    kill_chain_phases_calls.append(
+                        self.mapping_cache[
+                            kill_chain_phase["kill_chain_name"]
+                            + kill_chain_phase["phase_name"]
+                        ]
+                    )
                 else:
-                    kill_chain_phase = self.opencti.kill_chain_phase.create(
-                        kill_chain_name=kill_chain_phase["kill_chain_name"],
-                        phase_name=kill_chain_phase["phase_name"],
-                        phase_order=kill_chain_phase["x_opencti_order"]
-                        if "x_opencti_order" in kill_chain_phase
-                        else 0,
-                        stix_id=kill_chain_phase["id"]
-                        if "id" in kill_chain_phase
-                        else None,
+                    kill_chain_phases_calls.append(
+                        batch.call(
+                            self.opencti.kill_chain_phase.create,
+                            kill_chain_name=kill_chain_phase["kill_chain_name"],
+                            phase_name=kill_chain_phase["phase_name"],
+                            phase_order=kill_chain_phase["x_opencti_order"]
+                            if "x_opencti_order" in kill_chain_phase
+                            else 0,
+                            stix_id=kill_chain_phase["id"]
+                            if "id" in kill_chain_phase
+                            else None,
+                        )
                     )
-                    self.mapping_cache[
-                        kill_chain_phase["kill_chain_name"]
-                        + kill_chain_phase["phase_name"]
-                    ] = {
-                        "id": kill_chain_phase["id"],
-                        "type": kill_chain_phase["entity_type"],
-                    }
-                kill_chain_phases_ids.append(kill_chain_phase["id"])
         # Object refs
         object_refs_ids = (
             stix_object["object_refs"] if "object_refs" in stix_object else []
         )
         # External References
-        reports = {}
-        external_references_ids = []
+        external_references = []
         if "external_references" in stix_object:
             for external_reference in stix_object["external_references"]:
                 if "url" in external_reference and "source_name" in external_reference:
                     url = external_reference["url"]
-                    source_name = external_reference["source_name"]
                 else:
                     continue
                 if url in self.mapping_cache:
-                    external_reference_id = self.mapping_cache[url]["id"]
+                    external_reference_call = self.mapping_cache[url]
                 else:
-                    external_reference_id = self.opencti.external_reference.create(
-                        source_name=source_name,
+                    external_reference_call = batch.call(
+                        self.opencti.external_reference.create,
+                        source_name=external_reference["source_name"],
                         url=url,
                         external_id=external_reference["external_id"]
                         if "external_id" in external_reference
@@ -357,101 +631,135 @@ class OpenCTIStix2:
                         description=external_reference["description"]
                         if "description" in external_reference
                         else None,
-                    )["id"]
-                self.mapping_cache[url] = {"id": external_reference_id}
-                external_references_ids.append(external_reference_id)
-                if (
-                    stix_object["type"]
-                    in [
-                        "threat-actor",
-                        "intrusion-set",
-                        "campaign",
-                        "x-opencti-incident",
-                        "malware",
-                        "relationship",
-                    ]
-                    and (types is not None and "external-reference-as-report" in types)
-                ):
-                    # Add a corresponding report
-                    # Extract date
-                    try:
-                        if "description" in external_reference:
-                            matches = datefinder.find_dates(
-                                external_reference["description"],
-                                base_date=datetime.datetime.fromtimestamp(0),
-                            )
-                        else:
-                            matches = datefinder.find_dates(
-                                source_name,
-                                base_date=datetime.datetime.fromtimestamp(0),
-                            )
-                    except:
-                        matches = None
-                    published = None
-                    yesterday = datetime.datetime.now() - datetime.timedelta(days=1)
-                    default_date = datetime.datetime.fromtimestamp(1)
-                    if matches is not None:
-                        try:
-                            for match in matches:
-                                if (
-                                    match.timestamp() < yesterday.timestamp()
-                                    and len(str(match.year)) == 4
-                                ):
-                                    published = match.strftime("%Y-%m-%dT%H:%M:%SZ")
-                                    break
-                        except:
-                            pass
-                    if published is None:
-                        published = default_date.strftime("%Y-%m-%dT%H:%M:%SZ")
-
-                    if "mitre" in source_name and "name" in stix_object:
-                        title = "[MITRE ATT&CK] " + stix_object["name"]
-                        if "modified" in stix_object:
-                            published = stix_object["modified"]
-                    elif "amitt" in source_name and "name" in stix_object:
-                        title = "[AM!TT] " + stix_object["name"]
-                        if "modified" in stix_object:
-                            published = stix_object["modified"]
-                    else:
-                        title = source_name
+                    )
+                external_references.append(
+                    (external_reference, external_reference_call)
+                )
+        batch.flush()
 
-                    if "external_id" in external_reference:
-                        title = (
-                            title + " (" + str(external_reference["external_id"]) + ")"
+        object_label_ids = []
+        for label, label_call in label_calls.items():
+            if isinstance(label_call, BatchCall):
+                label_result = label_call.result()
+                label_id = label_result["id"] if label_result is not None else None
+                if label_id is not None:
+                    self.mapping_cache["label_" + label] = label_id
+            else:
+                label_id = label_call
+            if label_id is not None:
+                object_label_ids.append(label_id)
+        kill_chain_phases_ids = []
+        for kill_chain_phase in kill_chain_phases_calls:
+            if isinstance(kill_chain_phase, BatchCall):
+                kill_chain_phase = kill_chain_phase.result()
+                self.mapping_cache[
+                    kill_chain_phase["kill_chain_name"] + kill_chain_phase["phase_name"]
+                ] = {
+                    "id": kill_chain_phase["id"],
+                    "type": kill_chain_phase["entity_type"],
+                }
+            kill_chain_phases_ids.append(kill_chain_phase["id"])
+        reports = {}
+        reports_calls = {}
+        external_references_ids = []
+        for external_reference, external_reference_call in external_references:
+            url = external_reference["url"]
+            source_name = external_reference["source_name"]
+            if isinstance(external_reference_call, BatchCall):
+                external_reference_id = external_reference_call.result()["id"]
+            else:
+                external_reference_id = external_reference_call["id"]
+            self.mapping_cache[url] = {"id": external_reference_id}
+            external_references_ids.append(external_reference_id)
+            if (
+                stix_object["type"]
+                in [
+                    "threat-actor",
+                    "intrusion-set",
+                    "campaign",
+                    "x-opencti-incident",
+                    "malware",
+                    "relationship",
+                ]
+                and (types is not None and "external-reference-as-report" in types)
+            ):
+                # Add a corresponding report
+                # Extract date
+                try:
+                    if "description" in external_reference:
+                        matches = datefinder.find_dates(
+                            external_reference["description"],
+                            base_date=datetime.datetime.fromtimestamp(0),
                         )
-
-                    if "marking_tlpwhite" in self.mapping_cache:
-                        object_marking_ref_result = self.mapping_cache[
-                            "marking_tlpwhite"
-                        ]
                     else:
-                        object_marking_ref_result = (
-                            self.opencti.marking_definition.read(
-                                filters=[
-                                    {"key": "definition_type", "values": ["TLP"]},
-                                    {"key": "definition", "values": ["TLP:WHITE"]},
-                                ]
-                            )
+                        matches = datefinder.find_dates(
+                            source_name,
+                            base_date=datetime.datetime.fromtimestamp(0),
                         )
-                        self.mapping_cache["marking_tlpwhite"] = {
-                            "id": object_marking_ref_result["id"]
-                        }
+                except:
+                    matches = None
+                published = None
+                yesterday = datetime.datetime.now() - datetime.timedelta(days=1)
+                default_date = datetime.datetime.fromtimestamp(1)
+                if matches is not None:
+                    try:
+                        for match in matches:
+                            if (
+                                match.timestamp() < yesterday.timestamp()
+                                and len(str(match.year)) == 4
+                            ):
+                                published = match.strftime("%Y-%m-%dT%H:%M:%SZ")
+                                break
+                    except:
+                        pass
+                if published is None:
+                    published = default_date.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+                if "mitre" in source_name and "name" in stix_object:
+                    title = "[MITRE ATT&CK] " + stix_object["name"]
+                    if "modified" in stix_object:
+                        published = stix_object["modified"]
+                elif "amitt" in source_name and "name" in stix_object:
+                    title = "[AM!TT] " + stix_object["name"]
+                    if "modified" in stix_object:
+                        published = stix_object["modified"]
+                else:
+                    title = source_name
 
-                    author = self.resolve_author(title)
-                    report = self.opencti.report.create(
-                        name=title,
-                        createdBy=author["id"] if author is not None else None,
-                        objectMarking=[object_marking_ref_result["id"]],
-                        externalReferences=[external_reference_id],
-                        description=external_reference["description"]
-                        if "description" in external_reference
-                        else "",
-                        report_types="threat-report",
-                        published=published,
-                        x_opencti_report_status=2,
-                        update=True,
+                if "external_id" in external_reference:
+                    title = title + " (" + str(external_reference["external_id"]) + ")"
+
+                if "marking_tlpwhite" in self.mapping_cache:
+                    object_marking_ref_result = self.mapping_cache["marking_tlpwhite"]
+                else:
+                    object_marking_ref_result = self.opencti.marking_definition.read(
+                        filters=[
+                            {"key": "definition_type", "values": ["TLP"]},
+                            {"key": "definition", "values": ["TLP:WHITE"]},
+                        ]
                     )
-                    reports[external_reference_id] = report
+                    self.mapping_cache["marking_tlpwhite"] = {
+                        "id": object_marking_ref_result["id"]
+                    }
+
+                author = self.resolve_author(title)
+                reports_calls[external_reference_id] = batch.call(
+                    self.opencti.report.create,
+                    name=title,
+                    createdBy=author["id"] if author is not None else None,
+                    objectMarking=[object_marking_ref_result["id"]],
+                    externalReferences=[external_reference_id],
+                    description=external_reference["description"]
+                    if "description" in external_reference
+                    else "",
+                    report_types="threat-report",
+                    published=published,
+                    x_opencti_report_status=2,
+                    update=True,
+                )
+        batch.flush()
+        for external_reference_id, report_call in reports_calls.items():
+            reports[external_reference_id] = report_call.result()
 
         return {
             "created_by": created_by_id,
@@ -548,7 +856,12 @@ class OpenCTIStix2:
         if not isinstance(stix_object_results, list):
             stix_object_results = [stix_object_results]
 
+        self.unresolved_refs.discard(stix_object["id"])
         for stix_object_result in stix_object_results:
+            if self.opencti.resolution_index is not None:
+                self.opencti.resolution_index.add_imported(
+                    stix_object, stix_object_result
+                )
             self.mapping_cache[stix_object["id"]] = {
                 "id": stix_object_result["id"],
                 "type": stix_object_result["entity_type"],
@@ -563,62 +876,64 @@ class OpenCTIStix2:
                 if "observables" in stix_object_result
                 else [],
             }
-            # Add reports from external references
+            # Add reports from external references and object refs in one batch
+            batch = self.opencti.batch()
+            reports_calls = []
             for external_reference_id in external_references_ids:
                 if external_reference_id in reports:
-                    self.opencti.report.add_stix_object_or_stix_relationship(
-                        id=reports[external_reference_id]["id"],
-                        stixObjectOrStixRelationshipId=stix_object_result["id"],
+                    reports_calls.append(
+                        batch.call(
+                            self.opencti.report.add_stix_object_or_stix_relationship,
+                            id=reports[external_reference_id]["id"],
+                            stixObjectOrStixRelationshipId=stix_object_result["id"],
+                        )
                     )
             # Add object refs
-            for object_refs_id in object_refs_ids:
-                try:
-                    if stix_object_result["entity_type"] == "Report":
-                        self.opencti.report.add_stix_object_or_stix_relationship(
-                            id=stix_object_result["id"],
-                            stixObjectOrStixRelationshipId=object_refs_id,
-                        )
-                    elif stix_object_result["entity_type"] == "Observed-Data":
-                        self.opencti.observed_data.add_stix_object_or_stix_relationship(
-                            id=stix_object_result["id"],
-                            stixObjectOrStixRelationshipId=object_refs_id,
-                        )
-                    elif stix_object_result["entity_type"] == "Note":
-                        self.opencti.note.add_stix_object_or_stix_relationship(
-                            id=stix_object_result["id"],
-                            stixObjectOrStixRelationshipId=object_refs_id,
-                        )
-                    elif stix_object_result["entity_type"] == "Opinion":
-                        self.opencti.opinion.add_stix_object_or_stix_relationship(
+            adder = {
+                "Report": self.opencti.report.add_stix_object_or_stix_relationship,
+                "Observed-Data": self.opencti.observed_data.add_stix_object_or_stix_relationship,
+                "Note": self.opencti.note.add_stix_object_or_stix_relationship,
+                "Opinion": self.opencti.opinion.add_stix_object_or_stix_relationship,
+            }
+            do_add = adder.get(stix_object_result["entity_type"])
+            object_refs_calls = []
+            for object_refs_id in object_refs_ids if do_add is not None else []:
+                object_refs_calls.append(
+                    (
+                        object_refs_id,
+                        batch.call(
+                            do_add,
                             id=stix_object_result["id"],
                             stixObjectOrStixRelationshipId=object_refs_id,
-                        )
-                    if (
-                        object_refs_id in self.mapping_cache
-                        and "observables" in self.mapping_cache[object_refs_id]
-                        and self.mapping_cache[object_refs_id] is not None
-                        and self.mapping_cache[object_refs_id]["observables"]
-                        is not None
-                        and len(self.mapping_cache[object_refs_id]["observables"]) > 0
-                    ):
-                        for observable_ref in self.mapping_cache[object_refs_id][
-                            "observables"
-                        ]:
-                            if stix_object_result["entity_type"] == "Report":
-                                self.opencti.report.add_stix_object_or_stix_relationship(
-                                    id=stix_object_result["id"],
-                                    stixObjectOrStixRelationshipId=observable_ref["id"],
-                                )
-                            elif stix_object_result["entity_type"] == "Note":
-                                self.opencti.note.add_stix_object_or_stix_relationship(
-                                    id=stix_object_result["id"],
-                                    stixObjectOrStixRelationshipId=observable_ref["id"],
-                                )
-                            elif stix_object_result["entity_type"] == "Opinion":
-                                self.opencti.opinion.add_stix_object_or_stix_relationship(
+                        ),
+                    )
+                )
+                if (
+                    stix_object_result["entity_type"] != "Observed-Data"
+                    and object_refs_id in self.mapping_cache
+                    and self.mapping_cache[object_refs_id] is not None
+                    and "observables" in self.mapping_cache[object_refs_id]
+                    and self.mapping_cache[object_refs_id]["observables"] is not None
+                ):
+                    for observable_ref in self.mapping_cache[object_refs_id][
+                        "observables"
+                    ]:
+                        object_refs_calls.append(
+                            (
+                                object_refs_id,
+                                batch.call(
+                                    do_add,
                                     id=stix_object_result["id"],
                                     stixObjectOrStixRelationshipId=observable_ref["id"],
-                                )
+                                ),
+                            )
+                        )
+            batch.flush()
+            for report_call in reports_calls:
+                report_call.result()
+            for object_refs_id, object_refs_call in object_refs_calls:
+                try:
+                    object_refs_call.result()
                 except:
                     self.opencti.log("error", "Missing reference " + object_refs_id)
             # Add files
@@ -781,80 +1096,62 @@ class OpenCTIStix2:
             return None
 
         # Add external references
-        for external_reference_id in external_references_ids:
-            if external_reference_id in reports:
-                self.opencti.report.add_stix_object_or_stix_relationship(
-                    id=reports[external_reference_id]["id"],
-                    stixObjectOrStixRelationshipId=stix_relation_result["id"],
-                )
-                self.opencti.report.add_stix_object_or_stix_relationship(
-                    id=reports[external_reference_id]["id"],
-                    stixObjectOrStixRelationshipId=stix_relation["source_ref"],
-                )
-                self.opencti.report.add_stix_object_or_stix_relationship(
-                    id=reports[external_reference_id]["id"],
-                    stixObjectOrStixRelationshipId=stix_relation["target_ref"],
-                )
+        with self.opencti.batch() as batch:
+            for external_reference_id in external_references_ids:
+                if external_reference_id in reports:
+                    for stix_object_or_stix_relationship_id in [
+                        stix_relation_result["id"],
+                        stix_relation["source_ref"],
+                        stix_relation["target_ref"],
+                    ]:
+                        batch.call(
+                            self.opencti.report.add_stix_object_or_stix_relationship,
+                            id=reports[external_reference_id]["id"],
+                            stixObjectOrStixRelationshipId=stix_object_or_stix_relationship_id,
+                        )
 
-    def import_sighting(self, stix_sighting, from_id, to_id, update=False, types=None):
-        # Extract
+    def extract_sighting_extras(self, stix_sighting, types=None) -> dict:
         embedded_relationships = self.extract_embedded_relationships(
             stix_sighting, types
         )
-        created_by_id = embedded_relationships["created_by"]
-        object_marking_ids = embedded_relationships["object_marking"]
-        object_label_ids = embedded_relationships["object_label"]
-        kill_chain_phases_ids = embedded_relationships["kill_chain_phases"]
-        object_refs_ids = embedded_relationships["object_refs"]
-        external_references_ids = embedded_relationships["external_references"]
-        reports = embedded_relationships["reports"]
-
-        # Extra
-        extras = {
-            "created_by_id": created_by_id,
-            "object_marking_ids": object_marking_ids,
-            "object_label_ids": object_label_ids,
-            "kill_chain_phases_ids": kill_chain_phases_ids,
-            "object_ids": object_refs_ids,
-            "external_references_ids": external_references_ids,
-            "reports": reports,
+        return {
+            "created_by_id": embedded_relationships["created_by"],
+            "object_marking_ids": embedded_relationships["object_marking"],
+            "object_label_ids": embedded_relationships["object_label"],
+            "kill_chain_phases_ids": embedded_relationships["kill_chain_phases"],
+            "object_ids": embedded_relationships["object_refs"],
+            "external_references_ids": embedded_relationships["external_references"],
+            "reports": embedded_relationships["reports"],
         }
 
+    def import_sighting(
+        self, stix_sighting, from_id, to_id, update=False, types=None, extras=None
+    ):
+        # Extract, once for all the sightings of a STIX sighting
+        if extras is None:
+            extras = self.extract_sighting_extras(stix_sighting, types)
+
         # Create the sighting
 
         ### Get the FROM
-        if from_id in self.mapping_cache:
-            final_from_id = self.mapping_cache[from_id]["id"]
-        else:
-            stix_object_result = (
-                self.opencti.opencti_stix_object_or_stix_relationship.read(id=from_id)
+        final_from_id = self.resolve_ref(from_id)
+        if final_from_id is None:
+            self.opencti.log(
+                "error",
+                "From ref of the sithing not found, doing nothing...",
             )
-            if stix_object_result is not None:
-                final_from_id = stix_object_result["id"]
-            else:
-                self.opencti.log(
-                    "error",
-                    "From ref of the sithing not found, doing nothing...",
-                )
-                return None
+            return None
 
         ### Get the TO
         final_to_id = None
         if to_id:
-            if to_id in self.mapping_cache:
-                final_to_id = self.mapping_cache[to_id]["id"]
-            else:
-                stix_object_result = (
-                    self.opencti.opencti_stix_object_or_stix_relationship.read(id=to_id)
+            final_to_id = self.resolve_ref(to_id)
+            if final_to_id is None:
+                self.opencti.log(
+                    "error",
+                    "To ref of the sithing not found, doing nothing...",
                 )
-                if stix_object_result is not None:
-                    final_to_id = stix_object_result["id"]
-                else:
-                    self.opencti.log(
-                        "error",
-                        "To ref of the sithing not found, doing nothing...",
-                    )
-                    return None
+                return None
         date = datetime.datetime.today().strftime("%Y-%m-%dT%H:%M:%SZ")
         stix_sighting_result = self.opencti.stix_sighting_relationship.create(
             fromId=final_from_id,
@@ -991,6 +1288,96 @@ class OpenCTIStix2:
 
         return {k: v for k, v in entity.items() if self.opencti.not_empty(v)}
 
+    def read_objects(self, entity_objects, max_workers=4, batch_size=50) -> dict:
+        """read the data of objects to export, by type and in concurrent batches
+
+        The objects are read once each. The reads of every type are sent by
+        batches of aliased queries (see `QueryBatch`), `max_workers` batches
+        being sent at the same time.
+
+        :param entity_objects: objects with their id and entity_type
+        :type entity_objects: list
+        :param max_workers: number of batches read at the same time, defaults to 4
+        :type max_workers: int, optional
+        :param batch_size: number of objects read by every batch, defaults to 50
+        :type batch_size: int, optional
+        :return: the data of the objects by id, in the order of the objects, `None` if not found
+        :rtype: dict
+        """
+
+        reader = {
+            "Attack-Pattern": self.opencti.attack_pattern.read,
+            "Campaign": self.opencti.campaign.read,
+            "Note": self.opencti.note.read,
+            "Observed-Data": self.opencti.observed_data.read,
+            "Opinion": self.opencti.opinion.read,
+            "Report": self.opencti.report.read,
+            "Course-Of-Action": self.opencti.course_of_action.read,
+            "Identity": self.opencti.identity.read,
+            "Indicator": self.opencti.indicator.read,
+            "Infrastructure": self.opencti.infrastructure.read,
+            "Intrusion-Set": self.opencti.intrusion_set.read,
+            "Location": self.opencti.location.read,
+            "Malware": self.opencti.malware.read,
+            "Threat-Actor": self.opencti.threat_actor.read,
+            "Tool": self.opencti.tool.read,
+            "Vulnerability": self.opencti.vulnerability.read,
+            "X-OpenCTI-Incident": self.opencti.x_opencti_incident.read,
+            "Stix-Cyber-Observable": self.opencti.stix_cyber_observable.read,
+            "stix_core_relationship": self.opencti.stix_core_relationship.read,
+        }
+        results = {}
+        ids_by_type = {}
+        for entity_object in entity_objects:
+            if entity_object["id"] in results:
+                continue
+            # Map types
+            if entity_object["entity_type"] == "StixFile":
+                entity_object["entity_type"] = "File"
+            if IdentityTypes.has_value(entity_object["entity_type"]):
+                entity_object["entity_type"] = "Identity"
+            if LocationTypes.has_value(entity_object["entity_type"]):
+                entity_object["entity_type"] = "Location"
+            if StixCyberObservableTypes.has_value(entity_object["entity_type"]):
+                entity_object["entity_type"] = "Stix-Cyber-Observable"
+            if "relationship_type" in entity_object:
+                entity_object["entity_type"] = "stix_core_relationship"
+            results[entity_object["id"]] = None
+            ids_by_type.setdefault(entity_object["entity_type"], []).append(
+                entity_object["id"]
+            )
+
+        def read_batch(do_read, ids):
+            with self.opencti.batch(batch_size) as batch:
+                read_calls = [
+                    (entity_id, batch.call(do_read, id=entity_id)) for entity_id in ids
+                ]
+            return [
+                (entity_id, read_call.result()) for entity_id, read_call in read_calls
+            ]
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = []
+            for entity_type, ids in ids_by_type.items():
+                do_read = reader.get(
+                    entity_type,
+                    lambda entity_type=entity_type, **kwargs: self.unknown_type(
+                        {"type": entity_type}
+                    ),
+                )
+                for index in range(0, len(ids), batch_size):
+                    futures.append(
+                        submit_in_context(
+                            executor,
+                            read_batch,
+                            do_read,
+                            ids[index : index + batch_size],
+                        )
+                    )
+            for future in futures:
+                results.update(future.result())
+        return results
+
     def prepare_export(
         self,
         entity,
@@ -998,6 +1385,7 @@ class OpenCTIStix2:
         max_marking_definition_entity=None,
         no_custom_attributes=False,
         description_as_id=False,
+        max_workers=4,
     ):
         if (
             self.check_max_marking_definition(
@@ -1114,9 +1502,9 @@ class OpenCTIStix2:
             entity["count"] = entity["attribute_count"]
             del entity["attribute_count"]
             entity["sighting_of_ref"] = entity["from"]["standard_id"]
-            objects_to_get.append(entity["from"]["standard_id"])
+            objects_to_get.append(entity["from"])
             entity["where_sighted_refs"] = entity["to"]["standard_id"]
-            objects_to_get.append(entity["to"]["standard_id"])
+            objects_to_get.append(entity["to"])
             del entity["from"]
             del entity["to"]
         # Stix Core Relationship
@@ -1124,12 +1512,12 @@ class OpenCTIStix2:
             entity["type"] = "relationship"
         if "from" in entity:
             entity["source_ref"] = entity["from"]["standard_id"]
-            objects_to_get.append(entity["from"]["standard_id"])
+            objects_to_get.append(entity["from"])
         if "from" in entity:
             del entity["from"]
         if "to" in entity:
             entity["target_ref"] = entity["to"]["standard_id"]
-            objects_to_get.append(entity["to"]["standard_id"])
+            objects_to_get.append(entity["to"])
         if "to" in entity:
             del entity["to"]
         # Stix Cyber Observable
@@ -1141,9 +1529,9 @@ class OpenCTIStix2:
         if mode == "simple":
             return result
         elif mode == "full":
-            uuids = [entity["id"]]
+            uuids = {entity["id"]}
             for x in result:
-                uuids.append(x["id"])
+                uuids.add(x["id"])
             # Get extra relations (from)
             stix_core_relationships = self.opencti.stix_core_relationship.list(
                 elementId=entity["x_opencti_id"]
@@ -1168,8 +1556,8 @@ class OpenCTIStix2:
                     relation_object_bundle = self.filter_objects(
                         uuids, relation_object_data
                     )
-                    uuids = uuids + [x["id"] for x in relation_object_bundle]
-                    result = result + relation_object_bundle
+                    uuids.update(x["id"] for x in relation_object_bundle)
+                    result.extend(relation_object_bundle)
                 else:
                     self.opencti.log(
                         "info",
@@ -1204,8 +1592,8 @@ class OpenCTIStix2:
                     relation_object_bundle = self.filter_objects(
                         uuids, relation_object_data
                     )
-                    uuids = uuids + [x["id"] for x in relation_object_bundle]
-                    result = result + relation_object_bundle
+                    uuids.update(x["id"] for x in relation_object_bundle)
+                    result.extend(relation_object_bundle)
                 else:
                     self.opencti.log(
                         "info",
@@ -1215,48 +1603,15 @@ class OpenCTIStix2:
                         + stix_sighting_relationship["id"]
                         + '" are less than max definition, not exporting the relation AND the target entity.',
                     )
-            # Export
-            reader = {
-                "Attack-Pattern": self.opencti.attack_pattern.read,
-                "Campaign": self.opencti.campaign.read,
-                "Note": self.opencti.note.read,
-                "Observed-Data": self.opencti.observed_data.read,
-                "Opinion": self.opencti.opinion.read,
-                "Report": self.opencti.report.read,
-                "Course-Of-Action": self.opencti.course_of_action.read,
-                "Identity": self.opencti.identity.read,
-                "Indicator": self.opencti.indicator.read,
-                "Infrastructure": self.opencti.infrastructure.read,
-                "Intrusion-Set": self.opencti.intrusion_set.read,
-                "Location": self.opencti.location.read,
-                "Malware": self.opencti.malware.read,
-                "Threat-Actor": self.opencti.threat_actor.read,
-                "Tool": self.opencti.tool.read,
-                "Vulnerability": self.opencti.vulnerability.read,
-                "X-OpenCTI-Incident": self.opencti.x_opencti_incident.read,
-                "Stix-Cyber-Observable": self.opencti.stix_cyber_observable.read,
-                "stix_core_relationship": self.opencti.stix_core_relationship.read,
-            }
-            # Get extra objects
+            # Get extra objects, read once each
+            entity_objects = []
             for entity_object in objects_to_get:
-                # Map types
-                if entity_object["entity_type"] == "StixFile":
-                    entity_object["entity_type"] = "File"
-                if IdentityTypes.has_value(entity_object["entity_type"]):
-                    entity_object["entity_type"] = "Identity"
-                if LocationTypes.has_value(entity_object["entity_type"]):
-                    entity_object["entity_type"] = "Location"
-                if StixCyberObservableTypes.has_value(entity_object["entity_type"]):
-                    entity_object["entity_type"] = "Stix-Cyber-Observable"
-                if "relationship_type" in entity_object:
-                    entity_object["entity_type"] = "stix_core_relationship"
-                do_read = reader.get(
-                    entity_object["entity_type"],
-                    lambda **kwargs: self.unknown_type(
-                        {"type": entity_object["entity_type"]}
-                    ),
-                )
-                entity_object_data = do_read(id=entity_object["id"])
+                if entity_object.get("standard_id") not in uuids:
+                    entity_objects.append(entity_object)
+            entity_objects_data = self.read_objects(entity_objects, max_workers)
+            for entity_object_data in entity_objects_data.values():
+                if entity_object_data is None:
+                    continue
                 stix_entity_object = self.prepare_export(
                     self.generate_export(entity_object_data),
                     "simple",
@@ -1264,8 +1619,8 @@ class OpenCTIStix2:
                 )
                 # Add to result
                 entity_object_bundle = self.filter_objects(uuids, stix_entity_object)
-                uuids = uuids + [x["id"] for x in entity_object_bundle]
-                result = result + entity_object_bundle
+                uuids.update(x["id"] for x in entity_object_bundle)
+                result.extend(entity_object_bundle)
             for relation_object in relations_to_get:
                 relation_object_data = self.prepare_export(
                     self.opencti.stix_core_relationship.read(id=relation_object["id"])
@@ -1273,8 +1628,8 @@ class OpenCTIStix2:
                 relation_object_bundle = self.filter_objects(
                     uuids, relation_object_data
                 )
-                uuids = uuids + [x["id"] for x in relation_object_bundle]
-                result = result + relation_object_bundle
+                uuids.update(x["id"] for x in relation_object_bundle)
+                result.extend(relation_object_bundle)
 
             # Get extra reports
             """
@@ -1335,6 +1690,7 @@ class OpenCTIStix2:
         max_marking_definition=None,
         no_custom_attributes=False,
         description_as_id=False,
+        max_workers=4,
     ):
         max_marking_definition_entity = (
             self.opencti.marking_definition.read(id=max_marking_definition)
@@ -1385,6 +1741,7 @@ class OpenCTIStix2:
             max_marking_definition_entity,
             no_custom_attributes,
             description_as_id,
+            max_workers,
         )
         if stix_objects is not None:
             bundle["objects"].extend(stix_objects)
@@ -1468,7 +1825,7 @@ class OpenCTIStix2:
         )
 
         if entities_list is not None:
-            uuids = []
+            uuids = set()
             for entity in entities_list:
                 entity_bundle = self.prepare_export(
                     self.generate_export(entity),
@@ -1478,57 +1835,186 @@ class OpenCTIStix2:
                 if entity_bundle is not None:
                     entity_bundle_filtered = self.filter_objects(uuids, entity_bundle)
                     for x in entity_bundle_filtered:
-                        uuids.append(x["id"])
-                    bundle["objects"] = bundle["objects"] + entity_bundle_filtered
+                        uuids.add(x["id"])
+                    bundle["objects"].extend(entity_bundle_filtered)
 
         return bundle
 
-    def import_bundle(self, stix_bundle, update=False, types=None) -> List:
+    def import_item(self, item, update=False, types=None):
+        """import a stix2 object of a bundle, its references being already imported
+
+        :param item: valid stix2 object
+        :type item: dict
+        :param update: whether to updated data in the database, defaults to False
+        :type update: bool, optional
+        :param types: list of stix2 types, defaults to None
+        :type types: list, optional
+        """
+
+        if "x_data_update" in item:
+            self.stix2_update.process_update(item)
+        elif item["type"] == "relationship":
+            self.import_relationship(item, update, types)
+        elif item["type"] == "sighting":
+            # Resolve the to
+            to_ids = []
+            if "where_sighted_refs" in item:
+                for where_sighted_ref in item["where_sighted_refs"]:
+                    to_ids.append(where_sighted_ref)
+            # Import sighting_of_ref
+            from_id = (
+                item["x_opencti_sighting_of_ref"]
+                if "x_opencti_sighting_of_ref" in item
+                else item["sighting_of_ref"]
+            )
+            extras = self.extract_sighting_extras(item) if len(to_ids) > 0 else None
+            if len(to_ids) > 0:
+                for to_id in to_ids:
+                    self.import_sighting(item, from_id, to_id, update, extras=extras)
+            # Import observed_data_refs
+            if "observed_data_refs" in item:
+                for observed_data_ref in item["observed_data_refs"]:
+                    if len(to_ids) > 0:
+                        for to_id in to_ids:
+                            self.import_sighting(
+                                item, observed_data_ref, to_id, update, extras=extras
+                            )
+        elif StixCyberObservableTypes.has_value(item["type"]):
+            self.import_observable(item, update, types)
+        else:
+            self.import_object(item, update, types)
+
+    def import_bundle(
+        self, stix_bundle, update=False, types=None, max_workers=1
+    ) -> List:
+        """import a stix2 bundle
+
+        :param stix_bundle: valid stix2 bundle
+        :type stix_bundle: dict
+        :param update: whether to updated data in the database, defaults to False
+        :type update: bool, optional
+        :param types: list of stix2 types, defaults to None
+        :type types: list, optional
+        :param max_workers: number of objects imported at the same time, defaults to 1
+        :type max_workers: int, optional
+        :return: list of imported stix2 objects
+        :rtype: List
+        """
+
         # Check if the bundle is correctly formatted
         if "type" not in stix_bundle or stix_bundle["type"] != "bundle":
             raise ValueError("JSON data type is not a STIX2 bundle")
         if "objects" not in stix_bundle or len(stix_bundle["objects"]) == 0:
             raise ValueError("JSON data objects is empty")
 
-        stix2_splitter = OpenCTIStix2Splitter()
-        bundles = stix2_splitter.split_bundle(stix_bundle, False)
-        # Import every elements in a specific order
-        imported_elements = []
+        token = _unresolved_refs.set(set())
+        try:
+            # Resolve the labels, kill chain phases and references at once
+            if len(stix_bundle["objects"]) >= self.prewarm_min_objects:
+                self.prewarm(stix_bundle["objects"], types)
+            # Resolve the objects referenced by the sightings and not in the bundle
+            self.resolve_refs(stix_bundle["objects"])
+
+            if max_workers > 1:
+                return self.import_bundle_parallel(
+                    stix_bundle["objects"], update, types, max_workers
+                )
 
-        # Marking definitions
-        for bundle in bundles:
-            for item in bundle["objects"]:
-                if "x_data_update" in item:
-                    self.stix2_update.process_update(item)
-                elif item["type"] == "relationship":
-                    self.import_relationship(item, update, types)
-                elif item["type"] == "sighting":
-                    # Resolve the to
-                    to_ids = []
-                    if "where_sighted_refs" in item:
-                        for where_sighted_ref in item["where_sighted_refs"]:
-                            to_ids.append(where_sighted_ref)
-                    # Import sighting_of_ref
-                    from_id = (
-                        item["x_opencti_sighting_of_ref"]
-                        if "x_opencti_sighting_of_ref" in item
-                        else item["sighting_of_ref"]
-                    )
-                    if len(to_ids) > 0:
-                        for to_id in to_ids:
-                            self.import_sighting(item, from_id, to_id, update)
-                    # Import observed_data_refs
-                    if "observed_data_refs" in item:
-                        for observed_data_ref in item["observed_data_refs"]:
-                            if len(to_ids) > 0:
-                                for to_id in to_ids:
-                                    self.import_sighting(
-                                        item, observed_data_ref, to_id, update
-                                    )
-                elif StixCyberObservableTypes.has_value(item["type"]):
-                    self.import_observable(item, update, types)
-                else:
-                    self.import_object(item, update, types)
-                imported_elements.append({"id": item["id"], "type": item["type"]})
+            stix2_splitter = OpenCTIStix2Splitter()
+            bundles = stix2_splitter.split_bundle(stix_bundle, False)
+            # Import every elements in a specific order
+            imported_elements = []
+            for bundle in bundles:
+                for item in bundle["objects"]:
+                    self.import_item(item, update, types)
+                    imported_elements.append({"id": item["id"], "type": item["type"]})
+
+            return imported_elements
+        finally:
+            _unresolved_refs.reset(token)
+            # Save the ids of the bundle in the persistent cache
+            if isinstance(self.mapping_cache, MappingCache):
+                self.mapping_cache.flush()
+
+    def import_bundle_parallel(
+        self, stix_objects, update=False, types=None, max_workers=4
+    ) -> List:
+        """import stix2 objects concurrently, each one after the objects it references
 
-        return imported_elements
+        An object is started once all the objects of the bundle it references
+        (`*_ref` and `*_refs`) have been imported, so independent objects are
+        imported at the same time. If references form a cycle, the pending
+        object with the fewest missing references is started to break it.
+
+        :param stix_objects: valid stix2 objects
+        :type stix_objects: list
+        :param update: whether to updated data in the database, defaults to False
+        :type update: bool, optional
+        :param types: list of stix2 types, defaults to None
+        :type types: list, optional
+        :param max_workers: number of objects imported at the same time, defaults to 4
+        :type max_workers: int, optional
+        :raises Exception: the first error raised by an import, once the running ones are done
+        :return: list of imported stix2 objects, in the order of the bundle
+        :rtype: List
+        """
+
+        items = {}
+        for item in stix_objects:
+            items[item["id"]] = item
+        dependents = {item_id: [] for item_id in items}
+        missing = {}
+        for item_id, item in items.items():
+            refs = set(
+                ref
+                for ref in OpenCTIStix2Splitter.get_refs(item)
+                if ref in items and ref != item_id
+            )
+            missing[item_id] = len(refs)
+            for ref in refs:
+                dependents[ref].append(item_id)
+        ready = collections.deque(item_id for item_id in items if missing[item_id] == 0)
+        started = set()
+        running = {}
+        error = None
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while True:
+                while len(ready) > 0 and error is None:
+                    item_id = ready.popleft()
+                    started.add(item_id)
+                    future = submit_in_context(
+                        executor, self.import_item, items[item_id], update, types
+                    )
+                    running[future] = item_id
+                if len(running) == 0:
+                    if error is not None or len(started) == len(items):
+                        break
+                    # Only cycles are left
+                    item_id = min(
+                        (item_id for item_id in items if item_id not in started),
+                        key=lambda item_id: missing[item_id],
+                    )
+                    self.opencti.log("info", "Breaking a reference cycle at " + item_id)
+                    ready.append(item_id)
+                    continue
+                done, _ = concurrent.futures.wait(
+                    running, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    item_id = running.pop(future)
+                    try:
+                        future.result()
+                    except Exception as e:
+                        if error is None:
+                            error = e
+                        continue
+                    for dependent in dependents[item_id]:
+                        missing[dependent] -= 1
+                        if missing[dependent] == 0 and dependent not in started:
+                            ready.append(dependent)
+        if error is not None:
+            raise error
+
+        return [
+            {"id": item_id, "type": item["type"]} for item_id, item in items.items()
+        ]
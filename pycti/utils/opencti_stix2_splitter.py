@@ -1,6 +1,124 @@
+import array
+import codecs
 import json
+import shutil
+import tempfile
 import uuid
 
+from pycti.utils import opencti_json
+
+
+class BundleObjectsReader:
+    """Incremental reader of the `objects` of a stix2 bundle file
+
+    The file is decoded chunk by chunk and every object is parsed alone, so
+    memory use does not depend on the size of the bundle.
+
+    :param file: binary file object
+    :param chunk_size: number of bytes read at once, defaults to 1 MiB
+    :type chunk_size: int, optional
+    """
+
+    def __init__(self, file, chunk_size=1024 * 1024):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.decoder = codecs.getincrementaldecoder("utf-8")()
+        self.json_decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.position = 0
+        # Byte offset in the file of the current position
+        self.byte_position = 0
+        self.eof = False
+        # Type of the bundle, known once its key is read
+        self.type = None
+
+    def read(self, size=None) -> bool:
+        if self.eof:
+            return False
+        data = self.file.read(size or self.chunk_size)
+        if len(data) == 0:
+            self.eof = True
+            self.buffer += self.decoder.decode(b"", final=True)
+            return False
+        # Drop the consumed part of the buffer
+        self.buffer = self.buffer[self.position :] + self.decoder.decode(data)
+        self.position = 0
+        return True
+
+    def skip_spaces(self):
+        while True:
+            while (
+                self.position < len(self.buffer)
+                and self.buffer[self.position] in " \t\r\n"
+            ):
+                # Separators are ASCII, one byte each
+                self.position += 1
+                self.byte_position += 1
+            if self.position < len(self.buffer) or not self.read():
+                return
+
+    def expect(self, chars) -> str:
+        self.skip_spaces()
+        if self.position >= len(self.buffer) or self.buffer[self.position] not in chars:
+            raise Exception("File data is not a valid bundle")
+        self.position += 1
+        self.byte_position += 1
+        return self.buffer[self.position - 1]
+
+    def decode(self):
+        """decode the JSON value at the current position
+
+        :return: the value and its start and end byte offsets in the file
+        :rtype: tuple
+        """
+
+        self.skip_spaces()
+        while True:
+            try:
+                value, end = self.json_decoder.raw_decode(self.buffer, self.position)
+                # A number may continue in the next chunk
+                if end < len(self.buffer) or self.eof:
+                    break
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise Exception("File data is not a valid JSON")
+            # Grow the buffer geometrically so large values are parsed in linear time
+            self.read(max(self.chunk_size, len(self.buffer) - self.position))
+        start = self.byte_position
+        self.byte_position += len(self.buffer[self.position : end].encode("utf-8"))
+        self.position = end
+        return value, start, self.byte_position
+
+    def objects(self):
+        """iterate over the objects of the bundle
+
+        :return: returns an iterator of (object, start offset, end offset) tuples
+        """
+
+        self.expect("{")
+        self.skip_spaces()
+        if self.buffer[self.position : self.position + 1] == "}":
+            return
+        while True:
+            key, _, _ = self.decode()
+            self.expect(":")
+            if key == "objects":
+                self.expect("[")
+                self.skip_spaces()
+                if self.buffer[self.position : self.position + 1] == "]":
+                    self.expect("]")
+                else:
+                    while True:
+                        yield self.decode()
+                        if self.expect(",]") == "]":
+                            break
+            elif key == "type":
+                self.type, _, _ = self.decode()
+            else:
+                self.decode()
+            if self.expect(",}") == "}":
+                return
+
 
 class OpenCTIStix2Splitter:
     def __init__(self):
@@ -8,9 +126,24 @@ class OpenCTIStix2Splitter:
         self.cache_index = {}
         # 
         self.elements = []
+        # Dependency level of every enlisted element
+        self.levels = {}
 
     def enlist_element(self, item_id, raw_data):
-        nb_deps = 1
+        """enlist an element and every element it references, without recursion
+
+        Every element gets its number of dependencies (`nb_deps`) and its
+        dependency level: 0 for elements referencing nothing in the bundle,
+        else one more than the highest level of its references. References
+        going back to an element being enlisted (cycles) are ignored.
+
+        :param item_id: id of the element
+        :type item_id: str
+        :param raw_data: elements of the bundle by id
+        :type raw_data: dict
+        :return: the number of dependencies of the element
+        :rtype: int
+        """
 
         # 校验是否在原始数据里面
         if item_id not in raw_data:
@@ -21,42 +154,81 @@ class OpenCTIStix2Splitter:
         if existing_item is not None:
             return existing_item["nb_deps"]
 
-        # Recursive enlist for every refs
-        # 取数据
-        item = raw_data[item_id]
+        # Depth first walk of the references with an explicit stack
+        in_progress = {item_id}
+        stack = [(item_id, iter(self.get_refs(raw_data[item_id])))]
+        while len(stack) > 0:
+            current_id, refs = stack[-1]
+            ref = next(refs, None)
+            if ref is not None:
+                if (
+                    ref in raw_data
+                    and ref not in self.cache_index
+                    and ref not in in_progress
+                ):
+                    in_progress.add(ref)
+                    stack.append((ref, iter(self.get_refs(raw_data[ref]))))
+                continue
+            stack.pop()
+            in_progress.discard(current_id)
+            # Get the final dep counting and add in cache
+            # 写缓存
+            item = raw_data[current_id]
+            nb_deps = 1
+            level = 0
+            for ref in self.get_refs(item):
+                ref_item = self.cache_index.get(ref)
+                if ref_item is not None:
+                    nb_deps += ref_item["nb_deps"]
+                    level = max(level, self.levels[ref] + 1)
+            item["nb_deps"] = nb_deps
+            self.levels[current_id] = level
+            self.elements.append(item)
+            self.cache_index[current_id] = item  # Put in cache
+
+        # 返回数据
+        return self.cache_index[item_id]["nb_deps"]
+
+    @staticmethod
+    def get_refs(item) -> list:
+        """list the ids referenced by a stix2 object, as followed by `enlist_element`
+
+        :param item: valid stix2 object
+        :type item: dict
+        :return: the referenced ids
+        :rtype: list
+        """
+
+        refs = []
         for key, value in item.items():
             if key.endswith("_refs"):
-                # 数组引用，去取数组数据
-                for element_ref in item[key]:
-                    nb_deps += self.enlist_element(element_ref, raw_data)
+                refs.extend(value)
             elif key.endswith("_ref"):
-                # 对象引用
-                # Need to handle the special case of recursive ref for created by ref
-                is_created_by_ref = key == "created_by_ref"
-                if is_created_by_ref:
-                    # 特殊情况处理    
-                    is_marking = item["id"].startswith("marking-definition--")
-                    if is_marking is False:
-                        nb_deps += self.enlist_element(value, raw_data)
-                else:
-                    # 取值
-                    nb_deps += self.enlist_element(value, raw_data)
-        # Get the final dep counting and add in cache
-        # 写缓存
-        item["nb_deps"] = nb_deps
-        self.elements.append(item)
-        self.cache_index[item_id] = item  # Put in cache
-
-        # 返回数据
-        return nb_deps
+                # Markings may be created by an identity they mark
+                if key == "created_by_ref" and item["id"].startswith(
+                    "marking-definition--"
+                ):
+                    continue
+                refs.append(value)
+        return refs
 
     # 拆分批量数据
-    def split_bundle(self, bundle, use_json=True) -> list:
+    def split_bundle(
+        self, bundle, use_json=True, max_objects=1, max_bytes=None
+    ) -> list:
         """splits a valid stix2 bundle into a list of bundles
+
+        Elements are grouped by dependency level, a bundle only holds elements
+        of one level so every reference is satisfied by an earlier bundle.
+
         :param bundle: valid stix2 bundle
         :type bundle:
         :param use_json: is JSON?
         :type use_json:
+        :param max_objects: maximum number of objects in a bundle, defaults to 1
+        :type max_objects: int, optional
+        :param max_bytes: maximum size of the JSON objects of a bundle, defaults to None
+        :type max_bytes: int, optional
         :raises Exception: if data is not valid JSON
         :return: returns a list of bundles
         :rtype: list
@@ -64,7 +236,7 @@ class OpenCTIStix2Splitter:
         # 解析一下入参
         if use_json:
             try:
-                bundle_data = json.loads(bundle)
+                bundle_data = opencti_json.loads(bundle)
             except:
                 raise Exception("File data is not a valid JSON")
         else:
@@ -80,20 +252,161 @@ class OpenCTIStix2Splitter:
         for item in bundle_data["objects"]:
             self.enlist_element(item["id"], raw_data)
 
-        # Build the bundles
-        bundles = []
-
         # 做下缓存排序
-        def by_dep_size(elem):
-            return elem["nb_deps"]
-        self.elements.sort(key=by_dep_size)
+        def by_level(elem):
+            return self.levels[elem["id"]], elem["nb_deps"]
+
+        self.elements.sort(key=by_level)
 
         # 返回规范化批量数据
+        bundles = []
+        items = []
+        items_level = None
+        items_bytes = 0
         for entity in self.elements:
-            bundles.append(self.stix2_create_bundle([entity], use_json))
+            level = self.levels[entity["id"]]
+            entity_bytes = (
+                len(opencti_json.dumpb(entity)) if max_bytes is not None else 0
+            )
+            if len(items) > 0 and (
+                level != items_level
+                or len(items) >= max_objects
+                or (max_bytes is not None and items_bytes + entity_bytes > max_bytes)
+            ):
+                bundles.append(self.stix2_create_bundle(items, use_json))
+                items = []
+                items_bytes = 0
+            items.append(entity)
+            items_level = level
+            items_bytes += entity_bytes
+        if len(items) > 0:
+            bundles.append(self.stix2_create_bundle(items, use_json))
 
         return bundles
 
+    def split_file(
+        self, file, use_json=True, max_objects=1, max_bytes=None, chunk_size=None
+    ):
+        """splits a stix2 bundle file into bundles, lazily
+
+        The file is read twice. The first pass parses the objects one by one
+        and keeps their ids, references and positions in the file only. Once
+        the dependency levels are known, the second pass reads the objects
+        back level after level and yields the bundles, grouped as with
+        `split_bundle`. Files that cannot be read twice are first copied to a
+        temporary file.
+
+        :param file: path or binary file object of a valid stix2 bundle
+        :type file: str or file
+        :param use_json: is JSON?
+        :type use_json:
+        :param max_objects: maximum number of objects in a bundle, defaults to 1
+        :type max_objects: int, optional
+        :param max_bytes: maximum size of the JSON objects of a bundle, defaults to None
+        :type max_bytes: int, optional
+        :param chunk_size: number of bytes read at once, defaults to 1 MiB
+        :type chunk_size: int, optional
+        :raises Exception: if data is not a valid JSON bundle
+        :raises ValueError: if the type of the data is not bundle
+        :return: returns an iterator of bundles
+        """
+
+        if isinstance(file, str):
+            with open(file, "rb") as bundle_file:
+                yield from self.split_file(
+                    bundle_file, use_json, max_objects, max_bytes, chunk_size
+                )
+            return
+        if not file.seekable():
+            with tempfile.TemporaryFile() as bundle_file:
+                shutil.copyfileobj(file, bundle_file)
+                bundle_file.seek(0)
+                yield from self.split_file(
+                    bundle_file, use_json, max_objects, max_bytes, chunk_size
+                )
+            return
+
+        # Index the ids as numbers, with the position and references of the objects
+        numbers = {}
+        starts = array.array("q")
+        ends = array.array("q")
+        refs = []
+        file_start = file.tell()
+        reader = BundleObjectsReader(file, chunk_size or 1024 * 1024)
+        for item, start, end in reader.objects():
+            number = numbers.setdefault(item["id"], len(numbers))
+            while len(starts) <= number:
+                starts.append(-1)
+                ends.append(-1)
+                refs.append(())
+            starts[number] = file_start + start
+            ends[number] = file_start + end
+            refs[number] = array.array(
+                "l",
+                (numbers.setdefault(ref, len(numbers)) for ref in self.get_refs(item)),
+            )
+        # The type may follow the objects, nothing is yielded before checking it
+        if reader.type != "bundle":
+            raise ValueError("JSON data type is not a STIX2 bundle")
+        while len(starts) < len(numbers):
+            starts.append(-1)
+            ends.append(-1)
+            refs.append(())
+        del numbers
+
+        # Dependency levels, references to objects outside the file are ignored
+        levels = array.array("l", [-1]) * len(starts)
+        for number in range(len(starts)):
+            if starts[number] == -1 or levels[number] != -1:
+                continue
+            in_progress = {number}
+            stack = [(number, iter(refs[number]))]
+            while len(stack) > 0:
+                current, current_refs = stack[-1]
+                ref = next(current_refs, None)
+                if ref is not None:
+                    if (
+                        starts[ref] != -1
+                        and levels[ref] == -1
+                        and ref not in in_progress
+                    ):
+                        in_progress.add(ref)
+                        stack.append((ref, iter(refs[ref])))
+                    continue
+                stack.pop()
+                in_progress.discard(current)
+                level = 0
+                for ref in refs[current]:
+                    if levels[ref] != -1:
+                        level = max(level, levels[ref] + 1)
+                levels[current] = level
+        del refs
+
+        # Read the objects back, level after level
+        order = sorted(
+            (number for number in range(len(starts)) if starts[number] != -1),
+            key=lambda number: levels[number],
+        )
+        items = []
+        items_level = None
+        items_bytes = 0
+        for number in order:
+            entity_bytes = ends[number] - starts[number]
+            if len(items) > 0 and (
+                levels[number] != items_level
+                or len(items) >= max_objects
+                or (max_bytes is not None and items_bytes + entity_bytes > max_bytes)
+            ):
+                yield self.stix2_create_bundle(items, use_json)
+                items = []
+                items_bytes = 0
+            file.seek(starts[number])
+            items.append(opencti_json.loads(file.read(entity_bytes)))
+            items_level = levels[number]
+            items_bytes += entity_bytes
+        if len(items) > 0:
+            yield self.stix2_create_bundle(items, use_json)
+
     @staticmethod
     def stix2_create_bundle(items, use_json):
         """create a stix2 bundle with items
@@ -112,4 +425,4 @@ class OpenCTIStix2Splitter:
             "spec_version": "2.1",
             "objects": items,
         }
-        return json.dumps(bundle) if use_json else bundle
+        return opencti_json.dumps(bundle) if use_json else bundle
@@ -57,7 +57,6 @@ setup(
         "stix2==2.1.0",
         "pytz==2021.1",
         "pika==1.2.0",
-        "sseclient==0.0.27",
         "python-magic==0.4.18;sys.platform=='linux' or sys.platform=='darwin'",
         "python-magic-bin==0.4.14;sys.platform=='win32'",
     ],
@@ -65,5 +64,7 @@ setup(
     extras_require={
         "dev": ["black", "wheel", "pytest", "pytest-cov", "pre-commit"],
         "doc": ["autoapi", "sphinx_rtd_theme", "sphinx-autodoc-typehints"],
+        "async": ["aiohttp"],
+        "fast-json": ["orjson"],
     },  # Optional
 )
@@ -0,0 +1,31 @@
+import pytest
+
+from pycti import OpenCTIApiClient
+
+
+@pytest.fixture
+def api():
+    """client of a platform that is never reached, the tests replace what sends queries"""
+
+    return OpenCTIApiClient("http://opencti", "token", perform_health_check=False)
+
+
+@pytest.fixture
+def fake_api(api):
+    """answer the queries of the client with a function
+
+    `fake_api(respond)` makes `api.query` return `respond(query, variables)`
+    and returns the client with the list of the (query, variables) sent.
+    """
+
+    def make(respond):
+        queries = []
+
+        def query(query, variables={}):
+            queries.append((query, dict(variables)))
+            return respond(query, variables)
+
+        api.query = query
+        return api, queries
+
+    return make
@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+
+from pycti import AsyncOpenCTIApiClient
+
+
+class FakeAsyncClient(AsyncOpenCTIApiClient):
+    def __init__(self, responses):
+        AsyncOpenCTIApiClient.__init__(self, "http://localhost:4000", "token")
+        self.responses = responses
+        self.queries = []
+
+    async def post(self, query, variables):
+        self.queries.append(variables)
+        await asyncio.sleep(0)
+        return 200, self.responses.pop(0)
+
+
+def test_async_entity_call():
+    page = {
+        "edges": [{"node": {"id": "1", "name": "Emotet"}}],
+        "pageInfo": {"endCursor": "1", "hasNextPage": False, "globalCount": 1},
+    }
+    client = FakeAsyncClient([{"data": {"malwares": page}}])
+    malwares = asyncio.run(client.malware.list(first=1))
+    assert len(client.queries) == 1
+    assert client.queries[0]["first"] == 1
+    assert malwares == [{"id": "1", "name": "Emotet", "createdById": None}]
+
+
+def test_async_entity_call_error():
+    client = FakeAsyncClient([{"errors": [{"message": "Forbidden"}]}])
+    try:
+        asyncio.run(client.malware.read(id="1"))
+        assert False
+    except ValueError as e:
+        assert e.args[0]["message"] == "Forbidden"
+
+
+def test_async_entity_stream():
+    pages = [
+        {
+            "edges": [{"node": {"id": str(index), "name": "Emotet"}}],
+            "pageInfo": {
+                "endCursor": str(index),
+                "hasNextPage": index < 2,
+                "globalCount": 3,
+            },
+        }
+        for index in range(3)
+    ]
+    client = FakeAsyncClient([{"data": {"malwares": page}} for page in pages])
+
+    async def collect():
+        malwares = await client.malware.list(stream=True)
+        return [malware["id"] async for malware in malwares]
+
+    assert asyncio.run(collect()) == ["0", "1", "2"]
+    assert [variables["after"] for variables in client.queries] == [None, "0", "1"]
+
+
+def test_async_call_sends_the_queries_of_nested_batches():
+    client = FakeAsyncClient(
+        [
+            {"data": {"malware": {"id": "a", "name": "Emotet"}}},
+            {"data": {"tool": {"id": "b", "name": "Mimikatz"}}},
+        ]
+    )
+    client.api.post = lambda query, variables={}: pytest.fail("sync post " + query)
+    api = client.api
+
+    def read():
+        with api.batch() as batch:
+            malware = batch.call(api.malware.read, id="a")
+        return malware.result()["name"], api.tool.read(id="b")["name"]
+
+    assert asyncio.run(client.call(read)) == ("Emotet", "Mimikatz")
+    assert client.queries == [{"id": "a"}, {"id": "b"}]
+    assert not api.is_replaying()
@@ -0,0 +1,59 @@
+def answers(responses):
+    return lambda query, variables: {"data": responses.pop(0)}
+
+
+def test_get_by_stix_id_or_name_resolves_candidates_in_one_query(fake_api):
+    empty = {"edges": []}
+    api, queries = fake_api(
+        answers(
+            [
+                {
+                    "byId": None,
+                    "candidate0": empty,
+                    "candidate1": empty,
+                    "candidate2": {"edges": [{"node": {"id": "found"}}]},
+                    "candidate3": {"edges": [{"node": {"id": "other"}}]},
+                },
+                {"stixDomainObject": {"id": "found", "name": "APT28"}},
+            ]
+        )
+    )
+    result = api.stix_domain_object.get_by_stix_id_or_name(
+        types=["Intrusion-Set"],
+        stix_id="intrusion-set--1",
+        name="APT28",
+        aliases=["Sofacy", "APT28", "Fancy Bear"],
+    )
+    assert result["id"] == "found"
+    assert len(queries) == 2
+    variables = queries[0][1]
+    assert variables["id"] == "intrusion-set--1"
+    assert variables["filters0"] == [{"key": "name", "values": ["APT28"]}]
+    assert [variables["filters" + str(i)][0]["values"][0] for i in range(1, 4)] == [
+        "APT28",
+        "Sofacy",
+        "Fancy Bear",
+    ]
+    assert queries[1][1] == {"id": "found"}
+
+
+def test_get_by_stix_id_or_name_returns_the_stix_id_match(fake_api):
+    api, queries = fake_api(
+        answers([{"byId": {"id": "by-id"}, "candidate0": {"edges": []}}])
+    )
+    result = api.stix_domain_object.get_by_stix_id_or_name(
+        stix_id="malware--1", name="Emotet", aliases=None
+    )
+    assert result["id"] == "by-id"
+    assert len(queries) == 1
+
+
+def test_get_by_stix_id_or_name_declares_only_used_variables(fake_api):
+    api, queries = fake_api(answers([{"byId": {"id": "by-id"}}]))
+    result = api.stix_domain_object.get_by_stix_id_or_name(
+        types=["Malware"], stix_id="malware--1"
+    )
+    assert result["id"] == "by-id"
+    query, variables = queries[0]
+    assert query.startswith("query StixDomainObjectResolve($id: String!) {")
+    assert "$types" not in query and variables == {"id": "malware--1"}
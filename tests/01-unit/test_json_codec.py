@@ -0,0 +1,19 @@
+from pycti.utils.opencti_json import OrjsonCodec, StdlibJsonCodec, default_codec
+
+
+def test_codecs_round_trip():
+    value = {"name": "é ✓", "count": 2 ** 70, "objects": [1.5, None, True]}
+    for codec in [StdlibJsonCodec(), default_codec()]:
+        data = codec.dumpb(value)
+        assert isinstance(data, bytes)
+        assert codec.loads(data) == value
+        assert codec.loads(codec.dumps(value)) == value
+
+
+def test_orjson_codec_falls_back_to_stdlib():
+    try:
+        codec = OrjsonCodec()
+    except ImportError:
+        return
+    assert codec.loads(b'{"value": NaN}')["value"] != 0
+    assert codec.loads(codec.dumpb({1: "a"})) == {"1": "a"}
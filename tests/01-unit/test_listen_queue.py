@@ -0,0 +1,81 @@
+import json
+import threading
+
+from pycti.connector.opencti_connector_helper import ListenQueue
+
+CONFIG = {
+    "connection": {"host": "localhost", "port": 5672, "user": "u", "pass": "p"},
+    "listen": "listen_queue",
+}
+
+
+class FakeWork:
+    def to_received(self, work_id, message):
+        pass
+
+    def to_processed(self, work_id, message, in_error=False):
+        pass
+
+
+class FakeApi:
+    def __init__(self):
+        self.work = FakeWork()
+
+    def set_applicant_id_header(self, applicant_id):
+        pass
+
+
+class FakeHelper:
+    def __init__(self):
+        self.api = FakeApi()
+        self.work_id = None
+        self.applicant_id = None
+
+
+class FakeChannel:
+    is_open = True
+
+    def __init__(self):
+        self.acked = []
+
+    def basic_ack(self, delivery_tag):
+        self.acked.append(delivery_tag)
+
+
+class FakeConnection:
+    def __init__(self):
+        self.callbacks = []
+        self.lock = threading.Lock()
+
+    def add_callback_threadsafe(self, callback):
+        with self.lock:
+            self.callbacks.append(callback)
+
+
+class FakeMethod:
+    def __init__(self, delivery_tag):
+        self.delivery_tag = delivery_tag
+
+
+def test_listen_queue_processes_messages_concurrently():
+    barrier = threading.Barrier(3, timeout=5)
+
+    def callback(event):
+        barrier.wait()
+        return "done"
+
+    listen_queue = ListenQueue(FakeHelper(), CONFIG, callback, max_workers=3)
+    assert listen_queue.prefetch_count == 3
+    listen_queue.pika_connection = FakeConnection()
+    channel = FakeChannel()
+    body = json.dumps(
+        {"internal": {"work_id": "work", "applicant_id": None}, "event": {}}
+    )
+    for delivery_tag in range(1, 4):
+        listen_queue._process_message(channel, FakeMethod(delivery_tag), None, body)
+    listen_queue.executor.shutdown(wait=True)
+    # Acks are left to the connection thread
+    assert channel.acked == []
+    for ack in listen_queue.pika_connection.callbacks:
+        ack()
+    assert sorted(channel.acked) == [1, 2, 3]
@@ -0,0 +1,61 @@
+from pycti import MappingCache, SqliteCacheBackend
+
+
+def test_mapping_cache_evicts_least_recently_used():
+    cache = MappingCache(max_size=2)
+    cache["a"] = {"id": "1"}
+    cache["b"] = {"id": "2"}
+    assert cache["a"]["id"] == "1"
+    cache["c"] = {"id": "3"}
+    assert "b" not in cache
+    assert "a" in cache and "c" in cache
+    metrics = cache.metrics()
+    assert metrics["size"] == 2
+    assert metrics["evictions"] == 1
+    assert metrics["hits"] == 1
+    assert metrics["misses"] == 1
+
+
+def test_mapping_cache_expires_entries():
+    cache = MappingCache(ttl=0)
+    cache["a"] = {"id": "1"}
+    assert cache.get("a") is None
+    assert cache.metrics()["expirations"] == 1
+
+
+def test_mapping_cache_sqlite_backend(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = MappingCache(max_size=1, backend=SqliteCacheBackend(path))
+    cache["a"] = {"id": "1", "type": "Malware"}
+    cache["b"] = {"id": "2", "type": "Tool"}
+    # Evicted from memory but read back from disk
+    assert cache["a"] == {"id": "1", "type": "Malware"}
+    cache.close()
+    restarted = MappingCache(backend=SqliteCacheBackend(path))
+    assert restarted["b"]["type"] == "Tool"
+    restarted.close()
+
+
+def test_mapping_cache_is_not_bounded_by_default():
+    cache = MappingCache()
+    for index in range(200000):
+        cache[str(index)] = {"id": str(index)}
+    assert len(cache) == 200000
+    assert cache.metrics()["evictions"] == 0
+
+
+def test_sqlite_backend_commits_by_batches(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = MappingCache(backend=SqliteCacheBackend(path, commit_size=3))
+    reader = SqliteCacheBackend(path)
+    cache["a"] = {"id": "1"}
+    cache["b"] = {"id": "2"}
+    assert reader.get("a") is None
+    cache["c"] = {"id": "3"}
+    assert reader.get("a")[0] == {"id": "1"}
+    cache["d"] = {"id": "4"}
+    assert reader.get("d") is None
+    cache.flush()
+    assert reader.get("d")[0] == {"id": "4"}
+    cache.close()
+    reader.close()
@@ -0,0 +1,85 @@
+def paged_query(key, total, queries):
+    def query(query, variables={}):
+        queries.append(dict(variables))
+        start = 0 if variables["after"] is None else int(variables["after"]) + 1
+        stop = min(start + variables["first"], total)
+        return {
+            "data": {
+                key: {
+                    "edges": [
+                        {"node": {"id": str(index)}} for index in range(start, stop)
+                    ],
+                    "pageInfo": {
+                        "endCursor": str(stop - 1),
+                        "hasNextPage": stop < total,
+                        "globalCount": total,
+                    },
+                }
+            }
+        }
+
+    return query
+
+
+def test_get_all_follows_pages(api):
+    queries = []
+    api.query = paged_query("malwares", 5, queries)
+    progress = []
+    malwares = api.malware.list(
+        getAll=True,
+        pageSize=2,
+        progressCallback=lambda fetched, total: progress.append((fetched, total)),
+    )
+    assert [malware["id"] for malware in malwares] == ["0", "1", "2", "3", "4"]
+    assert [variables["after"] for variables in queries] == [None, "1", "3"]
+    assert all(variables["first"] == 2 for variables in queries)
+    assert progress == [(2, 5), (4, 5), (5, 5)]
+
+
+def test_stream_is_lazy(api):
+    queries = []
+    api.query = paged_query("indicators", 10, queries)
+    indicators = iter(api.indicator.list(stream=True, first=5))
+    assert next(indicators)["id"] == "0"
+    assert len(queries) <= 2
+
+
+def test_parallel_time_windows(api):
+    days = ["2020-01-0" + str(day) + "T00:00:00+00:00" for day in range(1, 9)]
+    queries = []
+
+    def query(query, variables={}):
+        queries.append(variables)
+        dates = list(days)
+        for date_filter in variables["filters"] or []:
+            bound = date_filter["values"][0]
+            if date_filter["operator"] == "gte":
+                dates = [date for date in dates if date >= bound]
+            else:
+                dates = [date for date in dates if date < bound]
+        if variables["orderMode"] == "desc":
+            dates.reverse()
+        start = 0 if variables["after"] is None else int(variables["after"]) + 1
+        stop = min(start + variables["first"], len(dates))
+        return {
+            "data": {
+                "indicators": {
+                    "edges": [
+                        {"node": {"id": dates[index], "created_at": dates[index]}}
+                        for index in range(start, stop)
+                    ],
+                    "pageInfo": {
+                        "endCursor": str(stop - 1),
+                        "hasNextPage": stop < len(dates),
+                        "globalCount": len(dates),
+                    },
+                }
+            }
+        }
+
+    api.query = query
+    indicators = api.indicator.list(getAll=True, pageSize=2, parallel=4)
+    assert [indicator["id"] for indicator in indicators] == days
+    assert len([variables for variables in queries if variables["filters"]]) == 4
+    unordered = api.indicator.list(getAll=True, pageSize=2, parallel=4, ordered=False)
+    assert sorted(indicator["id"] for indicator in unordered) == days
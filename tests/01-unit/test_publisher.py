@@ -0,0 +1,96 @@
+import pytest
+
+from pycti import BundlePublisher, InMemoryBroker, PublishError
+
+
+def test_publisher_confirms_messages():
+    broker = InMemoryBroker()
+    publisher = BundlePublisher(broker, "exchange", window=2)
+    for i in range(5):
+        publisher.publish("routing", str(i).encode())
+    publisher.close()
+    assert [message[2] for message in broker.messages] == [
+        b"0",
+        b"1",
+        b"2",
+        b"3",
+        b"4",
+    ]
+    assert broker.closed
+
+
+def test_publisher_retries_nacked_and_returned_messages():
+    broker = InMemoryBroker(nacks=2, returns=1)
+    publisher = BundlePublisher(broker, "exchange", retry_delay=1, max_retry_delay=3)
+    publisher.publish("routing", b"bundle")
+    publisher.flush()
+    assert broker.messages == [("exchange", "routing", b"bundle")]
+    assert broker.delays == [1, 2, 3]
+
+
+def test_publisher_gives_up_after_max_retries():
+    broker = InMemoryBroker(nacks=3)
+    publisher = BundlePublisher(broker, "exchange", max_retries=2)
+    publisher.publish("routing", b"bundle")
+    with pytest.raises(PublishError) as error:
+        publisher.flush()
+    assert error.value.messages[0].body == b"bundle"
+    assert broker.messages == []
+
+
+def test_publisher_resends_unconfirmed_messages_on_reconnect():
+    sent = []
+
+    class SilentBroker(InMemoryBroker):
+        def publish(self, exchange, routing_key, body, message_id):
+            sent.append(body)
+
+    broker = SilentBroker()
+    publisher = BundlePublisher(broker, "exchange")
+    publisher.publish("routing", b"a")
+    publisher.publish("routing", b"b")
+    publisher.on_confirm(1, True)
+    publisher.on_close()
+    publisher.publish("routing", b"c")
+    publisher.on_open()
+    assert sent == [b"a", b"b", b"b", b"c"]
+    publisher.on_confirm(2, True, multiple=True)
+    publisher.flush(timeout=1)
+
+
+def test_publisher_resends_retries_lost_with_the_connection():
+    broker = InMemoryBroker(nacks=1, hold_retries=True)
+    publisher = BundlePublisher(broker, "exchange")
+    publisher.publish("routing", b"bundle")
+    assert len(broker.retries) == 1
+    # The connection is lost before the retry runs
+    broker.disconnect()
+    broker.reconnect()
+    publisher.flush(timeout=1)
+    assert broker.messages == [("exchange", "routing", b"bundle")]
+    # A retry of the lost connection running late does not send it again
+    broker.run_retries()
+    assert broker.messages == [("exchange", "routing", b"bundle")]
+
+
+def test_publish_batches_are_confirmed_separately():
+    class SilentBroker(InMemoryBroker):
+        def publish(self, exchange, routing_key, body, message_id):
+            pass
+
+    broker = SilentBroker()
+    publisher = BundlePublisher(broker, "exchange", max_retries=0)
+    failing = publisher.batch()
+    failing.publish("routing", b"a")
+    waiting = publisher.batch()
+    waiting.publish("routing", b"b")
+    publisher.on_confirm(1, False)
+    # The unconfirmed message of the other batch is not waited for
+    with pytest.raises(PublishError) as error:
+        failing.flush(timeout=1)
+    assert [message.body for message in error.value.messages] == [b"a"]
+    with pytest.raises(TimeoutError):
+        waiting.flush(timeout=0.1)
+    publisher.on_confirm(2, True)
+    waiting.flush(timeout=1)
+    publisher.flush(timeout=1)
@@ -0,0 +1,149 @@
+import json
+
+import pytest
+
+from pycti.api.opencti_api_batch import parse_operation
+from pycti.api.opencti_api_replay import QueryReplay
+
+LABEL = "query Label($id: String!) { label(id: $id) { id value } }"
+LABEL_ADD = (
+    "mutation LabelAdd($input: LabelAddInput) { labelAdd(input: $input) { id } }"
+)
+
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, body):
+        self.content = json.dumps(body).encode()
+        self.text = self.content.decode()
+
+    def json(self):
+        return json.loads(self.content)
+
+
+@pytest.fixture
+def make_api(api):
+    def make(respond):
+        posts = []
+
+        def post(query, variables={}):
+            posts.append((query, variables))
+            return FakeResponse(respond(query, variables))
+
+        api.post = post
+        return api, posts
+
+    return make
+
+
+def test_parse_operation_splits_fields():
+    operation = parse_operation(
+        "query Q($id: String!, $first: Int) { a: label(id: $id) { id } "
+        'labels(search: "}", first: $first) { edges { node { id } } } }'
+    )
+    assert operation.operation_type == "query"
+    assert operation.definitions == {"id": "$id: String!", "first": "$first: Int"}
+    assert [key for key, field in operation.fields] == ["a", "labels"]
+    assert operation.fields[0][1] == "label(id: $id) { id }"
+    assert parse_operation("{ label { id } }") is None
+
+
+def test_batch_merges_queries_and_renames_their_variables(make_api):
+    api, posts = make_api(
+        lambda query, variables: {
+            "data": {
+                "b0_0": {"id": variables["b0_id"], "value": "a"},
+                "b1_0": {"id": variables["b1_id"], "value": "b"},
+            }
+        }
+    )
+    with api.batch() as batch:
+        first = batch.call(api.query, LABEL, {"id": "1"})
+        second = batch.call(api.query, LABEL, {"id": "2"})
+    assert len(posts) == 1
+    document, variables = posts[0]
+    assert document.startswith("query Batch($b0_id: String!, $b1_id: String!)")
+    assert "b0_0: label(id: $b0_id) { id value }" in document
+    assert "b1_0: label(id: $b1_id) { id value }" in document
+    assert variables == {"b0_id": "1", "b1_id": "2"}
+    assert first.result() == {"data": {"label": {"id": "1", "value": "a"}}}
+    assert second.result() == {"data": {"label": {"id": "2", "value": "b"}}}
+
+
+def test_batch_routes_errors_to_their_call(make_api):
+    api, posts = make_api(
+        lambda query, variables: {
+            "data": {"b0_0": {"id": "1", "value": "a"}, "b1_0": None},
+            "errors": [{"message": "Forbidden", "path": ["b1_0"]}],
+        }
+    )
+    with api.batch() as batch:
+        allowed = batch.call(api.query, LABEL, {"id": "1"})
+        forbidden = batch.call(api.query, LABEL, {"id": "2"})
+    assert allowed.result()["data"]["label"]["id"] == "1"
+    with pytest.raises(ValueError) as error:
+        forbidden.result()
+    assert error.value.args[0]["message"] == "Forbidden"
+
+
+def test_batch_sends_mutations_and_queries_separately(make_api):
+    def respond(query, variables):
+        if query.startswith("mutation Batch"):
+            return {"data": {"b0_0": {"id": "m0"}, "b1_0": {"id": "m1"}}}
+        return {"data": {"label": {"id": "1", "value": "a"}}}
+
+    api, posts = make_api(respond)
+    with api.batch() as batch:
+        query = batch.call(api.query, LABEL, {"id": "1"})
+        mutations = [
+            batch.call(api.query, LABEL_ADD, {"input": {"value": value}})
+            for value in ["a", "b"]
+        ]
+    # A single query is sent as is
+    assert sorted(document.split("(")[0] for document, variables in posts) == [
+        "mutation Batch",
+        "query Label",
+    ]
+    assert query.result()["data"]["label"]["id"] == "1"
+    assert [call.result()["data"]["labelAdd"]["id"] for call in mutations] == [
+        "m0",
+        "m1",
+    ]
+
+
+def test_batch_sends_file_uploads_alone(make_api):
+    def respond(query, variables):
+        if "uploadImport" in query:
+            return {"data": {"uploadImport": {"id": "f", "name": "a.json"}}}
+        return {"data": {"b0_0": {"id": "1"}, "b1_0": {"id": "2"}}}
+
+    api, posts = make_api(respond)
+    with api.batch() as batch:
+        upload = batch.call(api.upload_file, file_name="a.json", data=b"{}")
+        labels = [batch.call(api.query, LABEL, {"id": id}) for id in ["1", "2"]]
+    assert len(posts) == 2
+    upload_posts = [post for post in posts if "uploadImport" in post[0]]
+    assert len(upload_posts) == 1
+    assert "Batch" not in upload_posts[0][0]
+    assert upload.result()["data"]["uploadImport"]["id"] == "f"
+    assert [call.result()["data"]["label"]["id"] for call in labels] == ["1", "2"]
+
+
+def test_batch_hands_its_queries_to_the_replay_running_it(make_api):
+    api, posts = make_api(lambda query, variables: {})
+
+    def read_labels():
+        with api.batch() as batch:
+            labels = [batch.call(api.query, LABEL, {"id": id}) for id in ["1", "2"]]
+        return [call.result()["data"]["label"]["value"] for call in labels]
+
+    replay = QueryReplay(read_labels)
+    document, variables = api.run_replay(replay)
+    assert document.startswith("query Batch(")
+    assert variables == {"b0_id": "1", "b1_id": "2"}
+    replay.record({"data": {"b0_0": {"value": "a"}, "b1_0": {"value": "b"}}})
+    assert api.run_replay(replay) is None
+    assert replay.result == ["a", "b"]
+    assert posts == []
+    assert not api.is_replaying()
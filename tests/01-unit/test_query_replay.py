@@ -0,0 +1,64 @@
+from pycti.api.opencti_api_replay import QueryReplay, ReplayError
+
+
+class FakeApi:
+    def __init__(self):
+        self.replay = None
+
+    def query(self, query, variables={}):
+        return self.replay.query(query, variables)
+
+
+def run(api, replay, responses):
+    api.replay = replay
+    pending = replay.run()
+    while pending is not None:
+        replay.record(responses[pending[0]])
+        pending = replay.run()
+
+
+def test_replay_runs_the_call_once_per_query():
+    api = FakeApi()
+    runs = []
+
+    def call():
+        runs.append(1)
+        first = api.query("first")
+        second = api.query("second", {"id": first["id"]})
+        return second["value"]
+
+    replay = QueryReplay(call)
+    run(api, replay, {"first": {"id": "1"}, "second": {"value": "done"}})
+    assert replay.done and replay.result == "done"
+    assert len(runs) == 3
+
+
+def test_replay_fails_when_the_interruption_is_swallowed():
+    api = FakeApi()
+
+    def call():
+        try:
+            first = api.query("first")
+        except:
+            first = None
+        return api.query("second", {"first": first})
+
+    replay = QueryReplay(call)
+    run(api, replay, {"first": {"id": "1"}, "second": {"value": "done"}})
+    assert replay.done
+    assert isinstance(replay.error, ReplayError)
+    assert replay.responses == []
+
+
+def test_replay_tolerates_a_swallowed_last_query():
+    api = FakeApi()
+
+    def call():
+        try:
+            return api.query("first")["id"]
+        except:
+            return None
+
+    replay = QueryReplay(call)
+    run(api, replay, {"first": {"id": "1"}})
+    assert replay.done and replay.result == "1"
@@ -0,0 +1,56 @@
+import concurrent.futures
+import json
+import threading
+
+from pycti import request_context, submit_in_context
+
+
+class FakeResponse:
+    status_code = 200
+    content = json.dumps({"data": {"ok": True}}).encode()
+
+
+class FakeSession:
+    def __init__(self):
+        self.headers = []
+        self.lock = threading.Lock()
+
+    def post(self, url, data=None, files=None, headers=None, **kwargs):
+        with self.lock:
+            self.headers.append(headers)
+        return FakeResponse()
+
+
+def test_request_context_headers_are_local_to_the_thread(api):
+    api.session = FakeSession()
+    barrier = threading.Barrier(2, timeout=5)
+
+    def handle(applicant_id):
+        with request_context(applicant_id=applicant_id, retry_number=1):
+            barrier.wait()
+            api.query("query { ok }")
+
+    threads = [threading.Thread(target=handle, args=[a]) for a in ["a", "b"]]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    api.query("query { ok }")
+    applicants = [
+        headers.get("opencti-applicant-id") for headers in api.session.headers
+    ]
+    assert sorted(applicants[:2]) == ["a", "b"]
+    assert applicants[2] is None
+    assert api.session.headers[0]["opencti-retry-number"] == "1"
+    assert "opencti-applicant-id" not in api.request_headers
+
+
+def test_request_context_is_kept_in_executor_threads(api):
+    api.session = FakeSession()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+        with request_context(applicant_id="a"):
+            with request_context(work_id="work"):
+                submit_in_context(executor, api.query, "query { ok }").result()
+        executor.submit(api.query, "query { ok }").result()
+    assert api.session.headers[0]["opencti-applicant-id"] == "a"
+    assert "opencti-applicant-id" not in api.session.headers[1]
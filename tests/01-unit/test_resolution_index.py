@@ -0,0 +1,118 @@
+from pycti import ResolutionIndex
+
+
+def platform(entities):
+    def respond(query, variables):
+        if "stixDomainObjects(" in query and "first" in variables:
+            edges = [{"node": entity} for entity in entities]
+            page = {"hasNextPage": False, "endCursor": None, "globalCount": 0}
+            return {"data": {"stixDomainObjects": {"edges": edges, "pageInfo": page}}}
+        if "filters0" in variables:
+            return {"data": {"candidate0": {"edges": []}, "candidate1": {"edges": []}}}
+        return {"data": {"stixDomainObject": {"id": variables["id"], "full": True}}}
+
+    return respond
+
+
+def intrusion_set(id, name, aliases):
+    return {
+        "id": id,
+        "standard_id": "intrusion-set--" + id,
+        "entity_type": "Intrusion-Set",
+        "parent_types": ["Stix-Domain-Object"],
+        "name": name,
+        "aliases": aliases,
+    }
+
+
+def test_resolution_index_answers_lookups_without_queries(fake_api):
+    api, queries = fake_api(
+        platform(
+            [intrusion_set("1", "APT28", ["Sofacy"]), intrusion_set("2", "APT29", [])]
+        )
+    )
+    api.resolution_index = ResolutionIndex(api, authoritative=True).build()
+    queries.clear()
+    sdo = api.stix_domain_object
+    assert sdo.get_by_stix_id_or_name(types=["Intrusion-Set"], name="Unknown") is None
+    assert queries == []
+    result = sdo.get_by_stix_id_or_name(
+        types=["Intrusion-Set"], name="Fancy Bear", aliases=["Sofacy"]
+    )
+    assert result["id"] == "1" and result["full"]
+    assert [variables for query, variables in queries] == [{"id": "1"}]
+    # Index misses are only looked up by stix id
+    queries.clear()
+    sdo.get_by_stix_id_or_name(
+        types=["Intrusion-Set"], stix_id="intrusion-set--9", name="Unknown"
+    )
+    assert [variables for query, variables in queries] == [{"id": "intrusion-set--9"}]
+    assert "$types" not in queries[0][0]
+    # Other types than the indexed ones are still resolved by the API
+    queries.clear()
+    sdo.get_by_stix_id_or_name(types=["Report"], name="Unknown")
+    assert len(queries) == 1 and "filters0" in queries[0][1]
+
+
+def test_resolution_index_follows_stream_events(fake_api):
+    api, queries = fake_api(platform([intrusion_set("1", "APT28", [])]))
+    index = ResolutionIndex(api).build()
+    stix_object = {
+        "id": "identity--3",
+        "x_opencti_id": "3",
+        "type": "identity",
+        "identity_class": "organization",
+        "name": "ACME",
+        "x_opencti_aliases": ["Acme Corp"],
+    }
+    index.process_stream_event("create", {"data": stix_object})
+    assert index.resolve(types=["Organization"], name="Acme Corp") == "3"
+    assert index.resolve(types=["Identity"], stix_id="identity--3") == "3"
+    stix_object["name"] = "ACME Inc"
+    index.process_stream_event("update", {"data": stix_object})
+    assert index.resolve(name="ACME") is None
+    index.process_stream_event(
+        "delete", {"data": {"id": "intrusion-set--1", "x_opencti_id": "1"}}
+    )
+    assert index.resolve(name="APT28") is None
+
+
+def test_resolution_index_misses_are_looked_up_by_default(fake_api):
+    api, queries = fake_api(platform([intrusion_set("1", "APT28", [])]))
+    api.resolution_index = ResolutionIndex(api).build()
+    queries.clear()
+    sdo = api.stix_domain_object
+    assert sdo.get_by_stix_id_or_name(types=["Intrusion-Set"], name="APT29") is None
+    assert len(queries) == 1 and "filters0" in queries[0][1]
+
+
+def test_resolution_index_adds_imported_entities(fake_api):
+    api, queries = fake_api(platform([intrusion_set("1", "APT28", [])]))
+    index = ResolutionIndex(api).build()
+    api.resolution_index = index
+    created = {
+        "2": {
+            "id": "2",
+            "standard_id": "malware--2",
+            "entity_type": "Malware",
+            "parent_types": ["Stix-Domain-Object"],
+        },
+        "1": {
+            "id": "1",
+            "standard_id": "intrusion-set--1",
+            "entity_type": "Intrusion-Set",
+            "parent_types": ["Stix-Domain-Object"],
+        },
+    }
+    api.malware.import_from_stix2 = lambda **kwargs: created["2"]
+    api.intrusion_set.import_from_stix2 = lambda **kwargs: created["1"]
+    api.stix2.import_object(
+        {"type": "malware", "id": "malware--2", "name": "Emotet", "aliases": ["Geodo"]}
+    )
+    assert index.resolve(types=["Malware"], name="Geodo") == "2"
+    # Upserted under another name, the imported name is added to the aliases
+    api.stix2.import_object(
+        {"type": "intrusion-set", "id": "intrusion-set--1", "name": "Fancy Bear"}
+    )
+    assert index.resolve(types=["Intrusion-Set"], name="APT28") == "1"
+    assert index.resolve(types=["Intrusion-Set"], name="Fancy Bear") == "1"
@@ -0,0 +1,80 @@
+import requests
+
+from pycti.connector.opencti_connector_stream import SSEReader
+
+STREAM = (
+    b": comment\n\n"
+    b'id: 1-0\nevent: connected\ndata: {"lastEventId": "1-0"}\n\n'
+    b"event: heartbeat\ndata: 2021-01-01\n\n"
+    b'id: 2-0\r\nevent: create\r\ndata: {"a":\r\ndata: 1}\r\n\r\n'
+    b"retry: 500\nid: 3-0\nevent: update\ndata:{}\n\n"
+    b"id: 4-0\nevent: delete\ndata: incomplete"
+)
+
+
+def chunks(size):
+    return [STREAM[i : i + size] for i in range(0, len(STREAM), size)]
+
+
+def test_sse_reader_splits_events_across_chunks():
+    for size in [1, 2, 7, len(STREAM)]:
+        reader = SSEReader("http://opencti/stream")
+        events = list(reader.parse(chunks(size)))
+        assert [(e.id, e.event) for e in events] == [
+            ("1-0", "connected"),
+            ("1-0", "heartbeat"),
+            ("2-0", "create"),
+            ("3-0", "update"),
+        ]
+        assert events[2].data == '{"a":\n1}'
+        assert events[3].raw_data == b"{}"
+        assert reader.retry == 500
+        assert reader.last_event_id == "3-0"
+
+
+def test_sse_reader_filters_event_types():
+    reader = SSEReader("http://opencti/stream", events={"create", "update"})
+    events = list(reader.parse(chunks(16)))
+    assert [e.event for e in events] == ["create", "update"]
+
+
+def test_sse_reader_reconnects_from_last_event_with_backoff(monkeypatch):
+    delays = []
+    monkeypatch.setattr(
+        "pycti.connector.opencti_connector_stream.time.sleep", delays.append
+    )
+
+    class FakeResponse:
+        def __init__(self, content):
+            self.content = content
+
+        def iter_content(self, chunk_size):
+            yield self.content
+            raise requests.ConnectionError("connection lost")
+
+        def close(self):
+            pass
+
+    class FakeReader(SSEReader):
+        def __init__(self, *args, **kwargs):
+            SSEReader.__init__(self, *args, **kwargs)
+            self.connected_from = []
+            self.attempts = 0
+
+        def connect(self):
+            self.connected_from.append(self.last_event_id)
+            self.attempts += 1
+            if self.attempts in [2, 3]:
+                raise requests.ConnectionError("refused")
+            content = b"id: %d-0\ndata: {}\n\n" % self.attempts
+            return FakeResponse(content)
+
+    reader = FakeReader("http://opencti/stream", last_event_id="0-0", max_retry=5000)
+    events = []
+    for event in reader:
+        events.append(event.id)
+        if len(events) == 2:
+            break
+    assert events == ["1-0", "4-0"]
+    assert reader.connected_from == ["0-0", "1-0", "1-0", "1-0"]
+    assert [delay * 1000 for delay in delays] == [3000, 5000, 5000]
@@ -0,0 +1,68 @@
+import threading
+
+
+def test_prepare_export_reads_each_object_once(api):
+    reads = []
+    lock = threading.Lock()
+
+    def read(**kwargs):
+        with lock:
+            reads.append(kwargs["id"])
+        return {
+            "id": kwargs["id"],
+            "standard_id": "malware--" + kwargs["id"],
+            "entity_type": "Malware",
+            "parent_types": ["Stix-Domain-Object"],
+            "name": kwargs["id"],
+        }
+
+    api.malware.read = read
+    api.stix_core_relationship.list = lambda **kwargs: []
+    api.stix_sighting_relationship.list = lambda **kwargs: []
+    objects = [
+        {"id": str(index % 120), "standard_id": "malware--" + str(index % 120)}
+        for index in range(240)
+    ]
+    for entity_object in objects:
+        entity_object["entity_type"] = "Malware"
+    report = {
+        "id": "report--1",
+        "x_opencti_id": "r1",
+        "type": "report",
+        "objects": objects,
+        "objectsIds": [entity_object["id"] for entity_object in objects],
+    }
+    result = api.stix2.prepare_export(report, "full", max_workers=4)
+    assert sorted(reads) == sorted(str(index) for index in range(120))
+    assert [item["id"] for item in result[1:]] == [
+        "malware--" + str(index) for index in range(120)
+    ]
+    assert len(result[0]["object_refs"]) == 240
+
+
+def test_export_list_deduplicates_objects(api):
+    author = {
+        "id": "o1",
+        "standard_id": "identity--1",
+        "entity_type": "Organization",
+        "parent_types": ["Identity"],
+        "name": "Author",
+    }
+    api.malware.list = lambda **kwargs: [
+        {
+            "id": str(index),
+            "standard_id": "malware--" + str(index),
+            "entity_type": "Malware",
+            "parent_types": ["Stix-Domain-Object"],
+            "name": str(index),
+            "createdBy": dict(author),
+            "createdById": "o1",
+        }
+        for index in list(range(100)) + [0]
+    ]
+    bundle = api.stix2.export_list("Malware")
+    ids = [item["id"] for item in bundle["objects"]]
+    assert ids[:2] == ["identity--1", "malware--0"]
+    assert sorted(ids) == sorted(
+        ["identity--1"] + ["malware--" + str(index) for index in range(100)]
+    )
@@ -0,0 +1,153 @@
+import threading
+
+
+def test_import_bundle_parallel_follows_references(api):
+    imported = []
+    lock = threading.Lock()
+
+    def import_item(item, update=False, types=None):
+        with lock:
+            imported.append(item["id"])
+
+    api.stix2.import_item = import_item
+    api.stix2.prewarm = lambda stix_objects, types: {}
+    relationship = {
+        "type": "relationship",
+        "id": "relationship--1",
+        "source_ref": "attack-pattern--1",
+        "target_ref": "attack-pattern--2",
+    }
+    attack_patterns = [
+        {
+            "type": "attack-pattern",
+            "id": "attack-pattern--" + str(index),
+            "created_by_ref": "identity--1",
+        }
+        for index in range(5)
+    ]
+    identity = {"type": "identity", "id": "identity--1"}
+    cycle = [
+        {"type": "note", "id": "note--1", "object_refs": ["note--2"]},
+        {"type": "note", "id": "note--2", "object_refs": ["note--1"]},
+    ]
+    objects = [relationship] + attack_patterns + [identity] + cycle
+    result = api.stix2.import_bundle(
+        {"type": "bundle", "objects": objects}, max_workers=4
+    )
+    assert [item["id"] for item in result] == [item["id"] for item in objects]
+    assert sorted(imported) == sorted(item["id"] for item in objects)
+    assert imported.index("identity--1") < imported.index("attack-pattern--1")
+    assert imported.index("attack-pattern--2") < imported.index("relationship--1")
+
+
+def test_import_bundle_resolves_sighting_refs_once(api):
+    known = {"indicator--1": "i1", "identity--1": "o1", "observed-data--1": "d1"}
+    lookups = []
+    sightings = []
+
+    def query(query, variables={}):
+        lookups.append(variables["id"])
+        node = None
+        if variables["id"] in known:
+            node = {"id": known[variables["id"]], "entity_type": "Stix-Domain-Object"}
+        return {"data": {"stixObjectOrStixRelationship": node}}
+
+    def create(**kwargs):
+        sightings.append((kwargs["fromId"], kwargs["toId"]))
+        return {"id": "s" + str(len(sightings)), "entity_type": "stix-sighting"}
+
+    api.query = query
+    api.stix2.prewarm = lambda stix_objects, types: {}
+    api.stix_sighting_relationship.create = create
+    objects = [
+        {
+            "type": "sighting",
+            "id": "sighting--" + str(index),
+            "sighting_of_ref": "indicator--1",
+            "where_sighted_refs": ["identity--1", "identity--2"],
+            "observed_data_refs": ["observed-data--1"],
+        }
+        for index in range(3)
+    ]
+    api.stix2.import_bundle({"type": "bundle", "objects": objects})
+    assert sorted(lookups) == sorted(
+        ["indicator--1", "identity--1", "identity--2", "observed-data--1"]
+    )
+    assert sightings == [("i1", "o1"), ("d1", "o1")] * 3
+    # Missing references are only remembered during one import
+    known["identity--2"] = "o2"
+    lookups.clear()
+    api.stix2.import_bundle({"type": "bundle", "objects": objects[:1]})
+    assert lookups == ["identity--2"]
+    assert sorted(sightings[-4:]) == [
+        ("d1", "o1"),
+        ("d1", "o2"),
+        ("i1", "o1"),
+        ("i1", "o2"),
+    ]
+
+
+def test_prewarm_caches_known_values_without_creating_any(api):
+    listed = []
+
+    def lister(entities):
+        def list(**kwargs):
+            listed.append(kwargs.get("filters"))
+            return entities
+
+        return list
+
+    def create(**kwargs):
+        raise AssertionError("prewarm must not create " + str(kwargs))
+
+    api.label.list = lister([{"id": "l1", "value": "known"}])
+    api.kill_chain_phase.list = lister([])
+    api.external_reference.list = lister([{"id": "e1", "url": "https://example.com"}])
+    marking_reads = []
+
+    def read_marking(**kwargs):
+        marking_reads.append(kwargs["filters"])
+        return {"id": "m1"}
+
+    api.marking_definition.read = read_marking
+    api.label.create = create
+    api.kill_chain_phase.create = create
+    api.external_reference.create = create
+    stix_objects = [
+        {
+            "type": "malware",
+            "id": "malware--" + str(index),
+            "labels": ["known", "unknown"],
+            "external_references": [
+                {"source_name": "example", "url": "https://example.com"}
+            ],
+        }
+        for index in range(3)
+    ]
+    result = api.stix2.prewarm(stix_objects)
+    assert result["labels"] == 2 and result["external_references"] == 1
+    assert api.stix2.mapping_cache["label_known"] == "l1"
+    assert api.stix2.mapping_cache["https://example.com"] == {"id": "e1"}
+    assert "label_unknown" not in api.stix2.mapping_cache
+    assert listed == [
+        [{"key": "value", "values": ["known", "unknown"]}],
+        [{"key": "url", "values": ["https://example.com"]}],
+    ]
+    # The TLP:WHITE marking is only read for the reports of external references
+    assert marking_reads == [] and result["marking_definitions"] == 0
+    api.stix2.prewarm(stix_objects, types=["external-reference-as-report"])
+    assert len(marking_reads) == 1
+    assert api.stix2.mapping_cache["marking_tlpwhite"] == {"id": "m1"}
+
+
+def test_import_bundle_skips_prewarm_for_small_bundles(api):
+    prewarmed = []
+    api.stix2.prewarm = lambda stix_objects, types: prewarmed.append(len(stix_objects))
+    api.stix2.import_item = lambda item, update=False, types=None: None
+    for count in [1, 10]:
+        objects = [
+            {"type": "malware", "id": "malware--" + str(index)}
+            for index in range(count)
+        ]
+        api.stix2.import_bundle({"type": "bundle", "objects": objects})
+    assert prewarmed == [10]
@@ -0,0 +1,25 @@
+def test_label_cache_is_written_back(api):
+    created = []
+
+    def query(query, variables={}):
+        if "labelAdd" in query:
+            value = variables["input"]["value"]
+            created.append(value)
+            return {"data": {"labelAdd": {"id": "label-" + value, "value": value}}}
+        raise AssertionError("Unexpected query")
+
+    api.query = query
+    malware = {"type": "malware", "id": "malware--1", "labels": ["apt", "apt", "rat"]}
+    tagged = {
+        "type": "malware",
+        "id": "malware--2",
+        "x_opencti_tags": [{"value": "rat"}],
+    }
+    first = api.stix2.extract_embedded_relationships(malware)
+    second = api.stix2.extract_embedded_relationships(tagged)
+    assert first["object_label"] == ["label-apt", "label-rat"]
+    assert second["object_label"] == ["label-rat"]
+    assert created == ["apt", "rat"]
+    metrics = api.stix2.cache_metrics()
+    assert metrics["label_hits"] == 1
+    assert metrics["label_misses"] == 2
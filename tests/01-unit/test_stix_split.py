@@ -1,3 +1,8 @@
+import io
+import json
+
+import pytest
+
 from pycti.utils.opencti_stix2_splitter import OpenCTIStix2Splitter
 
 
@@ -8,3 +13,61 @@ def test_split_bundle():
         content = file.read()
     bundles = stix_splitter.split_bundle(content)
     assert len(bundles) == 7029
+
+
+def test_split_bundle_by_level():
+    notes = [
+        {
+            "type": "note",
+            "id": "note--" + str(index),
+            "object_refs": ["note--" + str(index - 1)] if index > 0 else [],
+        }
+        for index in range(3000)
+    ]
+    attack_patterns = [
+        {"type": "attack-pattern", "id": "attack-pattern--" + str(index)}
+        for index in range(10)
+    ]
+    bundle = {"type": "bundle", "objects": notes + attack_patterns}
+    bundles = OpenCTIStix2Splitter().split_bundle(bundle, False, max_objects=4)
+    assert len(bundles) == 3000 + 2
+    assert [len(item["objects"]) for item in bundles[:4]] == [4, 4, 3, 1]
+    imported = set()
+    for item in bundles:
+        for stix_object in item["objects"]:
+            for ref in OpenCTIStix2Splitter.get_refs(stix_object):
+                assert ref in imported
+        imported.update(stix_object["id"] for stix_object in item["objects"])
+
+
+def test_split_file_matches_split_bundle():
+    notes = [
+        {
+            "type": "note",
+            "id": "note--" + str(index),
+            "content": "é ✓ " + str(index),
+            "object_refs": ["note--" + str(index - 1)] if index > 0 else [],
+        }
+        for index in range(50)
+    ]
+    bundle = {"type": "bundle", "id": "bundle--1", "objects": notes}
+    content = json.dumps(bundle, indent=2, ensure_ascii=False).encode("utf-8")
+    expected = OpenCTIStix2Splitter().split_bundle(bundle, False, max_objects=10)
+    bundles = OpenCTIStix2Splitter().split_file(
+        io.BytesIO(content), False, max_objects=10, chunk_size=64
+    )
+    assert [item["objects"] for item in bundles] == [
+        [
+            {key: value for key, value in stix_object.items() if key != "nb_deps"}
+            for stix_object in item["objects"]
+        ]
+        for item in expected
+    ]
+
+
+def test_split_file_checks_the_bundle_type():
+    content = json.dumps(
+        {"objects": [{"type": "note", "id": "note--1"}], "type": "note"}
+    ).encode("utf-8")
+    with pytest.raises(ValueError):
+        list(OpenCTIStix2Splitter().split_file(io.BytesIO(content), False))
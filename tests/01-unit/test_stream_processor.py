@@ -0,0 +1,57 @@
+import threading
+import time
+
+from pycti.connector.opencti_connector_helper import StreamProcessor
+from pycti.connector.opencti_connector_stream import StreamEvent, StreamState
+
+
+def test_stream_processor_keeps_entity_order_and_state_watermark():
+    processed = []
+    done = threading.Event()
+    states = []
+    lock = threading.Lock()
+
+    def callback(msg):
+        entity = msg.data
+        if entity == "slow":
+            time.sleep(0.05)
+        with lock:
+            processed.append((entity, msg.id))
+        if msg.id == "9-0":
+            done.set()
+
+    state = StreamState(lambda: None, states.append, checkpoint_events=1)
+    processor = StreamProcessor(callback, state, queue_size=4, max_workers=3)
+    processor.daemon = True
+    entities = ["slow", "a", "b", "slow", "a", "b", "c", "a", "b"]
+    # Queued while catching up
+    processor.put(StreamEvent("1-0", "update", b"slow"), "slow")
+    processor.start()
+    for partition in processor.partitions:
+        assert partition.maxsize == 1
+    for index, entity in enumerate(entities[1:], start=2):
+        processor.put(StreamEvent(str(index) + "-0", "update", entity.encode()), entity)
+    assert done.wait(5)
+    time.sleep(0.2)
+    for entity in set(entities):
+        ids = [msg_id for name, msg_id in processed if name == entity]
+        assert ids == sorted(ids)
+    assert len(processed) == len(entities)
+    # The state never goes past an event not yet processed
+    watermarks = [int(state["connectorLastEventId"].split("-")[0]) for state in states]
+    assert watermarks == sorted(watermarks)
+    assert watermarks[-1] == len(entities)
+
+
+def test_stream_state_checkpoints_by_batches():
+    saved = []
+    state = StreamState(
+        lambda: {"other": 1}, saved.append, checkpoint_events=3, checkpoint_interval=60
+    )
+    for index in range(1, 8):
+        state.update(str(index) + "-0")
+    assert [s["connectorLastEventId"] for s in saved] == ["3-0", "6-0"]
+    state.checkpoint()
+    state.checkpoint()
+    assert saved[-1] == {"other": 1, "connectorLastEventId": "7-0"}
+    assert len(saved) == 3